@@ -1,162 +1,15 @@
 import os
-import re
-import pandas as pd
-from openpyxl import load_workbook
+import multiprocessing
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
-
-# ======================= HỖ TRỢ LẤY HEADER / CỘT ==========================
-
-def read_excel_with_header_detect(file_path):
-    """Đọc Excel, tự động tìm dòng chứa 'Mã SV' để làm header (thử nhiều dòng đầu)."""
-    for i in range(0, 15):
-        try:
-            df = pd.read_excel(file_path, header=i)
-        except:
-            continue
-        cols = [str(c).lower() for c in df.columns]
-        if any("mã sv" in c for c in cols):
-            return df
-    # fallback
-    return pd.read_excel(file_path)
-
-def find_column(df, keywords):
-    """Tìm cột chứa 1 trong các keyword (không phân biệt hoa thường)."""
-    for c in df.columns:
-        c_low = str(c).lower()
-        for kw in keywords:
-            if kw in c_low:
-                return c
-    return None
-
-def find_tbc_dtp_column(df):
-    """Tìm chính xác cột TBC ĐTP (*) (ưu tiên cột chứa cả 'tbc' và 'đtp')."""
-    for c in df.columns:
-        c_low = str(c).lower().replace('\n', ' ')
-        if 'tbc' in c_low and 'đtp' in c_low:
-            return c
-    # một số file có dấu khác, thử tìm 'đtp' hoặc 'tbc' chứa 'đtp'
-    for c in df.columns:
-        c_low = str(c).lower().replace('\n', ' ')
-        if 'đtp' in c_low or 'tbc đtp' in c_low:
-            return c
-    return None
-
-# ======================= HỖ TRỢ LẤY MÃ MÔN / NHÓM ==========================
-
-def extract_subject_group_from_cell(file_path):
-    """
-    Đọc ô C5/C6 lấy text, xử lý một vài dạng:
-    - "Tiếng Anh 1 (LCE315) - 06" -> subject=LCE315, group=06
-    - Có thể gặp "(251-LCE315-01)" -> subject=LCE315, group=01
-    """
-    try:
-        wb = load_workbook(file_path, data_only=True)
-        ws = wb.active
-        # thử C5 trước, nếu rỗng thử C6
-        raw = ws['C5'].value
-        if raw is None or str(raw).strip() == "":
-            raw = ws['C6'].value
-        if raw is None:
-            return None, None
-
-        text = str(raw).strip()
-
-        # 1) nếu có phần trong ngoặc dạng 251-LCE315-01 hoặc LCE315
-        paren = re.search(r'\((.*?)\)', text)
-        subject_code = None
-        group_code = None
-        if paren:
-            inside = paren.group(1).strip()
-            # nếu inside có dấu '-' phân tách như 251-LCE315-01
-            parts = inside.split('-')
-            if len(parts) >= 3:
-                # parts e.g. ['251','LCE315','01']
-                subject_code = parts[1].strip()
-                group_code = parts[2].strip()
-            elif len(parts) == 2:
-                # e.g. 'LCE315-01' hoặc '251-LCE315'
-                # nếu phần đầu là số, lấy phần sau làm subject (251-LCE315)
-                if parts[0].isdigit():
-                    subject_code = parts[1].strip()
-                else:
-                    subject_code = parts[0].strip()
-                    group_code = parts[1].strip()
-            else:
-                # chỉ có 1 phần trong ngoặc, có thể là LCE315
-                subject_code = inside.strip()
-
-        # 2) nếu không có ngoặc, thử tách pattern " - 06" ở cuối
-        if group_code is None:
-            gm = re.search(r'-\s*([A-Za-z0-9]+)\s*$', text)
-            if gm:
-                group_code = gm.group(1).strip()
-
-        # 3) nếu subject_code vẫn None, tìm mã dạng LEX123 trong chuỗi
-        if subject_code is None:
-            sm = re.search(r'\b([A-Za-z]{2,}\d{2,})\b', text)
-            if sm:
-                subject_code = sm.group(1).strip()
-
-        return subject_code, group_code
-    except:
-        return None, None
-
-def extract_subject_group_from_filename(filename):
-    """
-    Tách mã môn + nhóm từ tên file nếu không tìm được trong file.
-    Ví dụ: "...(251-LCE315-01).xlsx" => LCE315, 01
-    """
-    base = os.path.basename(filename)
-    m = re.search(r'\((?:\d+-)?([A-Za-z0-9]+)-(\d+)\)', base, re.IGNORECASE)
-    if m:
-        return m.group(1), m.group(2)
-    # thử tìm pattern LCE315-01 không trong ngoặc
-    m2 = re.search(r'([A-Za-z]{2,}\d{2,})[-_ ]+(\d{1,3})', base)
-    if m2:
-        return m2.group(1), m2.group(2)
-    return None, None
-
-def extract_subject_group(file_path):
-    """Tổng hợp: thử cell trước, nếu ko có thử filename."""
-    sub, grp = extract_subject_group_from_cell(file_path)
-    if (sub is None or sub == "") or (grp is None or grp == ""):
-        # thử filename
-        fn_sub, fn_grp = extract_subject_group_from_filename(file_path)
-        if sub is None or sub == "":
-            sub = fn_sub
-        if grp is None or grp == "":
-            grp = fn_grp
-    # chuẩn hóa None -> ""
-    if sub is None:
-        sub = ""
-    if grp is None:
-        grp = ""
-    return sub, grp
-
-# ======================= KIỂM TRA MÃ SV HỢP LỆ ==========================
-
-def is_probably_masv(s):
-    """Trả True nếu chuỗi có vẻ là Mã SV, loại trừ dòng tiêu đề/ghi chú."""
-    if pd.isna(s):
-        return False
-    st = str(s).strip()
-    if st == "":
-        return False
-    # loại trừ các dòng ghi chú
-    if re.search(r'(số sv|môn học|cbgd|nhóm|tbc|điều kiện)', st, re.IGNORECASE):
-        return False
-    # nếu chỉ chứa chữ số hoặc chữ+số hoặc có dấu gạch, coi là mã SV hợp lệ
-    if re.match(r'^[A-Za-z0-9\-/]+$', st):
-        # tránh những chuỗi quá ngắn như '01' (thường là nhãn nhóm)
-        if len(st) <= 2 and st.isdigit():
-            return False
-        return True
-    return False
+from ghep_diem import engine, parallel, store, writer
+from ghep_diem.background import BackgroundTask, format_progress
+from ghep_diem.cache import ParseCache
 
 # ======================= GHÉP FILE ==========================
 
-def merge_files():
+def read_settings():
+    """Kiểm tra các ô nhập trên giao diện, trả về (folder_in, out_path, workers) hoặc None nếu thiếu."""
     folder_in = folder_in_var.get()
     folder_out = folder_out_var.get()
     file_out = file_out_var.get().strip()
@@ -168,104 +21,220 @@ def merge_files():
         messagebox.showerror("Lỗi", "Bạn chưa chọn thư mục lưu file kết quả!")
         return
     if file_out == "":
-        file_out = "Tong_Hop_Diem.xlsx"
-    if not file_out.lower().endswith('.xlsx'):
-        file_out += '.xlsx'
+        file_out = "Tong_Hop_Diem"
+    # đuôi file theo định dạng đã chọn (xlsx / csv / parquet)
+    file_out = writer.with_extension(file_out, out_format_var.get())
 
-    excel_files = [f for f in os.listdir(folder_in) if f.lower().endswith(('.xlsx', '.xls'))]
-    if not excel_files:
-        messagebox.showwarning("Không có file", "Thư mục không có file Excel!")
+    try:
+        workers = parallel.parse_workers(workers_var.get())
+    except ValueError:
+        messagebox.showerror("Lỗi", "Số tiến trình phải là số nguyên >= 1!")
         return
+    return folder_in, os.path.join(folder_out, file_out), workers
 
-    all_data = []
-    for f in excel_files:
-        path = os.path.join(folder_in, f)
-
-        # lấy subject & group (cell trước, filename sau)
-        subject_code, group_code = extract_subject_group(path)
-
-        # đọc bảng chính
-        try:
-            df = read_excel_with_header_detect(path)
-        except:
-            continue
-
-        # tìm cột Mã SV và cột TBC ĐTP
-        col_ma_sv = find_column(df, ['mã sv', 'masv'])
-        col_tbc = find_tbc_dtp_column(df)
-
-        if col_ma_sv is None or col_tbc is None:
-            # không đủ thông tin để lấy dữ liệu -> bỏ qua file
-            continue
-
-        try:
-            temp = df[[col_ma_sv, col_tbc]].copy()
-        except:
-            continue
-
-        # lọc: chỉ dòng có khả năng là SV thật
-        temp = temp[temp[col_ma_sv].apply(is_probably_masv)]
-        # thêm cột thông tin môn & nhóm, đảm bảo có kiểu str
-        temp = temp.copy()
-        temp.rename(columns={col_ma_sv: 'Mã SV', col_tbc: 'Điểm TBC'}, inplace=True)
-        temp['Mã môn học'] = str(subject_code) if subject_code is not None else ""
-        temp['Nhóm'] = str(group_code) if group_code is not None else ""
-        # đưa cột theo thứ tự mong muốn
-        cols_order = ['Mã SV', 'Mã môn học', 'Nhóm', 'Điểm TBC']
-        # nếu có các cột khác thì giữ nguyên sau đó
-        temp = temp[[c for c in cols_order if c in temp.columns] + [c for c in temp.columns if c not in cols_order]]
-
-        all_data.append(temp)
-
-    if all_data:
-        result = pd.concat(all_data, ignore_index=True)
-        # đảm bảo thứ tự final
-        final_cols = ['Mã SV', 'Mã môn học', 'Nhóm', 'Điểm TBC']
-        final_cols = [c for c in final_cols if c in result.columns] + [c for c in result.columns if c not in final_cols]
-        result = result[final_cols]
-        out_path = os.path.join(folder_out, file_out)
-        result.to_excel(out_path, index=False)
-        messagebox.showinfo("Thành công", f"Đã lưu file kết quả tại:\n{out_path}")
-    else:
-        messagebox.showwarning("Không có dữ liệu", "Không ghép được dữ liệu hợp lệ từ các file Excel!")
-
-# ======================= GIAO DIỆN ==========================
-
-ctk.set_appearance_mode("System")
-ctk.set_default_color_theme("blue")
+def current_profile():
+    """Profile "lms", hoặc "auto" (nhận dạng kiểu cho từng file) nếu đánh dấu ô tự nhận dạng."""
+    return "auto" if auto_detect_var.get() else "lms"
 
-root = ctk.CTk()
-root.title("Ghép điểm - TNT - LMS")
-root.geometry("750x270")
-
-folder_in_var = ctk.StringVar()
-folder_out_var = ctk.StringVar()
-file_out_var = ctk.StringVar(value="Tong_Hop_Diem.xlsx")
-
-def select_folder_in():
-    fol = filedialog.askdirectory(title="Chọn thư mục chứa file Excel")
-    if fol:
-        folder_in_var.set(fol)
+def merge_files():
+    if task.running():
+        return
+    settings = read_settings()
+    if settings is None:
+        return
+    folder_in, out_path, workers = settings
+    profile = current_profile()
 
-def select_folder_out():
-    fol = filedialog.askdirectory(title="Chọn thư mục lưu file kết quả")
-    if fol:
-        folder_out_var.set(fol)
+    # quét thư mục con / file ZIP: bỏ file kết quả lần trước nếu nó nằm trong thư mục nguồn
+    paths = [p for p in engine.list_excel_files(folder_in, recursive=recursive_var.get())
+             if os.path.abspath(p) != os.path.abspath(out_path)]
+    if not paths:
+        messagebox.showwarning("Không có file", "Thư mục không có file Excel!")
+        return
 
-frame = ctk.CTkFrame(root)
-frame.pack(padx=20, pady=20, fill="both", expand=True)
+    log_write(f"Bắt đầu ghép {len(paths)} file ({workers} tiến trình)...")
+
+    # chạy nền để cửa sổ không bị treo; kết quả báo lại ở on_merged.
+    # Ghi dần từng file cho đỡ RAM; Parquet vẫn ghi cả bảng để giữ kiểu số của cột,
+    # bảng điểm ngang cũng cần cả bảng kết quả
+    matrix_policy = "max" if matrix_var.get() else None
+    # CSDL tra cứu: lượt ghép đặt theo tên thư mục nguồn (vd. HK1_2025), ghép lại thì ghi đè
+    result_store = None
+    if store_var.get():
+        result_store = store.ResultStore(store_path(), store.default_run_name(folder_in), profile)
+    set_busy(True)
+    show_progress(0, len(paths), 0, 0)
+    task.start(lambda rows, error: on_merged(out_path, rows, error),
+               engine.merge_to_file, paths, out_path, profile, task.log, workers, task.progress, task.cancel_event,
+               ParseCache(profile), stream=out_format_var.get() != "parquet" and matrix_policy is None,
+               matrix_policy=matrix_policy, store=result_store)
+
+def watch_folder():
+    if task.running():
+        return
+    settings = read_settings()
+    if settings is None:
+        return
+    folder_in, out_path, workers = settings
+    profile = current_profile()
+    log_write(f"Bắt đầu theo dõi {folder_in} -> {out_path} (bấm Hủy để dừng)...")
+    set_busy(True)
+    task.start(on_watch_stopped, engine.watch_to_file, folder_in, out_path, profile, task.log, workers,
+               task.progress, task.cancel_event, ParseCache(profile), recursive=recursive_var.get())
+
+def on_watch_stopped(_, error):
+    set_busy(False)
+    if error is not None:
+        log_write(f"Lỗi: {error}")
+        messagebox.showerror("Lỗi", f"Dừng theo dõi do lỗi: {error}")
+    else:
+        status_var.set("Đã dừng theo dõi.")
+
+def on_merged(out_path, rows, error):
+    set_busy(False)
+    if error is not None:
+        log_write(f"Lỗi: {error}")
+        messagebox.showerror("Lỗi", f"Lỗi khi ghép dữ liệu: {error}")
+    elif rows is None:
+        status_var.set("Đã hủy.")
+    elif rows == 0:
+        messagebox.showwarning("Không có dữ liệu", "Không ghép được dữ liệu hợp lệ từ các file Excel!")
+    else:
+        log_write(f"Hoàn tất: {rows} dòng -> {out_path}")
+        messagebox.showinfo("Thành công", f"Đã lưu file kết quả tại:\n{out_path}")
 
-ctk.CTkLabel(frame, text="Thư mục chứa file Excel:").grid(row=0, column=0, sticky="w", padx=5, pady=5)
-ctk.CTkEntry(frame, textvariable=folder_in_var, width=430).grid(row=0, column=1, padx=5, pady=5)
-ctk.CTkButton(frame, text="Chọn...", command=select_folder_in).grid(row=0, column=2, padx=5, pady=5)
+# ======================= TRA CỨU ==========================
 
-ctk.CTkLabel(frame, text="Thư mục lưu file kết quả:").grid(row=1, column=0, sticky="w", padx=5, pady=5)
-ctk.CTkEntry(frame, textvariable=folder_out_var, width=430).grid(row=1, column=1, padx=5, pady=5)
-ctk.CTkButton(frame, text="Chọn...", command=select_folder_out).grid(row=1, column=2, padx=5, pady=5)
+def store_path():
+    """CSDL tra cứu: file store.DEFAULT_NAME trong thư mục lưu file kết quả."""
+    return os.path.join(folder_out_var.get(), store.DEFAULT_NAME)
 
-ctk.CTkLabel(frame, text="Tên file kết quả (.xlsx):").grid(row=2, column=0, sticky="w", padx=5, pady=5)
-ctk.CTkEntry(frame, textvariable=file_out_var, width=430).grid(row=2, column=1, padx=5, pady=5)
+def search_scores(_=None):
+    """Tra mọi điểm của 1 Mã SV qua các lượt ghép đã lưu, in ra ô nhật ký."""
+    student_id = search_var.get().strip()
+    if not student_id:
+        return
+    if not folder_out_var.get() or not os.path.isfile(store_path()):
+        messagebox.showwarning("Tra cứu", "Thư mục lưu file kết quả chưa có CSDL tra cứu "
+                                          "(ghép với ô 'Lưu vào CSDL tra cứu' trước)!")
+        return
+    table = store.lookup(store_path(), student_id)
+    log_write(f"Tra cứu {student_id}: {len(table)} dòng")
+    for line in store.format_rows(table):
+        log_write("  " + line)
 
-ctk.CTkButton(frame, text="Ghép dữ liệu", command=merge_files, fg_color="green").grid(row=3, column=1, pady=20)
+# ======================= GIAO DIỆN ==========================
 
-root.mainloop()
+if __name__ == "__main__":
+    # cần cho process pool khi đóng gói exe (Windows)
+    multiprocessing.freeze_support()
+
+    ctk.set_appearance_mode("System")
+    ctk.set_default_color_theme("blue")
+
+    root = ctk.CTk()
+    root.title("Ghép điểm - TNT - LMS")
+    root.geometry("750x650")
+
+    folder_in_var = ctk.StringVar()
+    folder_out_var = ctk.StringVar()
+    file_out_var = ctk.StringVar(value="Tong_Hop_Diem.xlsx")
+    workers_var = ctk.StringVar(value=str(parallel.default_workers()))
+    out_format_var = ctk.StringVar(value="xlsx")
+    auto_detect_var = ctk.BooleanVar(value=False)
+    recursive_var = ctk.BooleanVar(value=False)
+    matrix_var = ctk.BooleanVar(value=False)
+    store_var = ctk.BooleanVar(value=False)
+    search_var = ctk.StringVar()
+
+    def select_folder_in():
+        fol = filedialog.askdirectory(title="Chọn thư mục chứa file Excel")
+        if fol:
+            folder_in_var.set(fol)
+
+    def select_folder_out():
+        fol = filedialog.askdirectory(title="Chọn thư mục lưu file kết quả")
+        if fol:
+            folder_out_var.set(fol)
+
+    def select_format(fmt):
+        file_out_var.set(writer.with_extension(file_out_var.get().strip() or "Tong_Hop_Diem", fmt))
+
+    def log_write(text):
+        log_box.configure(state="normal")
+        log_box.insert("end", text + "\n")
+        log_box.see("end")
+        log_box.configure(state="disabled")
+
+    def show_progress(done, total, rows, elapsed):
+        progress_bar.set(done / total if total else 0)
+        status_var.set(format_progress(done, total, rows, elapsed))
+
+    def set_busy(busy):
+        btn_merge.configure(state="disabled" if busy else "normal")
+        btn_watch.configure(state="disabled" if busy else "normal")
+        btn_cancel.configure(state="normal" if busy else "disabled")
+
+    def cancel_merge():
+        task.cancel()
+        btn_cancel.configure(state="disabled")
+        log_write("Đang hủy, chờ file hiện tại xử lý xong...")
+
+    frame = ctk.CTkFrame(root)
+    frame.pack(padx=20, pady=20, fill="both", expand=True)
+
+    ctk.CTkLabel(frame, text="Thư mục chứa file Excel:").grid(row=0, column=0, sticky="w", padx=5, pady=5)
+    ctk.CTkEntry(frame, textvariable=folder_in_var, width=430).grid(row=0, column=1, padx=5, pady=5)
+    ctk.CTkButton(frame, text="Chọn...", command=select_folder_in).grid(row=0, column=2, padx=5, pady=5)
+
+    ctk.CTkLabel(frame, text="Thư mục lưu file kết quả:").grid(row=1, column=0, sticky="w", padx=5, pady=5)
+    ctk.CTkEntry(frame, textvariable=folder_out_var, width=430).grid(row=1, column=1, padx=5, pady=5)
+    ctk.CTkButton(frame, text="Chọn...", command=select_folder_out).grid(row=1, column=2, padx=5, pady=5)
+
+    ctk.CTkLabel(frame, text="Tên file kết quả:").grid(row=2, column=0, sticky="w", padx=5, pady=5)
+    ctk.CTkEntry(frame, textvariable=file_out_var, width=430).grid(row=2, column=1, padx=5, pady=5)
+    # csv / parquet ghi nhanh hơn nhiều khi không cần mở bằng Excel
+    ctk.CTkOptionMenu(frame, values=list(writer.FORMATS), variable=out_format_var, command=select_format,
+                      width=140).grid(row=2, column=2, padx=5, pady=5)
+
+    ctk.CTkLabel(frame, text="Số tiến trình (song song):").grid(row=3, column=0, sticky="w", padx=5, pady=5)
+    ctk.CTkEntry(frame, textvariable=workers_var, width=80).grid(row=3, column=1, sticky="w", padx=5, pady=5)
+    # thư mục lẫn file LMS / AQ / LMS chọn lẻ: nhận dạng kiểu từng file, ghép chung 1 lượt
+    ctk.CTkCheckBox(frame, text="Tự nhận dạng kiểu file", variable=auto_detect_var).grid(
+        row=3, column=1, sticky="e", padx=5, pady=5)
+    # file xuất theo từng khoa (thư mục con) hoặc cả thư mục nén .zip: đọc thẳng, không cần giải nén
+    ctk.CTkCheckBox(frame, text="Cả thư mục con, file ZIP", variable=recursive_var).grid(
+        row=3, column=2, sticky="w", padx=5, pady=5)
+    # thêm file _ma_tran: mỗi SV 1 dòng, mỗi môn 1 cột (SV nhiều điểm cùng môn: lấy điểm cao nhất, liệt kê ở _diem_trung)
+    ctk.CTkCheckBox(frame, text="Thêm bảng điểm ngang (SV × môn)", variable=matrix_var).grid(
+        row=4, column=1, sticky="w", padx=5, pady=5)
+    # ghi thêm vào Tra_cuu_diem.sqlite3 trong thư mục kết quả, để tra điểm 1 SV qua các học kỳ (ô tra cứu bên dưới)
+    ctk.CTkCheckBox(frame, text="Lưu vào CSDL tra cứu", variable=store_var).grid(
+        row=4, column=2, sticky="w", padx=5, pady=5)
+
+    btn_merge = ctk.CTkButton(frame, text="Ghép dữ liệu", command=merge_files, fg_color="green")
+    btn_merge.grid(row=5, column=1, pady=(20, 10))
+    btn_cancel = ctk.CTkButton(frame, text="Hủy", command=cancel_merge, state="disabled", fg_color="gray")
+    btn_cancel.grid(row=5, column=2, padx=5, pady=(20, 10))
+    # theo dõi: tự ghép lại khi có file thêm/sửa/xóa, chỉ đọc lại các file đó
+    btn_watch = ctk.CTkButton(frame, text="Theo dõi thư mục", command=watch_folder)
+    btn_watch.grid(row=5, column=0, padx=5, pady=(20, 10), sticky="w")
+
+    # tiến độ: số file xong, số dòng, thời gian còn lại
+    progress_bar = ctk.CTkProgressBar(frame)
+    progress_bar.set(0)
+    progress_bar.grid(row=6, column=0, columnspan=3, sticky="ew", padx=5, pady=5)
+    status_var = ctk.StringVar(value="")
+    ctk.CTkLabel(frame, textvariable=status_var).grid(row=7, column=0, columnspan=3, sticky="w", padx=5)
+    log_box = ctk.CTkTextbox(frame, height=150, state="disabled")
+    log_box.grid(row=8, column=0, columnspan=3, sticky="nsew", padx=5, pady=5)
+
+    ctk.CTkLabel(frame, text="Tra cứu Mã SV:").grid(row=9, column=0, sticky="w", padx=5, pady=5)
+    entry_search = ctk.CTkEntry(frame, textvariable=search_var, width=430)
+    entry_search.grid(row=9, column=1, padx=5, pady=5)
+    entry_search.bind("<Return>", search_scores)
+    ctk.CTkButton(frame, text="Tìm", command=search_scores).grid(row=9, column=2, padx=5, pady=5)
+
+    task = BackgroundTask(root, log_write, show_progress)
+
+    root.mainloop()
@@ -1,74 +1,15 @@
 import os
-import re
-import pandas as pd
-from openpyxl import load_workbook
+import multiprocessing
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
-
-# ======================= HÀM HỖ TRỢ ==========================
-
-def read_excel_with_header_detect(file_path):
-    """Đọc Excel, tự động tìm dòng có Mã SV hoặc TBC để làm header"""
-    for i in range(0, 10):  # thử 10 dòng đầu tiên
-        try:
-            df = pd.read_excel(file_path, header=i)
-        except:
-            continue
-        cols = [str(c).lower() for c in df.columns]
-        if any("mã sv" in c for c in cols) or any("tbc" in c for c in cols):
-            return df
-    # Nếu không tìm thấy header, trả về mặc định
-    return pd.read_excel(file_path)
-
-def find_column(df, keywords):
-    """Tìm tên cột chứa 1 trong các keyword (không phân biệt hoa thường)"""
-    for c in df.columns:
-        c_low = str(c).lower()
-        for kw in keywords:
-            if kw in c_low:
-                return c
-    return None
-
-def extract_subject_group_from_cell(file_path):
-    """Đọc ô C5 (hoặc C6) trong file Excel và tách mã môn học + nhóm"""
-    try:
-        from openpyxl import load_workbook
-        wb = load_workbook(file_path, data_only=True)
-        ws = wb.active
-        # thử ô C5 trước, nếu rỗng thử ô C6
-        cell_value = ws['C5'].value or ws['C6'].value
-        if not cell_value:
-            return None, None
-
-        text = str(cell_value)
-        # Lấy mã môn học trong dấu ngoặc
-        subject_match = re.search(r'\((.*?)\)', text)
-        subject_code = subject_match.group(1).strip() if subject_match else None
-
-        # Lấy nhóm sau dấu -
-        group_match = re.search(r'-\s*(\w+)', text)
-        group_code = group_match.group(1).strip() if group_match else None
-
-        return subject_code, group_code
-    except:
-        return None, None
-
-def is_valid_masv(value):
-    """Kiểm tra xem value có phải là mã sinh viên hợp lệ không"""
-    if pd.isna(value):
-        return False
-    s = str(value).strip()
-    # loại bỏ các dòng có chữ 'điều kiện'
-    if 'điều kiện' in s.lower():
-        return False
-    # mã SV hợp lệ: chữ số/chữ cái/ký tự gạch (-,/)
-    if re.match(r'^[A-Za-z0-9\-/]+$', s):
-        return True
-    return False
+from ghep_diem import engine, parallel, store, writer
+from ghep_diem.background import BackgroundTask, format_progress
+from ghep_diem.cache import ParseCache
 
 # ======================= CHỨC NĂNG GHÉP FILE ==========================
 
-def merge_files():
+def read_settings():
+    """Kiểm tra các ô nhập trên giao diện, trả về (folder_in, save_path, workers) hoặc None nếu thiếu"""
     folder_in = folder_in_var.get()
     folder_out = folder_out_var.get()
     output_name = file_name_var.get().strip()
@@ -83,106 +24,234 @@ def merge_files():
         messagebox.showerror("Lỗi", "Bạn chưa nhập tên file kết quả!")
         return
 
-    excel_files = [f for f in os.listdir(folder_in) if f.endswith(('.xlsx', '.xls'))]
-    if not excel_files:
-        messagebox.showwarning("Không có file", "Thư mục không có file Excel!")
+    try:
+        workers = parallel.parse_workers(workers_var.get())
+    except ValueError:
+        messagebox.showerror("Lỗi", "Số tiến trình phải là số nguyên >= 1!")
         return
 
-    all_data = []
-    for f in excel_files:
-        file_path = os.path.join(folder_in, f)
-
-        # lấy mã môn học + nhóm từ ô C5/C6
-        subject_code, group_code = extract_subject_group_from_cell(file_path)
-
-        try:
-            df = read_excel_with_header_detect(file_path)
-        except:
-            continue
+    # Đảm bảo tên file có đuôi theo định dạng đã chọn (xlsx / csv / parquet)
+    output_name = writer.with_extension(output_name, out_format_var.get())
+    return folder_in, os.path.join(folder_out, output_name), workers
 
-        col_ma_sv = find_column(df, ['mã sv', 'masv'])
-        col_tbc = find_column(df, ['tbc', 'đtp'])
+def current_profile():
+    """Profile "aq", hoặc "auto" (nhận dạng kiểu cho từng file) nếu đánh dấu ô tự nhận dạng."""
+    return "auto" if auto_detect_var.get() else "aq"
 
-        if col_ma_sv is None or col_tbc is None:
-            # bỏ qua file không đủ cột
-            continue
-
-        try:
-            temp = df[[col_ma_sv, col_tbc]].copy()
-        except:
-            continue
-
-        # lọc bỏ các dòng mà cột Mã SV bị trống
-        temp = temp[temp[col_ma_sv].notna()]
-
-        # lọc bỏ các dòng thống kê không phải sinh viên
-        temp = temp[temp[col_ma_sv].apply(is_valid_masv)]
+def merge_files():
+    if task.running():
+        return
+    settings = read_settings()
+    if settings is None:
+        return
+    folder_in, save_path, workers = settings
+    profile = current_profile()
 
-        temp.rename(columns={col_ma_sv: 'Mã SV', col_tbc: 'Điểm TBC'}, inplace=True)
-        temp['Mã môn học'] = subject_code
-        temp['Nhóm'] = group_code
+    # quét thư mục con / file ZIP: bỏ file kết quả lần trước nếu nó nằm trong thư mục nguồn
+    paths = [p for p in engine.list_excel_files(folder_in, recursive=recursive_var.get())
+             if os.path.abspath(p) != os.path.abspath(save_path)]
+    if not paths:
+        messagebox.showwarning("Không có file", "Thư mục không có file Excel!")
+        return
 
-        all_data.append(temp)
+    log_write(f"Bắt đầu ghép {len(paths)} file ({workers} tiến trình)...")
+
+    # chạy nền để cửa sổ không bị treo; kết quả báo lại ở on_merged.
+    # Ghi dần từng file cho đỡ RAM; Parquet vẫn ghi cả bảng để giữ kiểu số của cột,
+    # bảng điểm ngang cũng cần cả bảng kết quả
+    matrix_policy = "max" if matrix_var.get() else None
+    # CSDL tra cứu: lượt ghép đặt theo tên thư mục nguồn (vd. HK1_2025), ghép lại thì ghi đè
+    result_store = None
+    if store_var.get():
+        result_store = store.ResultStore(store_path(), store.default_run_name(folder_in), profile)
+    set_busy(True)
+    show_progress(0, len(paths), 0, 0)
+    task.start(lambda rows, error: on_merged(save_path, rows, error),
+               engine.merge_to_file, paths, save_path, profile, task.log, workers, task.progress, task.cancel_event,
+               ParseCache(profile), stream=out_format_var.get() != "parquet" and matrix_policy is None,
+               matrix_policy=matrix_policy, store=result_store)
+
+def watch_folder():
+    if task.running():
+        return
+    settings = read_settings()
+    if settings is None:
+        return
+    folder_in, save_path, workers = settings
+    profile = current_profile()
+    log_write(f"Bắt đầu theo dõi {folder_in} -> {save_path} (bấm Hủy để dừng)...")
+    set_busy(True)
+    task.start(on_watch_stopped, engine.watch_to_file, folder_in, save_path, profile, task.log, workers,
+               task.progress, task.cancel_event, ParseCache(profile), recursive=recursive_var.get())
+
+def on_watch_stopped(_, error):
+    set_busy(False)
+    if error is not None:
+        log_write(f"Lỗi: {error}")
+        messagebox.showerror("Lỗi", f"Dừng theo dõi do lỗi: {error}")
+    else:
+        status_var.set("Đã dừng theo dõi.")
+
+def on_merged(save_path, rows, error):
+    set_busy(False)
+    if error is not None:
+        log_write(f"Lỗi: {error}")
+        messagebox.showerror("Lỗi", f"Lỗi khi ghép dữ liệu: {error}")
+    elif rows is None:
+        status_var.set("Đã hủy.")
+    elif rows == 0:
+        messagebox.showwarning("Không có dữ liệu", "Không ghép được dữ liệu từ các file Excel!")
+    else:
+        log_write(f"Hoàn tất: {rows} dòng -> {save_path}")
+        messagebox.showinfo("Thành công", f"Đã lưu file kết quả tại:\n{save_path}")
 
-    if all_data:
-        result = pd.concat(all_data, ignore_index=True)
+# ======================= TRA CỨU ==========================
 
-        # Đảm bảo tên file có đuôi .xlsx
-        if not output_name.lower().endswith('.xlsx'):
-            output_name += '.xlsx'
+def store_path():
+    """CSDL tra cứu: file store.DEFAULT_NAME trong thư mục lưu file kết quả."""
+    return os.path.join(folder_out_var.get(), store.DEFAULT_NAME)
 
-        save_path = os.path.join(folder_out, output_name)
-        result.to_excel(save_path, index=False)
-        messagebox.showinfo("Thành công", f"Đã lưu file kết quả tại:\n{save_path}")
-    else:
-        messagebox.showwarning("Không có dữ liệu", "Không ghép được dữ liệu từ các file Excel!")
+def search_scores(_=None):
+    """Tra mọi điểm của 1 Mã SV qua các lượt ghép đã lưu, in ra ô nhật ký."""
+    student_id = search_var.get().strip()
+    if not student_id:
+        return
+    if not folder_out_var.get() or not os.path.isfile(store_path()):
+        messagebox.showwarning("Tra cứu", "Thư mục lưu file kết quả chưa có CSDL tra cứu "
+                                          "(ghép với ô 'Lưu vào CSDL tra cứu' trước)!")
+        return
+    table = store.lookup(store_path(), student_id)
+    log_write(f"Tra cứu {student_id}: {len(table)} dòng")
+    for line in store.format_rows(table):
+        log_write("  " + line)
 
 # ======================= GIAO DIỆN CUSTOMTKINTER ==========================
 
-ctk.set_appearance_mode("System")
-ctk.set_default_color_theme("blue")
-
-root = ctk.CTk()
-root.title("Ghép điểm - TNT - AQ")
-root.geometry("750x270")
-
-folder_in_var = ctk.StringVar()
-folder_out_var = ctk.StringVar()
-file_name_var = ctk.StringVar(value="Tong_Hop_Diem.xlsx")  # tên mặc định
-
-def select_folder_in():
-    folder_selected = filedialog.askdirectory(title="Chọn thư mục chứa file Excel")
-    if folder_selected:
-        folder_in_var.set(folder_selected)
-
-def select_folder_out():
-    folder_selected = filedialog.askdirectory(title="Chọn thư mục lưu file kết quả")
-    if folder_selected:
-        folder_out_var.set(folder_selected)
-
-frame = ctk.CTkFrame(root)
-frame.pack(padx=20, pady=20, fill="both", expand=True)
-
-lbl_in = ctk.CTkLabel(frame, text="Thư mục chứa file Excel:")
-lbl_in.grid(row=0, column=0, padx=5, pady=5, sticky="w")
-entry_in = ctk.CTkEntry(frame, textvariable=folder_in_var, width=400)
-entry_in.grid(row=0, column=1, padx=5, pady=5)
-btn_in = ctk.CTkButton(frame, text="Chọn...", command=select_folder_in)
-btn_in.grid(row=0, column=2, padx=5, pady=5)
-
-lbl_out = ctk.CTkLabel(frame, text="Thư mục lưu file kết quả:")
-lbl_out.grid(row=1, column=0, padx=5, pady=5, sticky="w")
-entry_out = ctk.CTkEntry(frame, textvariable=folder_out_var, width=400)
-entry_out.grid(row=1, column=1, padx=5, pady=5)
-btn_out = ctk.CTkButton(frame, text="Chọn...", command=select_folder_out)
-btn_out.grid(row=1, column=2, padx=5, pady=5)
-
-lbl_file = ctk.CTkLabel(frame, text="Tên file kết quả (.xlsx):")
-lbl_file.grid(row=2, column=0, padx=5, pady=5, sticky="w")
-entry_file = ctk.CTkEntry(frame, textvariable=file_name_var, width=400)
-entry_file.grid(row=2, column=1, padx=5, pady=5)
-
-btn_merge = ctk.CTkButton(frame, text="Ghép dữ liệu", command=merge_files, fg_color="green")
-btn_merge.grid(row=3, column=1, padx=5, pady=30)
-
-root.mainloop()
+if __name__ == "__main__":
+    # cần cho process pool khi đóng gói exe (Windows)
+    multiprocessing.freeze_support()
+
+    ctk.set_appearance_mode("System")
+    ctk.set_default_color_theme("blue")
+
+    root = ctk.CTk()
+    root.title("Ghép điểm - TNT - AQ")
+    root.geometry("750x650")
+
+    folder_in_var = ctk.StringVar()
+    folder_out_var = ctk.StringVar()
+    file_name_var = ctk.StringVar(value="Tong_Hop_Diem.xlsx")  # tên mặc định
+    workers_var = ctk.StringVar(value=str(parallel.default_workers()))
+    out_format_var = ctk.StringVar(value="xlsx")
+    auto_detect_var = ctk.BooleanVar(value=False)
+    recursive_var = ctk.BooleanVar(value=False)
+    matrix_var = ctk.BooleanVar(value=False)
+    store_var = ctk.BooleanVar(value=False)
+    search_var = ctk.StringVar()
+
+    def select_folder_in():
+        folder_selected = filedialog.askdirectory(title="Chọn thư mục chứa file Excel")
+        if folder_selected:
+            folder_in_var.set(folder_selected)
+
+    def select_folder_out():
+        folder_selected = filedialog.askdirectory(title="Chọn thư mục lưu file kết quả")
+        if folder_selected:
+            folder_out_var.set(folder_selected)
+
+    def select_format(fmt):
+        if file_name_var.get().strip():
+            file_name_var.set(writer.with_extension(file_name_var.get().strip(), fmt))
+
+    def log_write(text):
+        log_box.configure(state="normal")
+        log_box.insert("end", text + "\n")
+        log_box.see("end")
+        log_box.configure(state="disabled")
+
+    def show_progress(done, total, rows, elapsed):
+        progress_bar.set(done / total if total else 0)
+        status_var.set(format_progress(done, total, rows, elapsed))
+
+    def set_busy(busy):
+        btn_merge.configure(state="disabled" if busy else "normal")
+        btn_watch.configure(state="disabled" if busy else "normal")
+        btn_cancel.configure(state="normal" if busy else "disabled")
+
+    def cancel_merge():
+        task.cancel()
+        btn_cancel.configure(state="disabled")
+        log_write("Đang hủy, chờ file hiện tại xử lý xong...")
+
+    frame = ctk.CTkFrame(root)
+    frame.pack(padx=20, pady=20, fill="both", expand=True)
+
+    lbl_in = ctk.CTkLabel(frame, text="Thư mục chứa file Excel:")
+    lbl_in.grid(row=0, column=0, padx=5, pady=5, sticky="w")
+    entry_in = ctk.CTkEntry(frame, textvariable=folder_in_var, width=400)
+    entry_in.grid(row=0, column=1, padx=5, pady=5)
+    btn_in = ctk.CTkButton(frame, text="Chọn...", command=select_folder_in)
+    btn_in.grid(row=0, column=2, padx=5, pady=5)
+
+    lbl_out = ctk.CTkLabel(frame, text="Thư mục lưu file kết quả:")
+    lbl_out.grid(row=1, column=0, padx=5, pady=5, sticky="w")
+    entry_out = ctk.CTkEntry(frame, textvariable=folder_out_var, width=400)
+    entry_out.grid(row=1, column=1, padx=5, pady=5)
+    btn_out = ctk.CTkButton(frame, text="Chọn...", command=select_folder_out)
+    btn_out.grid(row=1, column=2, padx=5, pady=5)
+
+    lbl_file = ctk.CTkLabel(frame, text="Tên file kết quả:")
+    lbl_file.grid(row=2, column=0, padx=5, pady=5, sticky="w")
+    entry_file = ctk.CTkEntry(frame, textvariable=file_name_var, width=400)
+    entry_file.grid(row=2, column=1, padx=5, pady=5)
+    # csv / parquet ghi nhanh hơn nhiều khi không cần mở bằng Excel
+    opt_format = ctk.CTkOptionMenu(frame, values=list(writer.FORMATS), variable=out_format_var,
+                                   command=select_format, width=140)
+    opt_format.grid(row=2, column=2, padx=5, pady=5)
+
+    lbl_workers = ctk.CTkLabel(frame, text="Số tiến trình (song song):")
+    lbl_workers.grid(row=3, column=0, padx=5, pady=5, sticky="w")
+    entry_workers = ctk.CTkEntry(frame, textvariable=workers_var, width=80)
+    entry_workers.grid(row=3, column=1, padx=5, pady=5, sticky="w")
+    # thư mục lẫn file LMS / AQ / LMS chọn lẻ: nhận dạng kiểu từng file, ghép chung 1 lượt
+    chk_auto = ctk.CTkCheckBox(frame, text="Tự nhận dạng kiểu file", variable=auto_detect_var)
+    chk_auto.grid(row=3, column=1, padx=5, pady=5, sticky="e")
+    # file xuất theo từng khoa (thư mục con) hoặc cả thư mục nén .zip: đọc thẳng, không cần giải nén
+    chk_recursive = ctk.CTkCheckBox(frame, text="Cả thư mục con, file ZIP", variable=recursive_var)
+    chk_recursive.grid(row=3, column=2, padx=5, pady=5, sticky="w")
+    # thêm file _ma_tran: mỗi SV 1 dòng, mỗi môn 1 cột (SV nhiều điểm cùng môn: lấy điểm cao nhất, liệt kê ở _diem_trung)
+    chk_matrix = ctk.CTkCheckBox(frame, text="Thêm bảng điểm ngang (SV × môn)", variable=matrix_var)
+    chk_matrix.grid(row=4, column=1, padx=5, pady=5, sticky="w")
+    # ghi thêm vào Tra_cuu_diem.sqlite3 trong thư mục kết quả, để tra điểm 1 SV qua các học kỳ (ô tra cứu bên dưới)
+    chk_store = ctk.CTkCheckBox(frame, text="Lưu vào CSDL tra cứu", variable=store_var)
+    chk_store.grid(row=4, column=2, padx=5, pady=5, sticky="w")
+
+    btn_merge = ctk.CTkButton(frame, text="Ghép dữ liệu", command=merge_files, fg_color="green")
+    btn_merge.grid(row=5, column=1, padx=5, pady=(20, 10))
+    btn_cancel = ctk.CTkButton(frame, text="Hủy", command=cancel_merge, state="disabled", fg_color="gray")
+    btn_cancel.grid(row=5, column=2, padx=5, pady=(20, 10))
+    # theo dõi: tự ghép lại khi có file thêm/sửa/xóa, chỉ đọc lại các file đó
+    btn_watch = ctk.CTkButton(frame, text="Theo dõi thư mục", command=watch_folder)
+    btn_watch.grid(row=5, column=0, padx=5, pady=(20, 10), sticky="w")
+
+    # tiến độ: số file xong, số dòng, thời gian còn lại
+    progress_bar = ctk.CTkProgressBar(frame)
+    progress_bar.set(0)
+    progress_bar.grid(row=6, column=0, columnspan=3, sticky="ew", padx=5, pady=5)
+    status_var = ctk.StringVar(value="")
+    lbl_status = ctk.CTkLabel(frame, textvariable=status_var)
+    lbl_status.grid(row=7, column=0, columnspan=3, padx=5, sticky="w")
+    log_box = ctk.CTkTextbox(frame, height=150, state="disabled")
+    log_box.grid(row=8, column=0, columnspan=3, padx=5, pady=5, sticky="nsew")
+
+    lbl_search = ctk.CTkLabel(frame, text="Tra cứu Mã SV:")
+    lbl_search.grid(row=9, column=0, padx=5, pady=5, sticky="w")
+    entry_search = ctk.CTkEntry(frame, textvariable=search_var, width=400)
+    entry_search.grid(row=9, column=1, padx=5, pady=5)
+    entry_search.bind("<Return>", search_scores)
+    btn_search = ctk.CTkButton(frame, text="Tìm", command=search_scores)
+    btn_search.grid(row=9, column=2, padx=5, pady=5)
+
+    task = BackgroundTask(root, log_write, show_progress)
+
+    root.mainloop()
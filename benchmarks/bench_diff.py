@@ -0,0 +1,83 @@
+"""
+Đo so sánh 2 lượt ghép (ghep_diem.diff) trên 2 file kết quả CSV lớn: so cả bảng trong bộ nhớ với so theo phần
+qua file tạm (khi vượt MEMORY_ROWS dòng), in thời gian và bộ nhớ đỉnh (mỗi cách chạy trong 1 tiến trình riêng).
+Kiểm tra luôn số dòng thêm / mất / đổi điểm đúng với số đã cài vào bản mới.
+
+Chạy: python benchmarks/bench_diff.py [--rows 1000000] [--changed 1000] [--removed 200] [--added 300]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ghep_diem import diff  # noqa: E402
+
+def make_results(folder, n_rows, changed, removed, added, seed=0):
+    """Kết quả cũ / mới dạng cột của profile lms: bản mới đổi điểm changed dòng, bỏ removed dòng, thêm added dòng."""
+    rng = np.random.default_rng(seed)
+    old = pd.DataFrame({
+        "Mã SV": np.arange(n_rows) // 25 + 2251010000,
+        "Mã môn học": [f"MH{i % 25:03d}" for i in range(n_rows)],
+        "Nhóm": [f"{i % 4 + 1:02d}" for i in range(n_rows)],
+        "Điểm TBC": rng.integers(0, 101, n_rows) / 10,
+    })
+    new = old.copy()
+    rows = rng.choice(n_rows, changed + removed, replace=False)
+    new.loc[rows[:changed], "Điểm TBC"] = (new.loc[rows[:changed], "Điểm TBC"] + 0.5) % 10
+    new = new.drop(index=rows[changed:])
+    extra = old.head(added).assign(**{"Mã môn học": [f"MOI{i}" for i in range(added)]})
+    new = pd.concat([new, extra], ignore_index=True)
+    paths = os.path.join(folder, "cu.csv"), os.path.join(folder, "moi.csv")
+    old.to_csv(paths[0], index=False)
+    new.to_csv(paths[1], index=False)
+    return paths
+
+def _peak_mb():
+    try:
+        import resource  # không có trên Windows
+    except ImportError:
+        return float("nan")
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _run(old_path, new_path, memory_rows, queue):
+    t0 = time.perf_counter()
+    stats = diff.DiffStats()
+    for _ in diff.iter_diff(old_path, new_path, stats=stats, memory_rows=memory_rows):
+        pass
+    seconds = time.perf_counter() - t0
+    queue.put((seconds, _peak_mb(), (stats.added, stats.removed, stats.changed), stats.partitions))
+
+def measure(old_path, new_path, memory_rows):
+    """(giây, MB bộ nhớ đỉnh, (thêm, mất, đổi), số phần) của 1 lượt so trong tiến trình mới."""
+    queue = multiprocessing.Queue()
+    p = multiprocessing.Process(target=_run, args=(old_path, new_path, memory_rows, queue))
+    p.start()
+    result = queue.get()
+    p.join()
+    return result
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--changed", type=int, default=1000)
+    ap.add_argument("--removed", type=int, default=200)
+    ap.add_argument("--added", type=int, default=300)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old_path, new_path = make_results(tmp, args.rows, args.changed, args.removed, args.added)
+        expected = (args.added, args.removed, args.changed)
+        print(f"{args.rows:,} dòng mỗi bên, cài sẵn: {args.added} thêm, {args.removed} mất, {args.changed} đổi điểm")
+        for label, memory_rows in (("cả bảng trong RAM", args.rows * 2), ("theo phần", diff.MEMORY_ROWS)):
+            seconds, mb, got, partitions = measure(old_path, new_path, memory_rows)
+            print(f"  {label:18s}: {seconds:6.2f}s, RAM đỉnh {mb:6.0f} MB, {partitions} phần"
+                  + ("" if got == expected else f"  ⚠ đếm được {got}"), flush=True)
+
+if __name__ == "__main__":
+    main()
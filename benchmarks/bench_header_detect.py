@@ -0,0 +1,84 @@
+"""
+So sánh thời gian dò header: cách cũ (pd.read_excel(header=i) lặp nhiều lần)
+với cách mới (parse 1 lần, dò header trong bộ nhớ).
+
+Chạy: python benchmarks/bench_header_detect.py [--rows 60] [--header-row 9] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ghep_diem import reader  # noqa: E402
+
+def legacy_read_excel_with_header_detect(file_path, max_rows=15):
+    """Bản cũ trong Ghep_diem_LMS.py, giữ lại để so sánh."""
+    for i in range(0, max_rows):
+        try:
+            df = pd.read_excel(file_path, header=i)
+        except:
+            continue
+        cols = [str(c).lower() for c in df.columns]
+        if any("mã sv" in c for c in cols):
+            return df
+    return pd.read_excel(file_path)
+
+def make_sheet(path, n_rows, header_row, n_cols=20):
+    """Tạo 1 file điểm giả: tiêu đề ở C5, header ở dòng header_row (đánh số từ 1)."""
+    wb = Workbook()
+    ws = wb.active
+    ws["A1"] = "TRƯỜNG ĐẠI HỌC"
+    ws["C5"] = "Tiếng Anh 1 (LCE315) - 06"
+    headers = ["STT", "Mã SV", "Họ đệm", "Tên"] + [f"Điểm {k}" for k in range(1, n_cols - 5)] + ["TBC ĐTP (*)", "Ghi chú"]
+    for j, h in enumerate(headers, start=1):
+        ws.cell(header_row, j, h)
+    for i in range(n_rows):
+        r = header_row + 1 + i
+        ws.cell(r, 1, i + 1)
+        ws.cell(r, 2, 2251010000 + i)
+        ws.cell(r, 3, "Nguyễn Văn")
+        ws.cell(r, 4, "An")
+        for j in range(5, len(headers)):
+            ws.cell(r, j, round((i * 7 + j) % 100 / 10, 1))
+    ws.cell(header_row + n_rows + 2, 1, f"Số SV: {n_rows}")
+    ws.cell(header_row + n_rows + 3, 2, "Điều kiện dự thi")
+    wb.save(path)
+
+def timeit(func, path, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func(path)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rows", type=int, default=60, help="số dòng sinh viên mỗi file")
+    ap.add_argument("--header-row", type=int, default=9, help="dòng header (đánh số từ 1)")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "Tieng Anh 1 (251-LCE315-06).xlsx")
+        make_sheet(path, args.rows, args.header_row)
+
+        old_df = legacy_read_excel_with_header_detect(path)
+        new_df = reader.read_excel_with_header_detect(path)
+        pd.testing.assert_frame_equal(old_df, new_df)
+
+        t_old = timeit(legacy_read_excel_with_header_detect, path, args.repeat)
+        t_new = timeit(reader.read_excel_with_header_detect, path, args.repeat)
+
+    print(f"Header ở dòng {args.header_row}, {args.rows} SV/file")
+    print(f"  cũ (read_excel lặp): {t_old * 1000:8.1f} ms/file")
+    print(f"  mới (parse 1 lần)  : {t_new * 1000:8.1f} ms/file")
+    print(f"  nhanh hơn          : {t_old / t_new:8.1f}x")
+
+if __name__ == "__main__":
+    main()
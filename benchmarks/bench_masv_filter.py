@@ -0,0 +1,112 @@
+"""
+So sánh lọc / chuẩn hóa cột Mã SV: cách cũ (apply hàm regex từng dòng) với cách mới (theo cả cột, ghep_diem.masv).
+Trước khi đo, kiểm tra 2 cách cho kết quả giống hệt nhau trên cùng dữ liệu.
+
+Chạy: python benchmarks/bench_masv_filter.py [--rows 500000] [--repeat 3]
+      python benchmarks/bench_masv_filter.py --per-file   # cột cỡ 1 file điểm (vài chục dòng), để chọn VECTOR_MIN_ROWS
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ghep_diem import masv  # noqa: E402
+
+# các dòng không phải SV hay gặp cuối bảng điểm / giữa các khối
+NOISE = ["Số SV: 40", "Điều kiện dự thi", "CBGD", "TBC ĐTP (*)", "Nhóm 01", "Môn học", "01", "7", "",
+         "  ", None, np.nan, "SV-01/2", " 2251010123 ", "0012345", "12.5", "Ghi chú: vắng thi"]
+
+def make_column(n_rows, seed=1):
+    """Cột Mã SV giả kiểu object như khi đọc từ Excel: đa số là số nguyên, xen chuỗi, số thực và dòng ghi chú."""
+    rng = random.Random(seed)
+    values = []
+    for i in range(n_rows):
+        r = rng.random()
+        if r < 0.85:
+            values.append(2251010000 + i)
+        elif r < 0.90:
+            values.append(str(2251010000 + i))
+        elif r < 0.92:
+            values.append(float(2251010000 + i))
+        else:
+            values.append(rng.choice(NOISE))
+    return pd.Series(values, dtype=object)
+
+def timeit(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+# số dòng cột Mã SV khi đo --per-file: bảng điểm 1 nhóm ~20-80 SV, vài file xuất cả khóa / cả khoa dài hơn
+PER_FILE_SIZES = (20, 50, 100, 200, 500, 2000)
+
+def per_file(args):
+    """
+    Thời gian trung bình 1 cột (1 file) cho từng cỡ cột: apply hàm gốc, hàm theo cột như đang chạy
+    (ngưỡng VECTOR_MIN_ROWS hiện tại) và ép đường theo cột (.str của pandas / numpy) dù cột ngắn.
+    """
+    threshold, arrow = masv.VECTOR_MIN_ROWS, masv._ARROW_STRINGS
+
+    def forced(func):
+        def run(col):
+            masv.VECTOR_MIN_ROWS, masv._ARROW_STRINGS = 0, True
+            try:
+                return func(col)
+            finally:
+                masv.VECTOR_MIN_ROWS, masv._ARROW_STRINGS = threshold, arrow
+        return run
+
+    cases = [
+        ("lms  is_probably_masv", masv.is_probably_masv, masv.probably_masv_mask),
+        ("aq   is_valid_masv   ", masv.is_valid_masv, masv.valid_masv_mask),
+        ("v1/v2 format_mssv    ", masv.format_mssv_value, masv.format_mssv_series),
+    ]
+    print(f"VECTOR_MIN_ROWS = {threshold}, chuỗi pandas lưu bằng pyarrow: {'có' if arrow else 'không'}")
+    print("µs / file: cũ (apply) | hiện tại | ép theo cột")
+    for n_rows in PER_FILE_SIZES:
+        # đủ nhiều cột để mỗi lần đo ~args.rows dòng như khi ghép nhiều file
+        cols = [make_column(n_rows, seed=i) for i in range(max(1, args.rows // n_rows // 50))]
+        print(f"  {n_rows} dòng/file ({len(cols)} file):")
+        for name, value_func, col_func in cases:
+            times = []
+            for func in (lambda c: c.apply(value_func), col_func, forced(col_func)):
+                times.append(timeit(lambda: [func(c) for c in cols], args.repeat) / len(cols) * 1e6)
+            print(f"    {name}: {times[0]:8.0f} | {times[1]:8.0f} | {times[2]:8.0f}")
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rows", type=int, default=500_000, help="số dòng của cột Mã SV")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--per-file", action="store_true", help="đo theo cỡ cột của 1 file điểm (PER_FILE_SIZES)")
+    args = ap.parse_args()
+    if args.per_file:
+        per_file(args)
+        return
+
+    # đo đúng đường chạy theo cột kể cả khi --rows nhỏ hơn ngưỡng
+    masv.VECTOR_MIN_ROWS = 0
+    col = make_column(args.rows)
+    cases = [
+        ("lms  is_probably_masv", lambda: col.apply(masv.is_probably_masv), lambda: masv.probably_masv_mask(col)),
+        ("aq   is_valid_masv   ", lambda: col.apply(masv.is_valid_masv), lambda: masv.valid_masv_mask(col)),
+        ("v1/v2 format_mssv    ", lambda: col.apply(masv.format_mssv_value), lambda: masv.format_mssv_series(col)),
+    ]
+
+    print(f"Cột Mã SV {args.rows:,} dòng")
+    for name, old, new in cases:
+        # apply trả dtype object cho kết quả bool -> so sánh theo giá trị
+        assert old().astype(new().dtype).tolist() == new().tolist(), f"{name}: kết quả khác nhau"
+        t_old = timeit(old, args.repeat)
+        t_new = timeit(new, args.repeat)
+        print(f"  {name}: cũ {t_old * 1000:8.1f} ms | mới {t_new * 1000:8.1f} ms | nhanh hơn {t_old / t_new:5.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Đo thời gian ghép điểm trên dữ liệu giả (benchmarks/synth.py): cả lượt engine.merge_files cho từng profile /
+số tiến trình, và từng bước (đọc file, tách bảng, ghép, ghi xlsx/csv). Kết quả ghi ra JSON để so sánh giữa các lần chạy.
+
+Chạy: python benchmarks/bench_merge.py [--files 100] [--rows 60] [--profiles lms aq] [--workers 1 4]
+                                       [--repeat 3] [--json out.json] [--compare lan_truoc.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ghep_diem import engine, reader, writer  # noqa: E402
+from ghep_diem.profiles import PROFILES, get_profile  # noqa: E402
+
+import synth  # noqa: E402
+
+# profile -> layout dữ liệu giả (auto: thư mục lẫn các layout)
+LAYOUT_OF = {"lms": "lms", "aq": "aq", "lms_v2": "lms_v2", "lms_v1": "lms_v1", "auto": "mixed"}
+
+# ======================= ĐO ==========================
+
+def best_of(func, repeat):
+    """Chạy func repeat lần, trả về (thời gian nhỏ nhất, kết quả lần cuối)."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+def time_stages(paths, profile, out_dir):
+    """Thời gian từng bước khi chạy tuần tự (1 tiến trình), giây."""
+    profile = get_profile(profile)
+    t_read = t_extract = 0.0
+    parts = []
+    for p in paths:
+        t0 = time.perf_counter()
+        sheet = reader.read_sheet_once(p)
+        t1 = time.perf_counter()
+        temp, _ = profile.extract_sheet(p, sheet)
+        t2 = time.perf_counter()
+        t_read += t1 - t0
+        t_extract += t2 - t1
+        if temp is not None:
+            parts.append(temp)
+    t0 = time.perf_counter()
+    result = profile.build_result(parts)
+    t_build = time.perf_counter() - t0
+    stages = {"read_s": t_read, "extract_s": t_extract, "build_s": t_build}
+    for fmt in ("xlsx", "csv"):
+        t0 = time.perf_counter()
+        writer.write_result(result, os.path.join(out_dir, f"result.{fmt}"))
+        stages[f"write_{fmt}_s"] = time.perf_counter() - t0
+    return stages, len(result)
+
+def run(args, data_root, out_dir):
+    results = []
+    for name in args.profiles:
+        data_dir = os.path.join(data_root, f"{LAYOUT_OF[name]}_{args.files}x{args.rows}_s{args.seed}")
+        if os.path.isdir(data_dir) and len(os.listdir(data_dir)) == args.files:
+            paths = sorted(os.path.join(data_dir, f) for f in os.listdir(data_dir))
+        else:
+            print(f"Sinh {args.files} file ({LAYOUT_OF[name]})...", flush=True)
+            paths = synth.generate(data_dir, LAYOUT_OF[name], args.files, args.rows, args.seed)
+
+        stages, rows = time_stages(paths, name, out_dir)
+        entry = {"profile": name, "files": len(paths), "rows": rows, "stages": stages, "end_to_end": []}
+        print(f"[{name}] {len(paths)} file, {rows} dòng | " +
+              " | ".join(f"{k[:-2]} {v:.2f}s" for k, v in stages.items()), flush=True)
+        for workers in args.workers:
+            t, _ = best_of(lambda: engine.merge_files(paths, name, lambda *_: None, workers), args.repeat)
+            entry["end_to_end"].append({"workers": workers, "seconds": t, "files_per_s": len(paths) / t})
+            print(f"  merge_files workers={workers}: {t:.2f}s ({len(paths) / t:.1f} file/s)", flush=True)
+        results.append(entry)
+    return results
+
+# ======================= LƯU / SO SÁNH ==========================
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def environment():
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def compare(current, previous_path):
+    """In tỉ lệ thời gian so với 1 lần chạy trước (< 1 là nhanh hơn)."""
+    with open(previous_path, encoding="utf-8") as f:
+        previous = {e["profile"]: e for e in json.load(f)["results"]}
+    print(f"So với {previous_path}:")
+    for entry in current:
+        old = previous.get(entry["profile"])
+        if old is None:
+            continue
+        for k, v in entry["stages"].items():
+            if old["stages"].get(k):
+                print(f"  [{entry['profile']}] {k[:-2]}: {old['stages'][k]:.2f}s -> {v:.2f}s (x{v / old['stages'][k]:.2f})")
+        old_e2e = {e["workers"]: e["seconds"] for e in old["end_to_end"]}
+        for e in entry["end_to_end"]:
+            if e["workers"] in old_e2e:
+                print(f"  [{entry['profile']}] merge_files workers={e['workers']}: "
+                      f"{old_e2e[e['workers']]:.2f}s -> {e['seconds']:.2f}s (x{e['seconds'] / old_e2e[e['workers']]:.2f})")
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--files", type=int, default=100, help="số file mỗi profile")
+    ap.add_argument("--rows", type=int, default=60, help="số SV trung bình mỗi file")
+    ap.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES))
+    ap.add_argument("--workers", nargs="+", type=int, default=[1])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--data-dir", default=None, help="giữ dữ liệu giả ở đây để dùng lại (mặc định: thư mục tạm)")
+    ap.add_argument("--json", default=None, help="ghi kết quả ra file JSON")
+    ap.add_argument("--compare", default=None, help="file JSON của lần chạy trước để so sánh")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run(args, args.data_dir or os.path.join(tmp, "data"), tmp)
+
+    report = {"env": environment(),
+              "params": {"files": args.files, "rows": args.rows, "repeat": args.repeat, "seed": args.seed},
+              "results": results}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Đã ghi {args.json}")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Đo đọc trước file (ghep_diem.prefetch) khi ghép tuần tự từ ổ mạng chậm: giả lập ổ mạng bằng hàm đọc file
+có độ trễ mỗi file + tốc độ giới hạn (time.sleep, không giữ GIL như khi chờ mạng thật), rồi so
+đọc-xong-mới-parse từng file với đọc trước nhiều cỡ cửa sổ. Kiểm tra luôn 2 cách cho cùng kết quả.
+
+Chạy: python benchmarks/bench_prefetch.py [--files 40] [--rows 60] [--layout lms] [--latency-ms 80] [--mbps 20]
+                                          [--windows 2 8]
+"""
+import argparse
+import functools
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ghep_diem import prefetch, sources, timing  # noqa: E402
+
+import synth  # noqa: E402
+
+def throttled_read(path, latency, bytes_per_second):
+    """sources.read_bytes chậm như ổ mạng: chờ latency giây mỗi file + thời gian truyền theo bytes_per_second."""
+    data = sources.read_bytes(path)
+    time.sleep(latency + len(data) / bytes_per_second)
+    return data
+
+def run_sequential(paths, profile, read):
+    """Đọc xong file mới parse, lần lượt từng file (như khi không đọc trước)."""
+    out = []
+    for p in paths:
+        with sources.preloaded(p, read(p)):
+            out.append(timing.timed_extract(profile, p)[0])
+    return out
+
+def run_prefetched(paths, profile, read, window, max_bytes):
+    out = []
+    with prefetch.Prefetcher(paths, window, max_bytes, read=read) as ahead:
+        for p, data in ahead:
+            with sources.preloaded(p, data):
+                out.append(timing.timed_extract(profile, p)[0])
+    return out
+
+def same(a, b):
+    for x, y in zip(a, b):
+        if (x is None) != (y is None):
+            return False
+        if x is not None:
+            try:
+                pd.testing.assert_frame_equal(x, y)
+            except AssertionError:
+                return False
+    return len(a) == len(b)
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--files", type=int, default=40)
+    ap.add_argument("--rows", type=int, default=60, help="số SV mỗi file")
+    ap.add_argument("--layout", choices=synth.LAYOUTS, default="lms")
+    ap.add_argument("--latency-ms", type=float, default=80, help="độ trễ mỗi file (ms)")
+    ap.add_argument("--mbps", type=float, default=20, help="tốc độ đọc (MB/s)")
+    ap.add_argument("--windows", nargs="+", type=int, default=[2, prefetch.READ_AHEAD], help="các cỡ cửa sổ đọc trước")
+    ap.add_argument("--max-mb", type=int, default=prefetch.READ_AHEAD_MB)
+    args = ap.parse_args()
+
+    read = functools.partial(throttled_read, latency=args.latency_ms / 1000, bytes_per_second=args.mbps * 1024 * 1024)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = synth.generate(os.path.join(tmp, args.layout), args.layout, args.files, args.rows)
+        mb = sum(os.path.getsize(p) for p in paths) / (1024 * 1024)
+        print(f"{len(paths)} file ({mb:.1f} MB), ổ giả lập: {args.latency_ms:.0f} ms/file, {args.mbps:.0f} MB/s")
+
+        t0 = time.perf_counter()
+        expected = run_sequential(paths, args.layout, read)
+        base = time.perf_counter() - t0
+        print(f"  không đọc trước : {base:.2f}s")
+        for window in args.windows:
+            t0 = time.perf_counter()
+            got = run_prefetched(paths, args.layout, read, window, args.max_mb * 1024 * 1024)
+            t = time.perf_counter() - t0
+            print(f"  đọc trước {window:3d} file: {t:.2f}s (x{base / t:.1f})"
+                  + ("" if same(expected, got) else "  ⚠ kết quả khác khi không đọc trước"), flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+So sánh các engine đọc file (reader.read_sheet_once): openpyxl, calamine (nếu đã cài python-calamine),
+xlrd (chỉ .xls) trên dữ liệu giả theo từng layout (benchmarks/synth.py). Kiểm tra luôn các engine cho cùng dữ liệu.
+
+Chạy: python benchmarks/bench_reader.py [--files 20] [--rows 60 500] [--layouts lms aq] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ghep_diem import reader  # noqa: E402
+
+import synth  # noqa: E402
+
+def time_engine(paths, engine, repeat):
+    """Thời gian nhỏ nhất (giây) đọc hết paths bằng engine, và dữ liệu đọc được."""
+    best = float("inf")
+    sheets = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        sheets = [reader.read_sheet_once(p, engine) for p in paths]
+        best = min(best, time.perf_counter() - t0)
+    return best, sheets
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--files", type=int, default=20, help="số file mỗi layout")
+    ap.add_argument("--rows", nargs="+", type=int, default=[60, 500], help="số SV mỗi file (nhiều cỡ)")
+    ap.add_argument("--layouts", nargs="+", choices=synth.LAYOUTS, default=list(synth.LAYOUTS))
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    engines = [e for e in reader.ENGINE_ORDER["xlsx"] if reader.engine_available(e)]
+    missing = [e for e in reader.ENGINE_ORDER["xlsx"] if e not in engines]
+    if missing:
+        print(f"Chưa cài: {', '.join(missing)} (bỏ qua)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for layout in args.layouts:
+            for n_rows in args.rows:
+                paths = synth.generate(os.path.join(tmp, f"{layout}_{n_rows}"), layout, args.files, n_rows)
+                times = {}
+                expected = None
+                for engine in engines:
+                    times[engine], sheets = time_engine(paths, engine, args.repeat)
+                    if expected is None:
+                        expected = sheets
+                    elif sheets != expected:
+                        print(f"  ⚠ {engine} đọc ra khác {engines[0]} ({layout}, {n_rows} SV)")
+                base = times.get("openpyxl")
+                print(f"[{layout}] {args.files} file × {n_rows} SV | " + " | ".join(
+                    f"{e}: {t / len(paths) * 1000:.1f} ms/file"
+                    + (f" (x{base / t:.1f})" if base and e != "openpyxl" else "") for e, t in times.items()),
+                    flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Sinh file điểm giả đúng bố cục các công cụ đang đọc, dùng cho benchmark:
+- lms    : tiêu đề môn ở C5 (hoặc C6), header 'Mã SV' ở dòng 7-12, cột 'TBC ĐTP (*)', dòng cuối 'Số SV' / 'Điều kiện' / 'CBGD'
+- aq     : tiêu đề 'Môn (MÃ) - nhóm' ở C5, header 'Mã SV' ở dòng 7-10, cột 'Điểm TBC'
+- lms_v2 : header 'MSSV' cố định ở dòng 8, mã môn/nhóm trong tên file '(251-CPS201-07)' hoặc '(MUE249 - 01)'
+- lms_v1 : header 'Mã sinh viên' ở dòng 8, điểm ở cột L, tên file '(251-CPS201-07)'
+Cùng seed -> cùng dữ liệu, để các lần đo so sánh được với nhau.
+
+Chạy: python benchmarks/synth.py OUT_DIR [--layout lms] [--files 100] [--rows 60] [--seed 0]
+"""
+import argparse
+import os
+import random
+
+from openpyxl import Workbook
+
+LAYOUTS = ("lms", "aq", "lms_v2", "lms_v1")
+
+SUBJECTS = [("Tiếng Anh 1", "LCE315"), ("Tin học đại cương", "CPS201"), ("Toán cao cấp", "MAT101"),
+            ("Tổ chức sự kiện", "MUE249"), ("Kinh tế vi mô", "ECO102"), ("Triết học", "PHI110")]
+FAMILY_NAMES = ["Nguyễn Văn", "Trần Thị", "Lê Hoàng", "Phạm Minh", "Võ Ngọc", "Đặng Thu"]
+GIVEN_NAMES = ["An", "Bình", "Châu", "Dũng", "Giang", "Hà", "Khánh", "Linh"]
+
+# ======================= 1 FILE ==========================
+
+def _score(rng):
+    return round(rng.uniform(0, 10), 1)
+
+def _student_id(rng, i):
+    """Phần lớn là số (như ô Excel kiểu số), đôi khi là chuỗi hoặc có khoảng trắng."""
+    value = 2251010000 + i
+    r = rng.random()
+    if r < 0.05:
+        return str(value)
+    if r < 0.07:
+        return f" {value} "
+    return value
+
+def _footer(ws, row, n_rows):
+    ws.cell(row + 1, 1, f"Số SV: {n_rows}")
+    ws.cell(row + 2, 2, "Điều kiện dự thi: đủ 80% số buổi")
+    ws.cell(row + 3, 2, "CBGD: ThS. Nguyễn Văn A")
+
+def _write_students(ws, header_row, headers, n_rows, rng, score_col):
+    for j, h in enumerate(headers, start=1):
+        ws.cell(header_row, j, h)
+    for i in range(n_rows):
+        r = header_row + 1 + i
+        ws.cell(r, 1, i + 1)
+        ws.cell(r, 2, _student_id(rng, i))
+        ws.cell(r, 3, rng.choice(FAMILY_NAMES))
+        ws.cell(r, 4, rng.choice(GIVEN_NAMES))
+        for j in range(5, len(headers) + 1):
+            if j == score_col:
+                # vài SV chưa có điểm
+                ws.cell(r, j, None if rng.random() < 0.03 else _score(rng))
+            elif headers[j - 1] != "Ghi chú":
+                ws.cell(r, j, _score(rng))
+    return header_row + n_rows
+
+def make_workbook(path, layout, n_rows, rng, subject=("Tiếng Anh 1", "LCE315"), group=6, n_score_cols=8):
+    """Tạo 1 file điểm giả theo layout (xem LAYOUTS) với n_rows sinh viên."""
+    name, code = subject
+    wb = Workbook()
+    ws = wb.active
+    ws["A1"] = "TRƯỜNG ĐẠI HỌC KINH TẾ"
+    ws["A2"] = "PHÒNG ĐÀO TẠO"
+    ws["C3"] = "BẢNG ĐIỂM HỌC PHẦN"
+    scores = [f"Điểm {k}" for k in range(1, n_score_cols + 1)]
+
+    if layout == "lms":
+        title = f"{name} ({code}) - {group:02d}" if rng.random() < 0.7 else f"{name} (251-{code}-{group:02d})"
+        ws["C6" if rng.random() < 0.2 else "C5"] = title
+        header_row = rng.randint(7, 12)
+        headers = ["STT", "Mã SV", "Họ đệm", "Tên"] + scores + ["TBC ĐTP (*)", "Ghi chú"]
+        last = _write_students(ws, header_row, headers, n_rows, rng, len(headers) - 1)
+        _footer(ws, last, n_rows)
+    elif layout == "aq":
+        ws["C5"] = f"{name} ({code}) - {group:02d}"
+        header_row = rng.randint(7, 10)
+        headers = ["STT", "Mã SV", "Họ và", "Tên"] + scores + ["Điểm TBC", "Ghi chú"]
+        last = _write_students(ws, header_row, headers, n_rows, rng, len(headers) - 1)
+        _footer(ws, last, n_rows)
+    elif layout == "lms_v2":
+        headers = ["STT", "MSSV", "Họ đệm", "Tên"] + scores + ["TBC ĐTP (*)", "Ghi chú"]
+        last = _write_students(ws, 8, headers, n_rows, rng, len(headers) - 1)
+        _footer(ws, last, n_rows)
+    elif layout == "lms_v1":
+        # điểm ở cột L (cột thứ 12)
+        headers = ["STT", "Mã sinh viên", "Họ đệm", "Tên"] + [f"Điểm {k}" for k in range(1, 8)] + ["Tổng kết", "Ghi chú"]
+        last = _write_students(ws, 8, headers, n_rows, rng, 12)
+        _footer(ws, last, n_rows)
+    else:
+        raise ValueError(f"layout không hỗ trợ: {layout}")
+    wb.save(path)
+
+def file_name(layout, subject, group, index):
+    """Tên file như file tải từ LMS: '... (251-CPS201-07).xlsx' (lms_v2 đôi khi dạng '(MUE249 - 01)')."""
+    name, code = subject
+    if layout == "lms_v2" and index % 3 == 1:
+        return f"{name} {index} ({code} - {group:02d}).xlsx"
+    return f"{name} - Nhóm {group:02d} {index} (251-{code}-{group:02d}).xlsx"
+
+# ======================= CẢ THƯ MỤC ==========================
+
+def generate(out_dir, layout="lms", n_files=100, n_rows=60, seed=0):
+    """
+    Sinh n_files file vào out_dir (layout 'mixed': xoay vòng các layout), trả về list đường dẫn.
+    Số SV mỗi file dao động quanh n_rows (±25%).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for i in range(n_files):
+        lay = LAYOUTS[i % len(LAYOUTS)] if layout == "mixed" else layout
+        subject = SUBJECTS[i % len(SUBJECTS)]
+        group = i % 12 + 1
+        rows = max(1, int(n_rows * rng.uniform(0.75, 1.25)))
+        path = os.path.join(out_dir, file_name(lay, subject, group, i))
+        make_workbook(path, lay, rows, rng, subject, group)
+        paths.append(path)
+    return paths
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("out_dir")
+    ap.add_argument("--layout", choices=LAYOUTS + ("mixed",), default="lms")
+    ap.add_argument("--files", type=int, default=100)
+    ap.add_argument("--rows", type=int, default=60, help="số SV trung bình mỗi file")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    paths = generate(args.out_dir, args.layout, args.files, args.rows, args.seed)
+    print(f"Đã tạo {len(paths)} file trong {args.out_dir}")
+
+if __name__ == "__main__":
+    main()
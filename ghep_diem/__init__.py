@@ -0,0 +1 @@
+"""Các hàm dùng chung cho công cụ ghép điểm (đọc Excel, dò header, ...)."""
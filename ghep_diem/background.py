@@ -0,0 +1,96 @@
+import queue
+import threading
+import time
+
+# ======================= CHẠY NỀN CHO GIAO DIỆN ==========================
+
+def format_duration(seconds):
+    """12.3 -> '00:12', 3725 -> '1:02:05'."""
+    seconds = int(round(seconds))
+    h, rest = divmod(seconds, 3600)
+    m, s = divmod(rest, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m:02d}:{s:02d}"
+
+def format_progress(done, total, rows, elapsed):
+    """Chuỗi tiến độ: số file xong, số dòng đã lấy, thời gian còn lại ước tính."""
+    text = f"{done}/{total} file · {rows:,} dòng".replace(",", ".")
+    if 0 < done < total:
+        text += f" · còn khoảng {format_duration(elapsed / done * (total - done))}"
+    elif done >= total:
+        text += f" · {format_duration(elapsed)}"
+    return text
+
+class BackgroundTask:
+    """
+    Chạy 1 hàm nặng (ghép / lưu file) trên thread riêng để cửa sổ không bị "Not Responding".
+    Thread nền không đụng vào widget: log, tiến độ, kết quả được đẩy vào queue,
+    vòng lặp chính lấy ra định kỳ bằng root.after().
+
+    - task.log(text): dùng thay cho log_func (gọi được từ thread nền)
+    - task.progress(done, total, rows): báo tiến độ
+    - task.cancel_event: hàm chạy nền kiểm tra sau mỗi file để dừng sớm
+    """
+
+    def __init__(self, root, on_log, on_progress, poll_ms=100):
+        self.root = root
+        self.on_log = on_log
+        self.on_progress = on_progress
+        self.poll_ms = poll_ms
+        self.queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.on_done = None
+        self.active = False
+        self.started_at = 0.0
+
+    def running(self):
+        return self.active
+
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def start(self, on_done, func, *args, **kwargs):
+        """Chạy func(*args, **kwargs) trên thread nền; xong gọi on_done(result, error) ở thread chính."""
+        if self.active:
+            raise RuntimeError("Đang có tác vụ chạy nền.")
+        self.active = True
+        self.on_done = on_done
+        self.cancel_event.clear()
+        self.started_at = time.monotonic()
+        threading.Thread(target=self._run, args=(func, args, kwargs), daemon=True).start()
+        self.root.after(self.poll_ms, self._poll)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def log(self, text):
+        self.queue.put(("log", text))
+
+    def progress(self, done, total, rows):
+        self.queue.put(("progress", (done, total, rows)))
+
+    def _run(self, func, args, kwargs):
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.queue.put(("done", (None, e)))
+        else:
+            self.queue.put(("done", (result, None)))
+
+    def _poll(self):
+        # mỗi nhịp chỉ lấy tối đa 500 thông điệp để giao diện vẫn kịp vẽ lại
+        for _ in range(500):
+            try:
+                kind, payload = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "log":
+                self.on_log(payload)
+            elif kind == "progress":
+                done, total, rows = payload
+                self.on_progress(done, total, rows, time.monotonic() - self.started_at)
+            elif kind == "done":
+                # cho phép on_done bắt đầu ngay tác vụ tiếp theo (vd. lưu file sau khi gộp)
+                self.active = False
+                self.on_done(*payload)
+                return
+        self.root.after(self.poll_ms, self._poll)
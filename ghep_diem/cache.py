@@ -0,0 +1,272 @@
+import functools
+import hashlib
+import os
+import pickle
+import sqlite3
+import time
+import zipfile
+
+from ghep_diem import parallel, sources
+
+# ======================= CACHE KẾT QUẢ ĐỌC TỪNG FILE ==========================
+
+# Tăng khi định dạng dữ liệu lưu trong cache thay đổi -> cache cũ tự bị bỏ qua
+CACHE_VERSION = 10
+
+def default_cache_dir():
+    """Thư mục cache mặc định: %LOCALAPPDATA%\\ghep_diem (Windows) hoặc ~/.cache/ghep_diem."""
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "ghep_diem")
+
+def content_hash(path, chunk_size=1 << 20, with_name=True):
+    """
+    Băm nội dung file (blake2b) kèm tên file: các công cụ lấy mã môn/nhóm từ tên file,
+    nên cùng nội dung nhưng khác tên không được dùng chung kết quả. File trong ZIP băm nội dung đã giải nén.
+    with_name=False: chỉ băm nội dung (tìm file trùng, xem duplicates.duplicate_files).
+    """
+    h = _new_hash(path, with_name)
+    with sources.open_stream(path) as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _new_hash(path, with_name=True):
+    h = hashlib.blake2b(digest_size=20)
+    if with_name:
+        h.update(os.path.basename(path).encode("utf-8"))
+    return h
+
+def hashed_call(func, path):
+    """
+    (content_hash(path), func(path)) nhưng chỉ đọc file 1 lần: bytes vừa đọc để băm được đưa luôn cho func
+    (sources.preloaded). Không đọc được file -> (None, func(path)) để func tự báo lỗi như thường.
+    """
+    try:
+        data = sources.load_bytes(path)
+    except (OSError, KeyError, zipfile.BadZipFile):
+        return None, func(path)
+    h = _new_hash(path)
+    h.update(data)
+    with sources.preloaded(path, data):
+        return h.hexdigest(), func(path)
+
+class ParseCache:
+    """
+    Cache trên đĩa (SQLite) kết quả xử lý từng file, để lần ghép sau bỏ qua file không đổi.
+    - Khóa nhanh: đường dẫn + kích thước + mtime.
+    - mtime đổi (copy lại, tải lại) nhưng nội dung giữ nguyên: khớp theo hash nội dung. Chỉ băm trước khi
+      parse khi đã có file cùng kích thước trong cache; không có thì chắc chắn phải parse, hash lấy từ chính
+      bytes lúc parse đọc (hashed_call), file không bị đọc 2 lần.
+    - Tổng dung lượng vượt max_bytes: xóa các mục lâu không dùng nhất (LRU).
+    namespace phân biệt từng công cụ (mỗi công cụ trích dữ liệu theo cách riêng).
+    """
+
+    def __init__(self, namespace, cache_dir=None, max_bytes=512 * 1024 * 1024):
+        self.namespace = f"{namespace}:v{CACHE_VERSION}"
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.db_path = os.path.join(self.cache_dir, "parse_cache.sqlite3")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                namespace TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                data BLOB NOT NULL,
+                nbytes INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (namespace, content_hash)
+            );
+            CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+            CREATE TABLE IF NOT EXISTS paths (
+                namespace TEXT NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                PRIMARY KEY (namespace, path)
+            );
+            CREATE INDEX IF NOT EXISTS paths_size ON paths (namespace, size);
+        """)
+        return conn
+
+    def _lookup(self, conn, path):
+        """
+        Trả về (content_hash, giá trị đã cache hoặc None nếu chưa có);
+        content_hash None: không file nào trong cache cùng kích thước, chưa cần băm (băm lúc parse).
+        """
+        size, mtime_ns = sources.signature(path)
+        key = os.path.abspath(path)
+        row = conn.execute(
+            "SELECT content_hash FROM paths WHERE namespace=? AND path=? AND size=? AND mtime_ns=?",
+            (self.namespace, key, size, mtime_ns)).fetchone()
+        if row is None and conn.execute("SELECT 1 FROM paths WHERE namespace=? AND size=? LIMIT 1",
+                                        (self.namespace, size)).fetchone() is None:
+            return None, None
+        digest = row[0] if row else content_hash(path)
+        hit = conn.execute(
+            "SELECT data FROM entries WHERE namespace=? AND content_hash=?",
+            (self.namespace, digest)).fetchone()
+        if hit is None:
+            return digest, None
+        conn.execute("UPDATE entries SET last_used=? WHERE namespace=? AND content_hash=?",
+                     (time.time(), self.namespace, digest))
+        if row is None:
+            # nội dung trùng nhưng mtime/kích thước đã đổi -> cập nhật khóa nhanh
+            self._remember_path(conn, path, digest)
+        return digest, hit[0]
+
+    def _remember_path(self, conn, path, digest):
+        size, mtime_ns = sources.signature(path)
+        conn.execute("INSERT OR REPLACE INTO paths VALUES (?, ?, ?, ?, ?)",
+                     (self.namespace, os.path.abspath(path), size, mtime_ns, digest))
+
+    def _store(self, conn, path, digest, value):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                     (self.namespace, digest, data, len(data), time.time()))
+        self._remember_path(conn, path, digest)
+
+    def _evict(self, conn):
+        """Xóa các mục lâu không dùng nhất cho tới khi tổng dung lượng <= max_bytes."""
+        total = conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for ns, digest, nbytes in conn.execute(
+                "SELECT namespace, content_hash, nbytes FROM entries ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            victims.append((ns, digest))
+            total -= nbytes
+        conn.executemany("DELETE FROM entries WHERE namespace=? AND content_hash=?", victims)
+        conn.execute("""DELETE FROM paths WHERE NOT EXISTS (
+                            SELECT 1 FROM entries e
+                            WHERE e.namespace = paths.namespace AND e.content_hash = paths.content_hash)""")
+
+    def map_files(self, func, paths, workers=1):
+        """
+        Như parallel.map_files nhưng file không đổi lấy kết quả từ cache, không đọc lại.
+        Chỉ các file mới/đã sửa mới được xử lý (song song nếu workers > 1).
+        Sau khi chạy: self.hits / self.misses = số file dùng lại / phải xử lý.
+        """
+        self.hits = self.misses = 0
+        conn = self._connect()
+        try:
+            plan = []
+            for p in paths:
+                try:
+                    digest, data = self._lookup(conn, p)
+                except (OSError, KeyError, zipfile.BadZipFile):
+                    # không stat/đọc được: để func tự báo lỗi như bình thường
+                    digest, data = None, None
+                plan.append((p, digest, data))
+            conn.commit()
+
+            misses = [p for p, _, data in plan if data is None]
+            miss_iter = parallel.map_files(functools.partial(hashed_call, func), misses, workers)
+            try:
+                for p, digest, data in plan:
+                    if data is not None:
+                        self.hits += 1
+                        yield pickle.loads(data)
+                        continue
+                    found, value = next(miss_iter)
+                    digest = digest or found
+                    self.misses += 1
+                    if digest is not None:
+                        self._store(conn, p, digest, value)
+                    yield value
+            finally:
+                miss_iter.close()
+                self._evict(conn)
+                conn.commit()
+        finally:
+            conn.close()
+
+    def summary(self):
+        return f"Cache: {self.hits} file dùng lại, {self.misses} file đọc mới."
+
+# ======================= CACHE BỐ CỤC FILE ==========================
+
+# thư mục cache bố cục (mặc định default_cache_dir()), "off" để tắt; qua biến môi trường để các tiến trình
+# đọc file (process pool) dùng cùng cấu hình (cli đặt theo --cache-dir / --no-cache)
+LAYOUT_ENV = "GHEP_DIEM_LAYOUT_CACHE"
+
+class LayoutCache:
+    """
+    Bố cục các mẫu file đã gặp: dấu vân tay các dòng đầu (reader.layout_fingerprint) -> kết quả dò
+    header / cột của profile (reader.Projection.pick), lưu SQLite trong thư mục cache.
+    Mỗi tiến trình nạp cả bảng 1 lần (chỉ vài mẫu mỗi profile), bố cục mới được ghi ngay. File SQLite riêng,
+    không chung với ParseCache: ParseCache giữ khóa ghi suốt lượt ghép, tiến trình đọc file sẽ phải chờ.
+    Chỉ để tăng tốc: không mở / ghi được thì bỏ qua.
+    """
+
+    def __init__(self, namespace, cache_dir=None):
+        self.namespace = f"{namespace}:v{CACHE_VERSION}"
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.db_path = os.path.join(self.cache_dir, "layout_cache.sqlite3")
+        self._plans = None
+
+    def _connect(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS layouts (
+                namespace TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                plan BLOB NOT NULL,
+                created REAL NOT NULL,
+                PRIMARY KEY (namespace, fingerprint)
+            )""")
+        return conn
+
+    def plans(self):
+        """{dấu vân tay: kết quả dò}; không mở được cache -> {} (vẫn dò như thường)."""
+        if self._plans is None:
+            self._plans = {}
+            try:
+                conn = self._connect()
+                try:
+                    for fingerprint, plan in conn.execute(
+                            "SELECT fingerprint, plan FROM layouts WHERE namespace=?", (self.namespace,)):
+                        self._plans[fingerprint] = pickle.loads(plan)
+                finally:
+                    conn.close()
+            except (OSError, sqlite3.Error):
+                pass
+        return self._plans
+
+    def get(self, fingerprint):
+        return self.plans().get(fingerprint)
+
+    def put(self, fingerprint, plan):
+        self.plans()[fingerprint] = plan
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("INSERT OR REPLACE INTO layouts VALUES (?, ?, ?, ?)",
+                                 (self.namespace, fingerprint, pickle.dumps(plan), time.time()))
+            finally:
+                conn.close()
+        except (OSError, sqlite3.Error):
+            pass
+
+def layout_cache(namespace):
+    """LayoutCache của namespace (tên profile) trong tiến trình này, theo LAYOUT_ENV lúc gọi; đã tắt -> None."""
+    setting = os.environ.get(LAYOUT_ENV)
+    if setting == "off":
+        return None
+    return _layout_cache(namespace, setting or None)
+
+@functools.lru_cache(maxsize=None)
+def _layout_cache(namespace, cache_dir):
+    # 1 LayoutCache cho mỗi (namespace, thư mục): đổi LAYOUT_ENV giữa chừng thì dùng cache của thư mục mới
+    return LayoutCache(namespace, cache_dir)
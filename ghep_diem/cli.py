@@ -0,0 +1,238 @@
+"""
+Ghép điểm không cần giao diện (chạy từ cron / máy chủ):
+
+    python -m ghep_diem "D:/Diem/HK1" -o Tong_Hop_Diem.xlsx --profile lms --workers 8
+    python -m ghep_diem "in/**/*.xlsx" -o out/Tong_Hop_Diem.xlsx --profile lms_v2
+    python -m ghep_diem "D:/Diem/HK1" -o Tong_Hop_Diem --format parquet
+    python -m ghep_diem "D:/Diem/HK1" Export_LMS.zip -r --exclude "*_cu.xlsx" -o Tong_Hop_Diem.xlsx
+    python -m ghep_diem "D:/Diem/HK1" -o Tong_Hop_Diem.xlsx --store Tra_cuu_diem.sqlite3 --run HK1_2025
+
+Tra cứu điểm đã lưu (--store) qua các lượt ghép:
+
+    python -m ghep_diem lookup Tra_cuu_diem.sqlite3 2251010000 [2251010001 ...] [--subject LCE315] [--run HK1_2025]
+
+So 2 lượt ghép (file kết quả xlsx / csv / parquet, hoặc 1 lượt trong CSDL tra cứu): dòng thêm / mất / đổi điểm:
+
+    python -m ghep_diem diff Tong_Hop_Diem_cu.xlsx Tong_Hop_Diem.xlsx -o Thay_doi.xlsx
+    python -m ghep_diem diff Tra_cuu_diem.sqlite3 Tra_cuu_diem.sqlite3 --old-run HK1_2025 --new-run HK1_2025_sua
+"""
+import argparse
+import os
+import sys
+import threading
+
+import pandas as pd
+
+from ghep_diem import diff, engine, matrix, parallel, prefetch, reader, store, writer
+from ghep_diem.cache import LAYOUT_ENV, ParseCache, default_cache_dir
+from ghep_diem.profiles import PROFILES
+
+def build_parser():
+    ap = argparse.ArgumentParser(
+        prog="python -m ghep_diem",
+        description="Ghép các file điểm Excel thành 1 file kết quả (không cần giao diện).")
+    ap.add_argument("inputs", nargs="+", metavar="INPUT",
+                    help="thư mục, file Excel, file .zip, hoặc mẫu glob (vd. 'in/**/*.xlsx')")
+    ap.add_argument("-r", "--recursive", action="store_true",
+                    help="quét cả thư mục con và các file .zip trong thư mục INPUT")
+    ap.add_argument("--include", action="append", default=[], metavar="GLOB",
+                    help="chỉ lấy file khớp mẫu (so với đường dẫn tương đối; mẫu không có '/' so với tên file), "
+                         "dùng nhiều lần được")
+    ap.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                    help="bỏ các file khớp mẫu, dùng nhiều lần được")
+    ap.add_argument("-o", "--output", required=True, help="file kết quả (.xlsx, .csv hoặc .parquet)")
+    ap.add_argument("-f", "--format", choices=writer.FORMATS, default=None,
+                    help="định dạng file kết quả (mặc định: theo đuôi file OUTPUT, không có thì xlsx)")
+    ap.add_argument("-p", "--profile", choices=list(PROFILES), default="lms",
+                    help="kiểu file điểm (mặc định: lms)")
+    ap.add_argument("-w", "--workers", type=int, default=parallel.default_workers(),
+                    help="số tiến trình đọc file song song (mặc định: số nhân CPU)")
+    ap.add_argument("--split-by-subject", action="store_true",
+                    help="mỗi mã môn học 1 file kết quả (OUTPUT_<mã môn>.xlsx)")
+    ap.add_argument("--matrix", nargs="?", const="max", choices=matrix.POLICIES, default=None, metavar="POLICY",
+                    help="ghi thêm bảng điểm ngang SV × môn (OUTPUT_ma_tran) và danh sách SV nhiều điểm cùng môn "
+                         "(OUTPUT_diem_trung); POLICY chọn điểm giữ lại: max (mặc định), last, first")
+    ap.add_argument("--keep-duplicate-files", action="store_true",
+                    help="vẫn ghép các file trùng nội dung với 1 file khác (mặc định: bỏ qua, ghi lại trong log)")
+    ap.add_argument("--stream", action="store_true",
+                    help="ghi dần từng file vào kết quả, không giữ cả bảng trong RAM (cho lượt ghép rất lớn); "
+                         "Parquet: điểm dạng chữ (vd. 'Vắng') ghi thành ô trống")
+    ap.add_argument("--reader", choices=reader.ENGINES, default=None,
+                    help="engine đọc file Excel (mặc định auto: calamine nếu đã cài python-calamine, "
+                         "không thì openpyxl cho .xlsx / xlrd cho .xls)")
+    ap.add_argument("--read-ahead", type=int, default=None, metavar="N",
+                    help=f"khi chạy 1 tiến trình: đọc trước tối đa N file trên thread nền, cho thư mục trên ổ mạng "
+                         f"(mặc định {prefetch.READ_AHEAD}, 0 để tắt)")
+    ap.add_argument("--read-ahead-mb", type=int, default=None, metavar="MB",
+                    help=f"dung lượng tối đa các file đọc trước giữ trong RAM (mặc định {prefetch.READ_AHEAD_MB} MB)")
+    ap.add_argument("--no-cache", action="store_true", help="không dùng cache, đọc lại mọi file")
+    ap.add_argument("--cache-dir", default=None, help=f"thư mục cache (mặc định: {default_cache_dir()})")
+    ap.add_argument("--cache-max-mb", type=int, default=512, help="dung lượng cache tối đa (MB)")
+    ap.add_argument("--store", default=None, metavar="DB",
+                    help="ghi thêm các dòng kết quả vào CSDL tra cứu SQLite DB (tra bằng: python -m ghep_diem lookup DB MSSV)")
+    ap.add_argument("--run", default=None, metavar="NAME",
+                    help="tên lượt ghép (học kỳ / đợt) khi ghi --store, ghép lại cùng tên thì thay toàn bộ "
+                         "các dòng cũ của lượt đó (mặc định: tên INPUT đầu tiên)")
+    ap.add_argument("--watch", action="store_true",
+                    help="theo dõi thư mục INPUT, tự cập nhật file kết quả khi có file thêm/sửa/xóa (Ctrl+C để dừng)")
+    ap.add_argument("-q", "--quiet", action="store_true", help="chỉ in lỗi và tổng kết")
+    return ap
+
+def build_lookup_parser():
+    ap = argparse.ArgumentParser(
+        prog="python -m ghep_diem lookup",
+        description="Tra cứu điểm trong CSDL đã ghi bằng --store (mọi lượt ghép / học kỳ).")
+    ap.add_argument("db", metavar="DB", help="file CSDL tra cứu (.sqlite3)")
+    ap.add_argument("student_ids", nargs="*", metavar="MSSV", help="Mã SV cần tra (bỏ trống: lọc theo --subject)")
+    ap.add_argument("--subject", default=None, help="chỉ môn này (mã môn)")
+    ap.add_argument("--group", default=None, help="chỉ nhóm này")
+    ap.add_argument("--run", default=None, help="chỉ lượt ghép này")
+    ap.add_argument("--runs", action="store_true", help="liệt kê các lượt ghép đã lưu")
+    ap.add_argument("-o", "--output", default=None, help="ghi kết quả ra file (.xlsx / .csv / .parquet) thay vì in ra")
+    return ap
+
+def lookup_main(argv):
+    args = build_lookup_parser().parse_args(argv)
+    if not os.path.isfile(args.db):
+        print(f"Không có file CSDL: {args.db}", file=sys.stderr)
+        return 1
+    if args.runs:
+        for run, profile, files, rows, updated in store.list_runs(args.db):
+            print(f"{run}\t{profile or ''}\t{files} file\t{rows} dòng\t{updated}")
+        return 0
+    if not args.student_ids and not args.subject:
+        print("Lỗi: cần ít nhất 1 MSSV hoặc --subject", file=sys.stderr)
+        return 2
+    tables = [store.lookup(args.db, sid, args.subject, args.group, args.run) for sid in args.student_ids or [None]]
+    table = pd.concat(tables, ignore_index=True) if len(tables) > 1 else tables[0]
+    if args.output:
+        writer.write_result(table, args.output)
+        print(f"Đã lưu {len(table)} dòng vào {args.output}")
+    else:
+        for line in store.format_rows(table, limit=len(table)):
+            print(line)
+    return 0 if len(table) else 1
+
+def build_diff_parser():
+    ap = argparse.ArgumentParser(
+        prog="python -m ghep_diem diff",
+        description="So 2 lượt ghép theo (Mã SV, mã môn, nhóm): các dòng thêm, mất, đổi điểm.")
+    ap.add_argument("old", metavar="OLD", help="kết quả cũ: file .xlsx / .csv / .parquet hoặc CSDL tra cứu (.sqlite3)")
+    ap.add_argument("new", metavar="NEW", help="kết quả mới (như OLD)")
+    ap.add_argument("--old-run", default=None, help="lượt ghép trong OLD khi OLD là CSDL có nhiều lượt")
+    ap.add_argument("--new-run", default=None, help="lượt ghép trong NEW khi NEW là CSDL có nhiều lượt")
+    ap.add_argument("-o", "--output", default=None, help="ghi bảng thay đổi ra file (.xlsx / .csv / .parquet) thay vì in ra")
+    return ap
+
+def diff_main(argv):
+    """Mã thoát như lệnh diff: 0 nếu không có thay đổi, 1 nếu có, 2 nếu lỗi."""
+    args = build_diff_parser().parse_args(argv)
+    try:
+        if args.output:
+            stats = diff.diff_to_file(args.old, args.new, args.output, args.old_run, args.new_run, log_func=print)
+            print(f"Đã lưu {stats.differences:,} dòng thay đổi vào {args.output}")
+        else:
+            stats = diff.DiffStats()
+            header = True
+            for part in diff.iter_diff(args.old, args.new, args.old_run, args.new_run, stats):
+                if len(part):
+                    lines = diff.format_rows(part, limit=len(part))
+                    print("\n".join(lines if header else lines[1:]))
+                    header = False
+            for line in stats.summary_lines():
+                print(line)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Lỗi: {e}", file=sys.stderr)
+        return 2
+    return 1 if stats.differences else 0
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == "lookup":
+        return lookup_main(argv[1:])
+    if argv and argv[0] == "diff":
+        return diff_main(argv[1:])
+    args = build_parser().parse_args(argv)
+    if args.workers < 1:
+        print("Lỗi: --workers phải >= 1", file=sys.stderr)
+        return 2
+
+    if args.reader:
+        # qua biến môi trường để các tiến trình đọc file (process pool) cũng dùng engine này
+        os.environ[reader.ENGINE_ENV] = args.reader
+
+    if args.read_ahead is not None:
+        os.environ[prefetch.READ_AHEAD_ENV] = str(args.read_ahead)
+    if args.read_ahead_mb is not None:
+        os.environ[prefetch.READ_AHEAD_MB_ENV] = str(args.read_ahead_mb)
+
+    out_path = writer.with_extension(args.output, args.format or writer.format_of(args.output))
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    os.makedirs(out_dir, exist_ok=True)
+
+    cache = None
+    if not args.no_cache:
+        cache = ParseCache(args.profile, args.cache_dir, args.cache_max_mb * 1024 * 1024)
+    # cache bố cục file (header / cột của từng mẫu file) dùng chung thư mục, tắt cùng --no-cache
+    if args.no_cache or args.cache_dir:
+        os.environ[LAYOUT_ENV] = "off" if args.no_cache else args.cache_dir
+
+    def log(text):
+        if not args.quiet:
+            print(text, flush=True)
+
+    if args.watch:
+        if args.split_by_subject or args.matrix or args.store:
+            print("Lỗi: --split-by-subject / --matrix / --store không dùng được với --watch", file=sys.stderr)
+            return 2
+        if len(args.inputs) != 1 or not os.path.isdir(args.inputs[0]):
+            print("Lỗi: --watch cần đúng 1 thư mục INPUT", file=sys.stderr)
+            return 2
+        stop = threading.Event()
+        try:
+            engine.watch_to_file(args.inputs[0], out_path, args.profile, log, args.workers,
+                                 cancel_event=stop, cache=cache, recursive=args.recursive,
+                                 include=args.include, exclude=args.exclude)
+        except KeyboardInterrupt:
+            stop.set()
+        return 0
+
+    if args.stream and (args.split_by_subject or args.matrix):
+        print("Lỗi: --stream không dùng được với --split-by-subject / --matrix", file=sys.stderr)
+        return 2
+
+    paths = []
+    seen = set()
+    for source in args.inputs:
+        for p in engine.list_excel_files(source, args.recursive, args.include, args.exclude):
+            key = os.path.normcase(os.path.abspath(p))
+            if key not in seen and key != os.path.normcase(os.path.abspath(out_path)):
+                seen.add(key)
+                paths.append(p)
+    if not paths:
+        print("Không tìm thấy file Excel nào.", file=sys.stderr)
+        return 1
+
+    result_store = None
+    if args.store:
+        result_store = store.ResultStore(args.store, args.run or store.default_run_name(args.inputs[0]), args.profile)
+
+    log(f"Ghép {len(paths)} file, profile '{args.profile}', {args.workers} tiến trình...")
+    try:
+        rows = engine.merge_to_file(paths, out_path, args.profile, log, args.workers, cache=cache,
+                                    split_by_subject=args.split_by_subject, stream=args.stream,
+                                    matrix_policy=args.matrix, skip_duplicate_files=not args.keep_duplicate_files,
+                                    store=result_store)
+    except KeyboardInterrupt:
+        print("Đã dừng.", file=sys.stderr)
+        return 130
+    if not rows:
+        print("Không ghép được dữ liệu hợp lệ từ các file Excel.", file=sys.stderr)
+        return 1
+    if args.split_by_subject:
+        root, ext = os.path.splitext(out_path)
+        print(f"Đã lưu {rows} dòng, mỗi môn 1 file: {root}_<mã môn>{ext}")
+    else:
+        print(f"Đã lưu {rows} dòng vào {out_path}")
+    return 0
@@ -0,0 +1,96 @@
+"""
+Kiểu dữ liệu gọn cho bảng kết quả: mã môn, nhóm và Mã SV lặp lại trên rất nhiều dòng
+(mỗi SV học nhiều môn, mỗi môn/nhóm vài chục SV) nên lưu dạng category (mã số nguyên + bảng giá trị)
+thay vì 1 object Python mỗi dòng. Giá trị không đổi: khi ghi file (writer) category được đổi lại đúng giá trị gốc,
+trừ Mã SV số thực nguyên: 2251010000.0 (cột Mã SV có ô trống) được ghi là 2251010000, kể cả trong CSV
+(trước đây pd.concat đổi cả cột Mã SV sang số thực khi 1 file như vậy, CSV ra 2251010000.0).
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# cột lưu dạng category (tên cột của các profile)
+CATEGORY_COLUMNS = ("Mã môn học", "Nhóm", "Mã nhóm")
+ID_COLUMNS = ("Mã SV", "MSSV")
+
+# ======================= 1 BẢNG ==========================
+
+def _ids_as_int(col):
+    """Mã SV số thực nguyên (cột có ô trống nên pandas đọc ra float) -> int, để 2251010000.0 và 2251010000 là 1 mã."""
+    values = col.to_numpy(dtype=object)
+    idx = np.flatnonzero(np.fromiter(map(type, values), dtype=object, count=len(values)) == float)
+    if not len(idx):
+        return col
+    nums = values[idx].astype("float64")
+    with np.errstate(invalid="ignore"):
+        ok = np.isfinite(nums) & (np.mod(nums, 1) == 0) & (np.abs(nums) < 2 ** 53)
+    if not ok.any():
+        return col
+    values = values.copy()
+    values[idx[ok]] = nums[ok].astype("int64").tolist()
+    return pd.Series(values, index=col.index, name=col.name)
+
+def as_category(col):
+    """Cột -> category với bảng giá trị kiểu object (để các phần ghép được với nhau dù file này số, file kia chữ)."""
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        return col
+    values = col.astype(object)
+    categories = pd.Index(pd.unique(values.dropna().to_numpy()), dtype=object)
+    return values.astype(pd.CategoricalDtype(categories))
+
+def compact_frame(df):
+    """Đổi các cột mã môn / nhóm / Mã SV có trong df sang category (trả bảng mới)."""
+    out = None
+    for c in df.columns:
+        if c in CATEGORY_COLUMNS or c in ID_COLUMNS:
+            col = df[c]
+            if c in ID_COLUMNS and not isinstance(col.dtype, pd.CategoricalDtype):
+                col = _ids_as_int(col)
+            if out is None:
+                out = df.copy(deep=False)
+            out[c] = as_category(col)
+    return df if out is None else out
+
+# ======================= GHÉP NHIỀU BẢNG ==========================
+
+def concat_parts(parts):
+    """
+    pd.concat cho các bảng đã compact_frame: cột category của các phần có bảng giá trị khác nhau
+    (pd.concat sẽ đổi về object) được gộp bằng union_categoricals nên kết quả vẫn là category.
+    """
+    columns = list(parts[0].columns)
+    if any(list(p.columns) != columns for p in parts):
+        return compact_frame(pd.concat(parts, ignore_index=True))
+    cat_cols = [c for c in columns if c in CATEGORY_COLUMNS or c in ID_COLUMNS]
+    rest = [c for c in columns if c not in cat_cols]
+    if rest:
+        merged = pd.concat([p[rest] for p in parts], ignore_index=True)
+    else:
+        merged = pd.DataFrame(index=pd.RangeIndex(sum(len(p) for p in parts)))
+    for c in cat_cols:
+        # as_category: phòng khi có phần chưa qua compact_frame
+        merged[c] = pd.Series(union_categoricals([as_category(p[c]) for p in parts]), index=merged.index)
+    return merged[columns]
+
+# ======================= ĐO BỘ NHỚ ==========================
+
+def _object_bytes(col):
+    """Bộ nhớ cột nếu lưu kiểu object (như memory_usage(deep=True)) mà không phải đổi cột ra object."""
+    codes = col.cat.codes.to_numpy()
+    sizes = np.array([sys.getsizeof(v) for v in col.cat.categories], dtype=np.int64)
+    counts = np.bincount(codes[codes >= 0], minlength=len(sizes))
+    # ô trống: float NaN
+    n_missing = int((codes < 0).sum())
+    return 8 * len(col) + int(counts @ sizes) + n_missing * sys.getsizeof(float("nan"))
+
+def memory_saving(df):
+    """(số byte hiện tại, số byte nếu các cột category lưu dạng object) của bảng."""
+    used = int(df.memory_usage(index=True, deep=True).sum())
+    as_object = used
+    for c in df.columns:
+        col = df[c]
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            as_object += _object_bytes(col) - int(col.memory_usage(index=False, deep=True))
+    return used, as_object
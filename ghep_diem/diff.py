@@ -0,0 +1,359 @@
+"""
+So sánh 2 lượt ghép (vd. trước / sau khi giảng viên nộp lại bảng điểm đã sửa): dòng thêm, dòng mất
+và dòng đổi điểm theo khóa (Mã SV, mã môn, nhóm), thay cho dò tay 2 file kết quả vài trăm nghìn dòng.
+Mỗi bên là 1 file kết quả (xlsx / csv / parquet) hoặc 1 lượt ghép trong CSDL tra cứu (ghep_diem.store).
+Hai bên được đọc từng khúc và ghép theo khóa bằng bảng băm (pandas merge), thời gian tuyến tính.
+Khi 1 bên vượt MEMORY_ROWS dòng thì các dòng được chia theo giá trị băm của khóa thành PARTITIONS phần
+ghi xuống file tạm, rồi so từng phần một, nên bộ nhớ không tăng theo số dòng.
+"""
+import os
+import pickle
+import sqlite3
+import tempfile
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from ghep_diem import duplicates, matrix, writer
+
+# cột bảng so sánh
+DIFF_COLUMNS = ["Mã SV", "Mã môn học", "Nhóm", "Điểm cũ", "Điểm mới", "Thay đổi"]
+
+# cột "Thay đổi"
+KIND_ADDED = "Thêm"
+KIND_REMOVED = "Mất"
+KIND_CHANGED = "Đổi điểm"
+KIND_ORDER = [KIND_CHANGED, KIND_ADDED, KIND_REMOVED]
+
+# đuôi file CSDL tra cứu
+STORE_EXTENSIONS = (".sqlite3", ".sqlite", ".db")
+
+# số dòng đọc mỗi khúc
+CHUNK_ROWS = 50_000
+
+# số dòng 1 bên giữ trong bộ nhớ trước khi chia phần ra file tạm / số phần
+MEMORY_ROWS = 500_000
+PARTITIONS = 32
+
+KEYS = ["id", "subject", "group"]
+
+# ======================= ĐỌC 1 BÊN ==========================
+
+def _iter_xlsx(path):
+    """Các sheet kết quả (Sheet1, Sheet2... khi quá giới hạn dòng Excel), bỏ sheet xung đột; đọc luồng từng khúc."""
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            if ws.title == duplicates.SHEET_NAME:
+                continue
+            rows = ws.iter_rows(values_only=True)
+            header = next(rows, None)
+            if not header:
+                continue
+            columns = ["" if c is None else str(c).strip() for c in header]
+            while True:
+                block = [r for _, r in zip(range(CHUNK_ROWS), rows)]
+                if not block:
+                    break
+                frame = pd.DataFrame(block).iloc[:, :len(columns)]
+                frame.columns = columns[:frame.shape[1]]
+                yield frame
+    finally:
+        wb.close()
+
+def _iter_csv(path):
+    yield from pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig", chunksize=CHUNK_ROWS)
+
+def _iter_parquet(path):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Đọc Parquet cần cài thêm pyarrow (pip install pyarrow).") from e
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=CHUNK_ROWS):
+        yield batch.to_pandas()
+
+def store_run(db_path, run=None):
+    """Lượt ghép cần so trong CSDL tra cứu: run nếu có, không thì lượt duy nhất trong CSDL."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        runs = [r for r, in conn.execute("SELECT run FROM runs ORDER BY updated")]
+    finally:
+        conn.close()
+    if run is not None:
+        if run not in runs:
+            raise ValueError(f"{os.path.basename(db_path)} không có lượt ghép '{run}' (có: {', '.join(runs) or 'không'})")
+        return run
+    if len(runs) != 1:
+        raise ValueError(f"{os.path.basename(db_path)} có {len(runs)} lượt ghép, cần chọn 1 lượt "
+                         f"({', '.join(runs) or 'không'})")
+    return runs[0]
+
+def _iter_store(db_path, run):
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        cur = conn.execute("SELECT student_id, subject, grp, score FROM scores WHERE run = ?", (run,))
+        while True:
+            block = cur.fetchmany(CHUNK_ROWS)
+            if not block:
+                break
+            yield pd.DataFrame(block, columns=["Mã SV", "Mã môn học", "Nhóm", "Điểm TBC"])
+    finally:
+        conn.close()
+
+def iter_chunks(path, run=None):
+    """Các khúc bảng kết quả của 1 bên, theo đuôi file: xlsx / csv / parquet, hoặc CSDL tra cứu (run: lượt ghép)."""
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"Không có file: {path}")
+    if path.lower().endswith(STORE_EXTENSIONS):
+        return _iter_store(path, store_run(path, run))
+    fmt = writer.format_of(path)
+    if fmt == "csv":
+        return _iter_csv(path)
+    if fmt == "parquet":
+        return _iter_parquet(path)
+    return _iter_xlsx(path)
+
+# ======================= CHUẨN HÓA KHÓA / ĐIỂM ==========================
+
+def _label(value):
+    """Giá trị khóa -> chữ đã bỏ khoảng trắng: 2251010000, 2251010000.0 và '2251010000.0' là 1 mã."""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    if text.endswith(".0") and text[:-2].isdigit():
+        text = text[:-2]
+    return text
+
+def _score_parts(value):
+    """Điểm -> (số, chữ): 8 / '8.0' -> (8.0, ''), 'Vắng' -> (NaN, 'Vắng'), trống -> (NaN, '')."""
+    text = str(value).strip()
+    try:
+        return float(text), ""
+    except ValueError:
+        return np.nan, text
+
+def _factorized(col, label):
+    """
+    Đổi từng giá trị khác nhau của cột (không phải từng dòng) qua label rồi trải lại theo mã:
+    mỗi khúc chỉ vài nghìn mã SV / vài chục mã môn / vài chục mức điểm khác nhau. Ô trống -> label của ''.
+    """
+    codes, uniques = pd.factorize(col.to_numpy(dtype=object))
+    labels = [label(v) for v in uniques] + [label("")]
+    return labels, codes
+
+def _key_text(col):
+    labels, codes = _factorized(col, _label)
+    return np.array(labels, dtype=object)[codes]
+
+def normalize(chunk):
+    """
+    Khúc bảng kết quả -> bảng id / subject / group (chữ), num (điểm dạng số, NaN nếu không phải số)
+    và text (điểm dạng chữ, vd. 'Vắng'); bỏ dòng thiếu Mã SV / mã môn. Bảng thiếu cột -> None.
+    """
+    try:
+        id_col = matrix.pick_column(chunk, matrix.ID_COLUMNS)
+        subject_col = matrix.pick_column(chunk, matrix.SUBJECT_COLUMNS)
+        score_col = matrix.pick_column(chunk, matrix.SCORE_COLUMNS)
+    except ValueError:
+        return None
+    group_col = next((c for c in matrix.GROUP_COLUMNS if c in chunk.columns), None)
+    labels, codes = _factorized(chunk[score_col], _score_parts)
+    frame = pd.DataFrame({
+        "id": _key_text(chunk[id_col]),
+        "subject": _key_text(chunk[subject_col]),
+        "group": _key_text(chunk[group_col]) if group_col else "",
+        "num": np.array([n for n, _ in labels], dtype=float)[codes],
+        "text": np.array([t for _, t in labels], dtype=object)[codes],
+    })
+    keep = (frame["id"] != "").to_numpy() & (frame["subject"] != "").to_numpy()
+    return frame[keep].reset_index(drop=True)
+
+# ======================= CHIA PHẦN THEO KHÓA ==========================
+
+class _Side:
+    """
+    Các dòng đã chuẩn hóa của 1 bên. Giữ trong bộ nhớ tới khi quá memory_rows dòng, sau đó chia theo
+    giá trị băm của khóa thành partitions phần, nối thêm vào các file tạm (pickle) trong tmp_dir.
+    """
+
+    def __init__(self, name, tmp_dir, partitions, memory_rows):
+        self.name = name
+        self.tmp_dir = tmp_dir
+        self.partitions = partitions
+        self.memory_rows = memory_rows
+        self.rows = 0
+        self.spilled = False
+        self._frames = []
+        self._buffered = 0
+
+    def add(self, frame):
+        self._frames.append(frame)
+        self._buffered += len(frame)
+        self.rows += len(frame)
+        if self._buffered > self.memory_rows:
+            self.spill()
+
+    def _path(self, b):
+        return os.path.join(self.tmp_dir, f"{self.name}_{b}.pkl")
+
+    def spill(self):
+        """Chia các dòng đang giữ trong bộ nhớ theo phần, nối vào file tạm của từng phần."""
+        self.spilled = True
+        if not self._frames:
+            return
+        frame = pd.concat(self._frames, ignore_index=True)
+        self._frames, self._buffered = [], 0
+        for b, rows in partition_of(frame, self.partitions).items():
+            with open(self._path(b), "ab") as f:
+                pickle.dump(frame.take(rows), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def frame(self):
+        """Cả bên (khi chưa chia phần)."""
+        return pd.concat(self._frames, ignore_index=True) if self._frames else _empty()
+
+    def part(self, b):
+        """Phần b (sau spill), theo đúng thứ tự dòng đã đọc."""
+        frames = []
+        if os.path.exists(self._path(b)):
+            with open(self._path(b), "rb") as f:
+                while True:
+                    try:
+                        frames.append(pickle.load(f))
+                    except EOFError:
+                        break
+        return pd.concat(frames, ignore_index=True) if frames else _empty()
+
+def _empty():
+    return pd.DataFrame({"id": [], "subject": [], "group": [], "num": pd.Series([], dtype=float), "text": []})
+
+def partition_of(frame, partitions):
+    """{phần: vị trí các dòng} theo giá trị băm của khóa (cùng khóa -> cùng phần ở cả 2 bên)."""
+    buckets = pd.util.hash_pandas_object(frame[KEYS], index=False).to_numpy() % np.uint64(partitions)
+    return pd.Series(buckets).groupby(buckets).indices
+
+# ======================= SO SÁNH ==========================
+
+class DiffStats:
+    """Số dòng 2 bên và số dòng thêm / mất / đổi điểm / giữ nguyên; dup_* = số khóa lặp trong từng bên."""
+
+    def __init__(self):
+        self.old_rows = self.new_rows = 0
+        self.added = self.removed = self.changed = self.unchanged = 0
+        self.dup_old = self.dup_new = 0
+        self.partitions = 1
+
+    @property
+    def differences(self):
+        return self.added + self.removed + self.changed
+
+    def summary_lines(self):
+        lines = [f"Cũ {self.old_rows:,} dòng, mới {self.new_rows:,} dòng: {self.added:,} dòng thêm, "
+                 f"{self.removed:,} dòng mất, {self.changed:,} dòng đổi điểm, {self.unchanged:,} dòng giữ nguyên."]
+        if self.dup_old or self.dup_new:
+            lines.append(f"⚠ Khóa (Mã SV, mã môn, nhóm) lặp lại: {self.dup_old:,} ở bản cũ, {self.dup_new:,} ở bản mới "
+                         "-> so theo dòng cuối cùng của mỗi khóa.")
+        if self.partitions > 1:
+            lines.append(f"  (bảng lớn: so theo {self.partitions} phần qua file tạm)")
+        return lines
+
+def _score_value(num, text):
+    """Điểm hiển thị: số nếu là số, không thì chữ, trống -> None."""
+    return np.where(num.notna(), num.astype(object), text.where(text != "", None).astype(object))
+
+def compare(old, new, stats=None):
+    """
+    So 2 bảng đã chuẩn hóa (normalize) bằng hash join trên (Mã SV, mã môn, nhóm); khóa lặp lại trong 1 bên thì
+    giữ dòng cuối (như ghi đè trong CSDL tra cứu). Trả bảng DIFF_COLUMNS gồm các dòng thêm / mất / đổi điểm.
+    """
+    dup_old = old.duplicated(KEYS, keep="last")
+    dup_new = new.duplicated(KEYS, keep="last")
+    old, new = old[~dup_old.to_numpy()], new[~dup_new.to_numpy()]
+    joined = old.merge(new, on=KEYS, how="outer", suffixes=("_old", "_new"), indicator=True, sort=False)
+    side = joined["_merge"].to_numpy()
+    both = side == "both"
+    num_old, num_new = joined["num_old"], joined["num_new"]
+    same = ((num_old == num_new) | (num_old.isna() & num_new.isna()
+                                    & (joined["text_old"].fillna("") == joined["text_new"].fillna("")))).to_numpy()
+    kind = np.select([side == "right_only", side == "left_only", both & ~same], [KIND_ADDED, KIND_REMOVED, KIND_CHANGED],
+                     default="")
+    if stats is not None:
+        stats.dup_old += int(dup_old.sum())
+        stats.dup_new += int(dup_new.sum())
+        stats.added += int((kind == KIND_ADDED).sum())
+        stats.removed += int((kind == KIND_REMOVED).sum())
+        stats.changed += int((kind == KIND_CHANGED).sum())
+        stats.unchanged += int((both & same).sum())
+    rows = joined[kind != ""]
+    kind = kind[kind != ""]
+    out = pd.DataFrame({
+        DIFF_COLUMNS[0]: rows["id"].to_numpy(),
+        DIFF_COLUMNS[1]: rows["subject"].to_numpy(),
+        DIFF_COLUMNS[2]: rows["group"].to_numpy(),
+        DIFF_COLUMNS[3]: _score_value(rows["num_old"], rows["text_old"].fillna("")),
+        DIFF_COLUMNS[4]: _score_value(rows["num_new"], rows["text_new"].fillna("")),
+        DIFF_COLUMNS[5]: pd.Categorical(kind, categories=KIND_ORDER),
+    })
+    return out.sort_values([DIFF_COLUMNS[5], DIFF_COLUMNS[1], DIFF_COLUMNS[2], DIFF_COLUMNS[0]], ignore_index=True)
+
+def _load(side, path, run, stats_attr, stats):
+    for chunk in iter_chunks(path, run):
+        frame = normalize(chunk)
+        if frame is not None:
+            side.add(frame)
+    setattr(stats, stats_attr, side.rows)
+
+def iter_diff(old_path, new_path, old_run=None, new_run=None, stats=None,
+              partitions=PARTITIONS, memory_rows=MEMORY_ROWS):
+    """
+    Các khúc bảng so sánh (DIFF_COLUMNS) giữa old_path và new_path (file kết quả hoặc CSDL tra cứu + lượt ghép).
+    Bảng nhỏ: 1 khúc, sắp theo loại thay đổi / môn / nhóm / Mã SV; bảng lớn: mỗi phần 1 khúc (sắp trong từng phần).
+    stats (DiffStats): cộng dồn số dòng từng loại.
+    """
+    stats = stats if stats is not None else DiffStats()
+    with tempfile.TemporaryDirectory(prefix="ghep_diem_diff_") as tmp:
+        old = _Side("old", tmp, partitions, memory_rows)
+        new = _Side("new", tmp, partitions, memory_rows)
+        _load(old, old_path, old_run, "old_rows", stats)
+        _load(new, new_path, new_run, "new_rows", stats)
+        if not old.spilled and not new.spilled:
+            yield compare(old.frame(), new.frame(), stats)
+            return
+        # 1 bên đã ra file tạm: chia nốt cả 2 bên theo cùng cách rồi so từng phần
+        old.spill()
+        new.spill()
+        stats.partitions = partitions
+        for b in range(partitions):
+            out = compare(old.part(b), new.part(b), stats)
+            if len(out):
+                yield out
+
+def diff_to_file(old_path, new_path, out_path, old_run=None, new_run=None, log_func=None):
+    """Ghi bảng so sánh ra out_path (xlsx / csv / parquet, ghi dần từng khúc); trả DiffStats."""
+    stats = DiffStats()
+    sink = writer.open_sink(out_path, DIFF_COLUMNS)
+    try:
+        for part in iter_diff(old_path, new_path, old_run, new_run, stats):
+            sink.append(part)
+    finally:
+        sink.close()
+    if log_func is not None:
+        for line in stats.summary_lines():
+            log_func(line)
+    return stats
+
+def format_rows(table, limit=200):
+    """Bảng so sánh -> các dòng chữ để in ra (tối đa limit dòng)."""
+    lines = [" | ".join(DIFF_COLUMNS)]
+    for row in table.head(limit).itertuples(index=False):
+        lines.append(" | ".join(_cell_text(v) for v in row))
+    if len(table) > limit:
+        lines.append(f"... và {len(table) - limit:,} dòng nữa")
+    return lines
+
+def _cell_text(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ""
+    if isinstance(value, float):
+        return f"{value:g}"
+    return str(value)
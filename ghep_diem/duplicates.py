@@ -0,0 +1,183 @@
+"""
+Dò trùng lặp khi ghép, thay cho lọc trùng tay trong Excel:
+- file trùng nội dung (cùng 1 bảng điểm tải lên 2 lần dưới tên khác): bị bỏ trước khi đọc,
+  chỉ băm các file có kích thước trùng nhau nên gần như không tốn thêm thời gian;
+- dòng trùng khóa (Mã SV, mã môn, nhóm): ConflictIndex đổi mỗi giá trị khóa thành 1 số nguyên qua bảng băm
+  rồi tìm các khóa lặp lại trong thời gian tuyến tính, báo riêng các khóa có điểm khác nhau.
+"""
+import os
+import zipfile
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from ghep_diem import compact, matrix, sources, writer
+from ghep_diem.cache import content_hash
+
+# tên sheet (xlsx) / hậu tố tên file (csv, parquet) chứa bảng trùng khóa
+SHEET_NAME = "Xung đột"
+FILE_KEY = "xung_dot"
+
+# cột "Loại" của bảng trùng khóa
+KIND_CONFLICT = "Lệch điểm"
+KIND_REPEAT = "Trùng dòng"
+
+# ======================= FILE TRÙNG NỘI DUNG ==========================
+
+def duplicate_files(paths):
+    """
+    Tách các file trùng nội dung: trả (các file giữ lại, theo thứ tự cũ; [(file bị bỏ, file giống nó đứng trước)]).
+    Chỉ băm các file có cùng kích thước; file không đọc được giữ lại để profile tự báo lỗi.
+    """
+    by_size = defaultdict(list)
+    for i, p in enumerate(paths):
+        try:
+            by_size[sources.signature(p)[0]].append(i)
+        except (OSError, KeyError, zipfile.BadZipFile):
+            pass
+    original = {}
+    for group in by_size.values():
+        if len(group) < 2:
+            continue
+        first = {}
+        for i in group:
+            try:
+                digest = content_hash(paths[i], with_name=False)
+            except (OSError, KeyError, zipfile.BadZipFile):
+                continue
+            if digest in first:
+                original[i] = first[digest]
+            else:
+                first[digest] = i
+    kept = [p for i, p in enumerate(paths) if i not in original]
+    return kept, [(paths[i], paths[original[i]]) for i in sorted(original)]
+
+# ======================= DÒNG TRÙNG KHÓA ==========================
+
+def _text(value):
+    return str(value).strip()
+
+def _score_text(value):
+    """8, 8.0, '8' -> '8' để điểm giống nhau nhưng khác kiểu không bị coi là lệch."""
+    try:
+        return f"{float(value):g}"
+    except (TypeError, ValueError):
+        return _text(value)
+
+class ConflictIndex:
+    """
+    Chỉ mục dòng theo khóa (Mã SV, mã môn, nhóm), nạp dần từng file bằng add() nên dùng được cả khi ghi dần.
+    Chỉ giữ mã số nguyên của khóa / điểm / file từng dòng, không giữ bảng; giá trị được đổi sang số
+    qua bảng giá trị category của từng phần, không tra từng dòng.
+    table(): các khóa có nhiều hơn 1 dòng.
+    """
+
+    def __init__(self):
+        # id / môn / nhóm / điểm: giá trị -> số nguyên
+        self._labels = ({}, {}, {}, {})
+        self._codes = ([], [], [], [])
+        self._files = []
+        self._paths = []
+        self._table = None
+        # (cột Mã SV, cột mã môn, cột nhóm hoặc None, cột điểm); () nếu bảng thiếu cột
+        self.columns = None
+
+    def _encode(self, k, col, label):
+        cat = compact.as_category(col)
+        codes = cat.cat.codes.to_numpy().astype(np.int64)
+        table = self._labels[k]
+        mapping = np.array([table.setdefault(label(v), len(table)) for v in cat.cat.categories], dtype=np.int64)
+        if not len(mapping):
+            return np.full(len(codes), -1, dtype=np.int64)
+        return np.where(codes >= 0, mapping[np.maximum(codes, 0)], -1)
+
+    def add(self, part, path):
+        """Nạp bảng của 1 file."""
+        if self.columns is None:
+            try:
+                self.columns = (matrix.pick_column(part, matrix.ID_COLUMNS),
+                                matrix.pick_column(part, matrix.SUBJECT_COLUMNS),
+                                next((c for c in matrix.GROUP_COLUMNS if c in part.columns), None),
+                                matrix.pick_column(part, matrix.SCORE_COLUMNS))
+            except ValueError:
+                self.columns = ()
+        if not self.columns or not len(part):
+            return
+        id_col, subject_col, group_col, score_col = self.columns
+        self._codes[0].append(self._encode(0, part[id_col], _text))
+        self._codes[1].append(self._encode(1, part[subject_col], _text))
+        if group_col is None:
+            self._codes[2].append(np.zeros(len(part), dtype=np.int64))
+        else:
+            self._codes[2].append(self._encode(2, part[group_col], _text))
+        self._codes[3].append(self._encode(3, part[score_col], _score_text))
+        self._files.append(np.full(len(part), len(self._paths), dtype=np.int32))
+        self._paths.append(path)
+        self._table = None
+
+    def _empty(self):
+        if not self.columns:
+            return pd.DataFrame(columns=["Số lần", "Các điểm", "Các file", "Loại"])
+        id_col, subject_col, group_col, _ = self.columns
+        return pd.DataFrame(columns=[id_col, subject_col] + ([group_col] if group_col else [])
+                            + ["Số lần", "Các điểm", "Các file", "Loại"])
+
+    def table(self):
+        """
+        Bảng các khóa có nhiều dòng, theo thứ tự gặp đầu tiên: số lần, các điểm, các file (theo thứ tự dòng),
+        Loại = KIND_CONFLICT nếu điểm khác nhau, KIND_REPEAT nếu giống hệt. Dòng thiếu Mã SV / mã môn bị bỏ qua.
+        """
+        if self._table is not None:
+            return self._table
+        if not self._files:
+            self._table = self._empty()
+            return self._table
+        ids, subjects, groups, scores = (np.concatenate(c) for c in self._codes)
+        files = np.concatenate(self._files)
+        keys = pd.DataFrame({"id": ids, "subject": subjects, "group": groups})
+        rows = np.flatnonzero(keys.duplicated(keep=False).to_numpy() & (ids >= 0) & (subjects >= 0))
+        if not len(rows):
+            self._table = self._empty()
+            return self._table
+        # số thứ tự khóa theo thứ tự gặp đầu tiên (bảng băm, không sắp xếp)
+        key_no = keys.iloc[rows].groupby(["id", "subject", "group"], sort=False).ngroup().to_numpy()
+        order = np.argsort(key_no, kind="stable")
+        rows, key_no = rows[order], key_no[order]
+        starts = np.flatnonzero(np.r_[True, key_no[1:] != key_no[:-1]])
+        ends = np.r_[starts[1:], len(rows)]
+
+        labels = [np.array(list(t), dtype=object) for t in self._labels]
+        names = np.array([os.path.basename(p) for p in self._paths], dtype=object)
+        id_col, subject_col, group_col, _ = self.columns
+        columns = self._empty().columns
+        out = {c: [] for c in columns}
+        for lo, hi in zip(starts, ends):
+            r = rows[lo:hi]
+            first = r[0]
+            out[id_col].append(labels[0][ids[first]])
+            out[subject_col].append(labels[1][subjects[first]])
+            if group_col:
+                out[group_col].append(labels[2][groups[first]] if groups[first] >= 0 else "")
+            out["Số lần"].append(len(r))
+            out["Các điểm"].append("; ".join(labels[3][s] if s >= 0 else "" for s in scores[r]))
+            out["Các file"].append("; ".join(names[files[r]]))
+            out["Loại"].append(KIND_CONFLICT if len(np.unique(scores[r])) > 1 else KIND_REPEAT)
+        self._table = pd.DataFrame(out, columns=columns)
+        return self._table
+
+    def summary_lines(self, limit=10):
+        """Dòng log: số khóa lệch điểm / trùng dòng và vài khóa lệch điểm đầu tiên."""
+        table = self.table()
+        if not len(table):
+            return []
+        conflict = table[table["Loại"] == KIND_CONFLICT]
+        lines = [f"⚠ {len(conflict):,} mã SV có điểm khác nhau cho cùng môn/nhóm, "
+                 f"{len(table) - len(conflict):,} mã SV bị lặp dòng (cùng điểm)."]
+        for row in conflict.head(limit).itertuples(index=False):
+            lines.append(f"    {' - '.join(str(v) for v in row[:-4])}: {row[-3]} ({row[-2]})")
+        return lines
+
+def conflicts_path(out_path):
+    """'out/Tong_Hop.csv' -> 'out/Tong_Hop_xung_dot.csv' (csv / parquet, hoặc khi tách file theo môn)."""
+    return writer.split_path(out_path, FILE_KEY)
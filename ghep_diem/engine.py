@@ -0,0 +1,312 @@
+"""
+Lõi ghép điểm dùng chung cho các công cụ giao diện và dòng lệnh (python -m ghep_diem).
+Không import tkinter / customtkinter để chạy được trên máy chủ không có màn hình.
+"""
+import contextlib
+import functools
+import os
+
+from ghep_diem import compact, duplicates, matrix, parallel, sources, timing, watch, writer
+from ghep_diem.profiles import get_profile
+
+EXCEL_EXTS = sources.EXCEL_EXTS
+
+# ======================= DANH SÁCH FILE ==========================
+
+def list_excel_files(source, recursive=False, include=(), exclude=()):
+    """
+    File Excel từ 1 thư mục (thứ tự như os.listdir), 1 file, 1 file ZIP, hoặc 1 mẫu glob (vd. 'in/**/*.xlsx').
+    recursive: quét cả thư mục con và file ZIP trong thư mục; include / exclude: mẫu glob lọc file
+    (xem sources.list_sources). File trong ZIP được đọc thẳng trong bộ nhớ, không giải nén ra đĩa.
+    """
+    return sources.list_sources(source, recursive, include, exclude)
+
+# ======================= GHÉP ==========================
+
+def timed_extractor(profile):
+    """extract_file của profile kèm đo thời gian (timing.timed_extract), pickle được để chạy trong process pool."""
+    return functools.partial(timing.timed_extract, profile.NAME)
+
+def _skip_duplicate_files(paths, log_func, report):
+    """Bỏ các file trùng nội dung với 1 file đứng trước (duplicates.duplicate_files), in log từng file bị bỏ."""
+    with report.stage("dedupe"):
+        kept, dropped = duplicates.duplicate_files(paths)
+    for path, original in dropped:
+        log_func(f"⚠ Bỏ qua {os.path.basename(path)}: trùng nội dung với {os.path.basename(original)}")
+    return kept
+
+def _iter_parts(paths, profile, log_func, workers, progress_func, cancel_event, cache, report, conflicts,
+                skip_duplicate_files, store=None):
+    """
+    Kết quả từng file (bỏ file không có dữ liệu) theo đúng thứ tự paths; in log, báo tiến độ, dừng khi bị hủy.
+    skip_duplicate_files: bỏ file trùng nội dung trước khi đọc; conflicts (duplicates.ConflictIndex): nạp từng bảng.
+    store (store.ResultStore): ghi từng bảng vào CSDL tra cứu, chốt khi hết file, bỏ khi bị hủy / lỗi.
+    """
+    try:
+        yield from _read_parts(paths, profile, log_func, workers, progress_func, cancel_event, cache, report,
+                               conflicts, skip_duplicate_files, store)
+    except BaseException:
+        if store is not None:
+            store.rollback()
+        raise
+    if store is None:
+        return
+    if cancel_event is not None and cancel_event.is_set():
+        store.rollback()
+        return
+    with report.stage("store"):
+        store.commit()
+    log_func(store.summary())
+
+def _read_parts(paths, profile, log_func, workers, progress_func, cancel_event, cache, report, conflicts,
+                skip_duplicate_files, store):
+    report.workers = workers
+    if skip_duplicate_files:
+        paths = _skip_duplicate_files(paths, log_func, report)
+    rows = 0
+    hits = 0
+    # workers > 1: đọc các file trong process pool, kết quả + log giữ đúng thứ tự file
+    for done, (temp, logs, stats) in enumerate(parallel.map_files(timed_extractor(profile), paths, workers, cache),
+                                               start=1):
+        if cache is not None and cache.hits > hits:
+            # lấy từ cache: số liệu đo là của lần đọc trước
+            hits = cache.hits
+            stats = stats._replace(cached=True)
+        report.add_file(stats)
+        for line in logs:
+            log_func(line)
+        if temp is not None:
+            rows += len(temp)
+            if conflicts is not None:
+                with report.stage("dedupe"):
+                    conflicts.add(temp, stats.path)
+            if store is not None:
+                with report.stage("store"):
+                    store.add(temp, stats.path)
+            yield temp
+        if progress_func is not None:
+            progress_func(done, len(paths), rows)
+        if cancel_event is not None and cancel_event.is_set():
+            log_func(f"⏹ Đã hủy sau {done}/{len(paths)} file.")
+            return
+    if cache is not None:
+        log_func(cache.summary())
+
+def merge_files(paths, profile, log_func=print, workers=1, progress_func=None, cancel_event=None, cache=None,
+                report=None, conflicts=None, skip_duplicate_files=True, store=None):
+    """
+    Gộp các file theo profile (tên hoặc module trong ghep_diem.profiles).
+    progress_func(done, total, rows) được gọi sau mỗi file;
+    cancel_event được set -> dừng sau file hiện tại.
+    cache (ParseCache): file không đổi từ lần gộp trước được lấy lại, không đọc lại.
+    report (timing.RunReport): nhận số liệu thời gian từng file / từng bước; tóm tắt được in ra log_func.
+    conflicts (duplicates.ConflictIndex): dò các dòng trùng (Mã SV, môn, nhóm), truyền tiếp cho save_result.
+    skip_duplicate_files: bỏ qua file trùng nội dung với 1 file đứng trước.
+    store (store.ResultStore): ghi thêm các dòng kết quả vào CSDL tra cứu (SQLite).
+    Trả về DataFrame kết quả, None nếu không có dữ liệu hợp lệ hoặc bị hủy.
+    """
+    profile = get_profile(profile)
+    if report is None:
+        report = timing.RunReport(profile.NAME)
+    all_parts = list(_iter_parts(paths, profile, log_func, workers, progress_func, cancel_event, cache, report,
+                                 conflicts, skip_duplicate_files, store))
+    if cancel_event is not None and cancel_event.is_set():
+        return None
+    _log_conflicts(conflicts, log_func, report)
+
+    result = None
+    if all_parts:
+        with report.stage("build"):
+            result = profile.build_result(all_parts)
+        report.result_memory = compact.memory_saving(result)
+    report.finish()
+    for line in report.summary_lines():
+        log_func(line)
+    return result
+
+def _log_conflicts(conflicts, log_func, report):
+    if conflicts is None:
+        return
+    with report.stage("dedupe"):
+        lines = conflicts.summary_lines()
+    for line in lines:
+        log_func(line)
+
+def save_result(result, out_path, split_by_subject=False, log_func=None, report=None, conflicts=None):
+    """
+    Lưu bảng kết quả ra file, định dạng theo đuôi file (xlsx / csv / parquet, xem writer.FORMATS).
+    xlsx quá giới hạn dòng của Excel được chia sang nhiều sheet; split_by_subject: mỗi môn 1 file.
+    report (timing.RunReport của lượt ghép): đo thêm bước ghi rồi lưu báo cáo JSON cạnh file kết quả.
+    conflicts (duplicates.ConflictIndex của lượt ghép): ghi thêm bảng dòng trùng, xem _conflict_sheets.
+    """
+    if report is None:
+        _write(result, out_path, split_by_subject, log_func, conflicts)
+        return
+    with report.stage("write"):
+        _write(result, out_path, split_by_subject, log_func, conflicts)
+    _save_report(report, out_path, log_func)
+
+def _save_report(report, out_path, log_func):
+    path = timing.report_path(out_path)
+    report.save(path)
+    if log_func is not None:
+        log_func(f"  Ghi file: {report.stages.get('write', 0.0):.2f}s. Báo cáo thời gian: {path}")
+
+def _conflict_sheets(conflicts, out_path, in_workbook, log_func):
+    """
+    Bảng dòng trùng khóa: xlsx ghi chung file kết quả (in_workbook) thì trả [(tên sheet, bảng)] để ghi thêm,
+    còn lại ghi ra file riêng duplicates.conflicts_path(out_path) và trả [].
+    """
+    if conflicts is None or not len(conflicts.table()):
+        return []
+    table = conflicts.table()
+    if in_workbook:
+        if log_func is not None:
+            log_func(f"  {len(table):,} mã SV trùng -> sheet '{duplicates.SHEET_NAME}'")
+        return [(duplicates.SHEET_NAME, table)]
+    path = duplicates.conflicts_path(out_path)
+    writer.write_result(table, path)
+    if log_func is not None:
+        log_func(f"  {len(table):,} mã SV trùng -> {path}")
+    return []
+
+def _write(result, out_path, split_by_subject, log_func, conflicts=None):
+    if split_by_subject:
+        for path, rows in writer.write_split(result, out_path):
+            if log_func is not None:
+                log_func(f"  {rows} dòng -> {path}")
+        _conflict_sheets(conflicts, out_path, False, log_func)
+        return
+    is_xlsx = writer.format_of(out_path) == "xlsx"
+    if log_func is not None and is_xlsx and writer.sheet_count(len(result)) > 1:
+        log_func(f"  Vượt giới hạn {writer.EXCEL_MAX_ROWS:,} dòng/sheet của Excel -> "
+                 f"chia thành {writer.sheet_count(len(result))} sheet.")
+    writer.write_result(result, out_path, extra_sheets=_conflict_sheets(conflicts, out_path, is_xlsx, log_func))
+
+def save_matrix(result, out_path, policy="max", log_func=None, report=None):
+    """
+    Ghi thêm bảng điểm ngang SV × môn (matrix.matrix_path(out_path)) và, nếu có SV nhiều điểm cùng 1 môn,
+    danh sách các trường hợp đó (matrix.duplicates_path(out_path)). policy: điểm giữ lại, xem matrix.POLICIES.
+    """
+    with report.stage("matrix") if report is not None else contextlib.nullcontext():
+        m = matrix.build_matrix(result, policy)
+        wanted = matrix.matrix_path(out_path)
+        path = matrix.write_matrix(m, wanted)
+        dup_path = None
+        if len(m.duplicates):
+            dup_path = matrix.duplicates_path(out_path)
+            writer.write_result(m.duplicates, dup_path)
+    if log_func is None:
+        return
+    if path != wanted:
+        log_func(f"  Vượt giới hạn {writer.EXCEL_MAX_COLUMNS:,} cột/sheet của Excel -> ghi bảng điểm ngang ra CSV.")
+    log_func(f"  Bảng điểm ngang: {m.shape[0]:,} SV × {m.shape[1]} môn -> {path}")
+    if dup_path is not None:
+        log_func(f"  ⚠ {len(m.duplicates):,} trường hợp SV có nhiều điểm cùng 1 môn (giữ điểm theo '{policy}') "
+                 f"-> {dup_path}")
+        for row in m.duplicates.head(10).itertuples(index=False):
+            log_func(f"    {row[0]} - {row[1]}: {row[3]}")
+
+def merge_to_file(paths, out_path, profile, log_func=print, workers=1, progress_func=None, cancel_event=None,
+                  cache=None, split_by_subject=False, stream=False, matrix_policy=None, skip_duplicate_files=True,
+                  store=None):
+    """
+    Gộp rồi lưu ra out_path (split_by_subject: mỗi môn 1 file, tên thêm mã môn).
+    stream: ghi dần từng file thay vì giữ cả bảng kết quả (xem stream_to_file).
+    matrix_policy ('max' / 'last' / 'first'): ghi thêm bảng điểm ngang SV × môn (xem save_matrix).
+    File trùng nội dung bị bỏ qua (trừ khi skip_duplicate_files=False); dòng trùng (Mã SV, môn, nhóm)
+    được ghi vào sheet / file xung đột. store (store.ResultStore): ghi thêm vào CSDL tra cứu.
+    Trả về số dòng đã lưu (0 nếu không có dữ liệu hợp lệ), None nếu bị hủy.
+    """
+    if stream:
+        if split_by_subject or matrix_policy:
+            raise ValueError("Ghi dần (stream) không dùng được với tách file theo môn / bảng điểm ngang.")
+        return stream_to_file(paths, out_path, profile, log_func, workers, progress_func, cancel_event, cache,
+                              skip_duplicate_files, store)
+    report = timing.RunReport(get_profile(profile).NAME)
+    conflicts = duplicates.ConflictIndex()
+    result = merge_files(paths, profile, log_func, workers, progress_func, cancel_event, cache, report, conflicts,
+                         skip_duplicate_files, store)
+    if cancel_event is not None and cancel_event.is_set():
+        return None
+    if result is None:
+        return 0
+    log_func(f"Đang lưu {len(result)} dòng...")
+    if matrix_policy:
+        save_matrix(result, out_path, matrix_policy, log_func, report)
+    save_result(result, out_path, split_by_subject, log_func, report, conflicts)
+    return len(result)
+
+def stream_to_file(paths, out_path, profile, log_func=print, workers=1, progress_func=None, cancel_event=None,
+                   cache=None, skip_duplicate_files=True, store=None):
+    """
+    Như merge_to_file nhưng bảng của từng file được ghi xuống ngay khi xử lý xong (writer.open_sink),
+    không giữ lại để concat: bộ nhớ chỉ cỡ 1 file dù ghép bao nhiêu file. Cùng dòng, cùng thứ tự như merge_to_file
+    (Parquet: cột điểm ghi số thực, các cột khác dạng chữ, xem writer.ParquetSink).
+    Ghi ra file tạm rồi mới đổi tên, hủy / lỗi giữa chừng không để lại file kết quả dở dang.
+    Dòng trùng (Mã SV, môn, nhóm) vẫn được dò (duplicates.ConflictIndex chỉ giữ mã số của khóa, không giữ bảng).
+    Trả về số dòng đã lưu (0 nếu không có dữ liệu hợp lệ), None nếu bị hủy.
+    """
+    profile = get_profile(profile)
+    report = timing.RunReport(profile.NAME)
+    root, ext = os.path.splitext(out_path)
+    tmp_path = f"{root}.~tmp{ext}"
+    conflicts = duplicates.ConflictIndex()
+    sink = None
+    try:
+        for temp in _iter_parts(paths, profile, log_func, workers, progress_func, cancel_event, cache, report,
+                                conflicts, skip_duplicate_files, store):
+            with report.stage("build"):
+                # build_result trên 1 phần: cùng cột / thứ tự cột như khi ghép cả bảng
+                part = profile.build_result([temp])
+            with report.stage("write"):
+                if sink is None:
+                    sink = writer.open_sink(tmp_path, part.columns, writer.format_of(out_path))
+                sink.append(part)
+        if sink is not None and not (cancel_event is not None and cancel_event.is_set()):
+            _log_conflicts(conflicts, log_func, report)
+            with report.stage("write"):
+                for title, table in _conflict_sheets(conflicts, out_path, isinstance(sink, writer.XlsxSink), log_func):
+                    sink.add_sheet(title, table)
+                sink.close()
+    except BaseException:
+        _discard(sink, tmp_path)
+        raise
+    if cancel_event is not None and cancel_event.is_set():
+        _discard(sink, tmp_path)
+        return None
+    report.finish()
+    for line in report.summary_lines():
+        log_func(line)
+    if sink is None:
+        return 0
+    os.replace(tmp_path, out_path)
+    if sink.sheets > 1:
+        log_func(f"  Vượt giới hạn {writer.EXCEL_MAX_ROWS:,} dòng/sheet của Excel -> chia thành {sink.sheets} sheet.")
+    if isinstance(sink, writer.ParquetSink) and sink.text_scores:
+        log_func(f"  ⚠ {sink.text_scores:,} ô điểm dạng chữ (vd. 'Vắng') không đổi được sang số -> ghi ô trống.")
+    _save_report(report, out_path, log_func)
+    return sink.rows
+
+def _discard(sink, tmp_path):
+    """Bỏ file tạm của lượt ghi dần bị hủy / lỗi (đóng sink trước để Windows cho xóa)."""
+    if sink is not None:
+        try:
+            sink.close()
+        except Exception:
+            pass
+    try:
+        os.remove(tmp_path)
+    except OSError:
+        pass
+
+def watch_to_file(folder, out_path, profile, log_func=print, workers=1, progress_func=None, cancel_event=None,
+                  cache=None, interval=2.0, recursive=False, include=(), exclude=()):
+    """
+    Chế độ theo dõi thư mục: chỉ đọc lại file thêm/sửa/xóa và cập nhật out_path, tới khi cancel_event được set.
+    recursive / include / exclude: chọn file như list_excel_files.
+    """
+    profile = get_profile(profile)
+    # dùng cùng hàm đọc với merge_files để 2 chế độ dùng chung được cache
+    watch.watch_merge(folder, out_path, timed_extractor(profile), profile.build_result, log_func, workers,
+                      progress_func, cancel_event, cache, interval, recursive, include, exclude)
@@ -0,0 +1,153 @@
+"""
+Lọc / chuẩn hóa cột Mã SV.
+
+Các hàm từng giá trị (is_probably_masv, is_valid_masv, format_mssv_value) là định nghĩa gốc lấy
+từ các công cụ cũ; các hàm *_mask / *_series cho kết quả giống hệt nhưng chạy theo cả cột.
+Cột Mã SV của 1 file chỉ vài chục dòng: *_mask so 1 regex đã biên dịch với từng ô (nhanh hơn apply hàm gốc
+từ ~30 dòng); valid_masv_mask chỉ dùng .str của pandas khi cột dài và chuỗi lưu bằng pyarrow (không thì .str
+cũng lặp từng giá trị Python, còn chậm hơn). Số đo: python benchmarks/bench_masv_filter.py --per-file
+"""
+import re
+import numpy as np
+import pandas as pd
+
+from ghep_diem import timing
+
+# cột ngắn hơn ngưỡng này thì không dựng phép toán theo cột (.str của pandas / numpy),
+# đo bằng bench_masv_filter.py --per-file: bảng điểm ~50 dòng/file luôn dưới ngưỡng
+VECTOR_MIN_ROWS = 500
+
+# Mã SV hợp lệ: chỉ chữ/số ASCII, '-' và '/'
+_MASV_RE = re.compile(r'[A-Za-z0-9\-/]+')
+
+# Bản gộp của is_probably_masv: chuỗi chỉ gồm ký tự ASCII ở trên thì trong các từ ghi chú
+# (số sv, môn học, cbgd, nhóm, tbc, điều kiện) chỉ còn 'tbc'/'cbgd' có thể xuất hiện;
+# viết rõ hoa/thường thay cho IGNORECASE để [A-Za-z] không khớp ký tự unicode như 'K' (Kelvin).
+_PROBABLY_MASV_RE = re.compile(r'(?!\d{1,2}$)(?!.*(?:[Tt][Bb][Cc]|[Cc][Bb][Gg][Dd]))[A-Za-z0-9\-/]+')
+
+# float(int) chỉ chính xác tới 2**53: lớn hơn thì để hàm từng giá trị xử lý
+_MAX_EXACT_INT = 2 ** 53
+
+# ======================= HÀM TỪNG GIÁ TRỊ ==========================
+
+def is_probably_masv(s):
+    """Trả True nếu chuỗi có vẻ là Mã SV, loại trừ dòng tiêu đề/ghi chú (profile lms)."""
+    if pd.isna(s):
+        return False
+    st = str(s).strip()
+    if st == "":
+        return False
+    # loại trừ các dòng ghi chú
+    if re.search(r'(số sv|môn học|cbgd|nhóm|tbc|điều kiện)', st, re.IGNORECASE):
+        return False
+    # nếu chỉ chứa chữ số hoặc chữ+số hoặc có dấu gạch, coi là mã SV hợp lệ
+    if re.match(r'^[A-Za-z0-9\-/]+$', st):
+        # tránh những chuỗi quá ngắn như '01' (thường là nhãn nhóm)
+        if len(st) <= 2 and st.isdigit():
+            return False
+        return True
+    return False
+
+def is_valid_masv(value):
+    """Kiểm tra xem value có phải là mã sinh viên hợp lệ không (profile aq)"""
+    if pd.isna(value):
+        return False
+    s = str(value).strip()
+    # loại bỏ các dòng có chữ 'điều kiện'
+    if 'điều kiện' in s.lower():
+        return False
+    # mã SV hợp lệ: chữ số/chữ cái/ký tự gạch (-,/)
+    if re.match(r'^[A-Za-z0-9\-/]+$', s):
+        return True
+    return False
+
+def format_mssv_value(v):
+    """Chuẩn hóa MSSV: nếu là số nguyên như 12345.0 -> '12345' (profile lms_v2/lms_v1)"""
+    if pd.isna(v):
+        return ''
+    try:
+        f = float(v)
+        if f.is_integer():
+            return str(int(f))
+        else:
+            return str(v).strip()
+    except Exception:
+        return str(v).strip()
+
+# ======================= HÀM THEO CỘT ==========================
+
+def _arrow_strings():
+    """Chuỗi của pandas lưu bằng pyarrow (pandas 3 + pyarrow): .str chạy trong C++ thay vì lặp từng giá trị."""
+    return getattr(pd.Series(["a"]).astype(str).dtype, "storage", None) == "pyarrow"
+
+_ARROW_STRINGS = _arrow_strings()
+
+def _regex_mask(col, pattern):
+    """pattern.fullmatch(str(giá trị).strip()) từng ô, ô trống -> False; bỏ re.search / pd.isna từng ô của hàm gốc."""
+    values = col.to_numpy(dtype=object)
+    notna = col.notna().to_numpy()
+    out = np.fromiter((ok and pattern.fullmatch(str(v).strip()) is not None for v, ok in zip(values, notna)),
+                      dtype=bool, count=len(values))
+    return pd.Series(out, index=col.index, name=col.name)
+
+def _as_str(col):
+    """str() từng giá trị như hàm gốc (cột datetime astype(str) bỏ giờ nên phải map)."""
+    if col.dtype.kind in "biufO" or isinstance(col.dtype, pd.StringDtype):
+        return col.astype(str)
+    return col.map(str)
+
+def probably_masv_mask(col):
+    """Như col.apply(is_probably_masv), trả Series bool."""
+    with timing.stage("filter"):
+        return _probably_masv_mask(col)
+
+def _probably_masv_mask(col):
+    # mẫu có lookahead: .str của pandas không chuyển được sang pyarrow (RE2), cũng lặp từng giá trị -> luôn lặp regex
+    return _regex_mask(col, _PROBABLY_MASV_RE)
+
+def valid_masv_mask(col):
+    """Như col.apply(is_valid_masv), trả Series bool."""
+    with timing.stage("filter"):
+        return _valid_masv_mask(col)
+
+def _valid_masv_mask(col):
+    # 'điều kiện' có dấu nên không bao giờ khớp mẫu ASCII -> không cần kiểm tra riêng
+    if not _ARROW_STRINGS or len(col) < VECTOR_MIN_ROWS:
+        return _regex_mask(col, _MASV_RE)
+    st = _as_str(col).str.strip()
+    mask = st.str.fullmatch(_MASV_RE).fillna(False).astype(bool)
+    return mask & col.notna()
+
+def format_mssv_series(col):
+    """
+    Như col.apply(format_mssv_value): số nguyên (cột số, hoặc int lẫn trong cột object) đổi
+    sang chuỗi theo cả cột, phần còn lại (chữ, số lẻ, số quá lớn) mới gọi hàm từng giá trị.
+    """
+    with timing.stage("filter"):
+        return _format_mssv_series(col)
+
+def _format_mssv_series(col):
+    if len(col) == 0 or len(col) < VECTOR_MIN_ROWS:
+        return col.apply(format_mssv_value)
+    out = np.full(len(col), "", dtype=object)
+    done = col.isna().to_numpy(copy=True)
+
+    if col.dtype.kind in "biuf":
+        nums = col.to_numpy(dtype="float64", na_value=np.nan)
+        with np.errstate(invalid="ignore"):
+            idx = np.flatnonzero(~done & np.isfinite(nums) & (np.abs(nums) < _MAX_EXACT_INT) & (np.mod(nums, 1) == 0))
+        out[idx] = list(map(str, nums[idx].astype("int64").tolist()))
+        done[idx] = True
+    elif col.dtype.kind == "O":
+        # cột đọc từ Excel thường là int lẫn vài dòng chữ -> tách riêng các giá trị int
+        values = col.to_numpy(dtype=object)
+        kinds = np.fromiter(map(type, values), dtype=object, count=len(values))
+        idx = np.flatnonzero((kinds == int) & ~done)
+        idx = idx[np.abs(values[idx].astype("float64")) < _MAX_EXACT_INT]
+        out[idx] = list(map(str, values[idx]))
+        done[idx] = True
+
+    rest = np.flatnonzero(~done)
+    if len(rest):
+        out[rest] = list(map(format_mssv_value, col.iloc[rest].to_numpy(dtype=object)))
+    return pd.Series(out, index=col.index).astype(str)
@@ -0,0 +1,161 @@
+"""
+Bảng điểm ngang: mỗi SV 1 dòng, mỗi mã môn 1 cột (thay cho pivot tay trong Excel).
+Dựng từ mã số nguyên của cột category (ghep_diem.compact) chứ không pivot trên chuỗi: chỉ giữ các ô có điểm
+(như ma trận thưa), tới lúc ghi mới trải ra từng khúc CHUNK_ROWS SV nên bộ nhớ không phụ thuộc số SV × số môn.
+SV có nhiều điểm cho cùng 1 môn (học lại, trùng file) được liệt kê riêng, điểm giữ lại theo policy.
+"""
+import numpy as np
+import pandas as pd
+
+from ghep_diem import compact, writer
+
+# tên cột của các profile (lms / aq / auto và lms_v2 / lms_v1)
+ID_COLUMNS = compact.ID_COLUMNS
+SUBJECT_COLUMNS = ("Mã môn học",)
+SCORE_COLUMNS = writer.SCORE_COLUMNS
+GROUP_COLUMNS = ("Nhóm", "Mã nhóm")
+
+# điểm giữ lại khi 1 SV có nhiều điểm cùng môn
+POLICIES = ("max", "last", "first")
+
+# số SV trải ra bảng đầy đủ mỗi lần khi ghi
+CHUNK_ROWS = 10_000
+
+def pick_column(df, names):
+    for c in names:
+        if c in df.columns:
+            return c
+    raise ValueError(f"Bảng kết quả không có cột {' / '.join(names)}")
+
+def _sorted_codes(cat):
+    """
+    Mã category -> mã theo nhãn dạng chữ đã bỏ khoảng trắng và sắp xếp, để 2251010000 (số), '2251010000'
+    và ' 2251010000 ' là 1 SV. Trả (mã mới từng dòng, -1 nếu trống; các nhãn đã sắp).
+    """
+    labels = np.array([str(v).strip() for v in cat.cat.categories], dtype=object)
+    uniq, inverse = np.unique(labels, return_inverse=True)
+    codes = cat.cat.codes.to_numpy().astype(np.int64)
+    return np.where(codes >= 0, inverse[np.maximum(codes, 0)], -1), pd.Index(uniq, dtype=object)
+
+class ScoreMatrix:
+    """
+    Ma trận SV × môn dạng thưa: các ô có điểm sắp theo (SV, môn), row_ptr[i]:row_ptr[i+1] là các ô của SV thứ i.
+    duplicates: DataFrame các cặp (SV, môn) có nhiều hơn 1 điểm.
+    """
+
+    def __init__(self, id_col, students, subjects, rows, cols, values, duplicates):
+        self.id_col = id_col
+        self.students = students
+        self.subjects = subjects
+        self.cols = cols
+        self.values = values
+        self.row_ptr = np.searchsorted(rows, np.arange(len(students) + 1))
+        self.duplicates = duplicates
+
+    @property
+    def columns(self):
+        return [self.id_col] + [str(s) for s in self.subjects]
+
+    @property
+    def shape(self):
+        return len(self.students), len(self.subjects)
+
+    def iter_frames(self, chunk_rows=CHUNK_ROWS):
+        """Các khúc bảng đầy đủ (tối đa chunk_rows SV), ô không có điểm là NaN."""
+        n_students, n_subjects = self.shape
+        for start in range(0, n_students, chunk_rows):
+            stop = min(start + chunk_rows, n_students)
+            lo, hi = self.row_ptr[start], self.row_ptr[stop]
+            block = np.full((stop - start, n_subjects), np.nan)
+            rows = np.repeat(np.arange(stop - start), np.diff(self.row_ptr[start:stop + 1]))
+            block[rows, self.cols[lo:hi]] = self.values[lo:hi]
+            frame = pd.DataFrame(block, columns=self.columns[1:])
+            frame.insert(0, self.id_col, self.students[start:stop].to_numpy())
+            yield frame
+
+def build_matrix(result, policy="max"):
+    """
+    Dựng ScoreMatrix từ bảng kết quả dạng dọc (Mã SV / Mã môn học / điểm).
+    policy khi 1 SV có nhiều điểm cùng môn: 'max' điểm cao nhất, 'last' / 'first' theo thứ tự dòng (thứ tự file).
+    Dòng thiếu Mã SV hoặc mã môn bị bỏ qua.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"policy phải là 1 trong {', '.join(POLICIES)}: {policy}")
+    id_col = pick_column(result, ID_COLUMNS)
+    subject_col = pick_column(result, SUBJECT_COLUMNS)
+    score_col = pick_column(result, SCORE_COLUMNS)
+    group_col = next((c for c in GROUP_COLUMNS if c in result.columns), None)
+
+    student_codes, students = _sorted_codes(compact.as_category(result[id_col]))
+    subject_codes, subjects = _sorted_codes(compact.as_category(result[subject_col]))
+    scores = pd.to_numeric(result[score_col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+    pos = np.flatnonzero((student_codes >= 0) & (subject_codes >= 0))
+    key = student_codes[pos] * max(1, len(subjects)) + subject_codes[pos]
+    # sắp theo (SV, môn), cùng cặp thì giữ thứ tự dòng
+    order = np.lexsort((pos, key))
+    key, pos = key[order], pos[order]
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]]) if len(key) else np.array([], dtype=np.int64)
+    ends = np.r_[starts[1:], len(key)]
+    vals = scores[pos]
+    if policy == "first":
+        chosen = vals[starts]
+    elif policy == "last":
+        chosen = vals[ends - 1]
+    else:
+        # fmax bỏ qua NaN: SV có 1 lần trống điểm, 1 lần có điểm -> lấy điểm
+        chosen = np.fmax.reduceat(vals, starts) if len(starts) else vals[:0]
+
+    unique_key = key[starts]
+    n_subjects = max(1, len(subjects))
+    rows, cols = unique_key // n_subjects, unique_key % n_subjects
+
+    duplicates = _duplicates(result, id_col, subject_col, score_col, group_col, pos, starts, ends, chosen)
+    return ScoreMatrix(id_col, students, subjects, rows, cols, chosen, duplicates)
+
+def _duplicates(result, id_col, subject_col, score_col, group_col, pos, starts, ends, chosen):
+    """Bảng các cặp (SV, môn) có nhiều điểm: số lần, các điểm / nhóm theo thứ tự dòng, điểm được giữ."""
+    multi = np.flatnonzero(ends - starts > 1)
+    columns = [id_col, subject_col, "Số lần", "Các điểm"] + (["Các nhóm"] if group_col else []) + ["Điểm giữ lại"]
+    if not len(multi):
+        return pd.DataFrame(columns=columns)
+    out = {id_col: [], subject_col: [], "Số lần": [], "Các điểm": [], "Các nhóm": [], "Điểm giữ lại": []}
+    ids = np.array([str(v).strip() for v in result[id_col].to_numpy(dtype=object)], dtype=object)
+    subjects = result[subject_col].to_numpy(dtype=object)
+    scores = result[score_col].to_numpy(dtype=object)
+    groups = result[group_col].to_numpy(dtype=object) if group_col else None
+    for g in multi:
+        rows = pos[starts[g]:ends[g]]
+        out[id_col].append(ids[rows[0]])
+        out[subject_col].append(subjects[rows[0]])
+        out["Số lần"].append(len(rows))
+        out["Các điểm"].append("; ".join("" if pd.isna(v) else str(v) for v in scores[rows]))
+        if groups is not None:
+            out["Các nhóm"].append("; ".join("" if pd.isna(v) else str(v) for v in groups[rows]))
+        out["Điểm giữ lại"].append(chosen[g])
+    if group_col is None:
+        del out["Các nhóm"]
+    return pd.DataFrame(out, columns=columns)
+
+# ======================= GHI FILE ==========================
+
+def matrix_path(out_path):
+    """'out/Tong_Hop.xlsx' -> 'out/Tong_Hop_ma_tran.xlsx'."""
+    return writer.split_path(out_path, "ma_tran")
+
+def duplicates_path(out_path):
+    """'out/Tong_Hop.xlsx' -> 'out/Tong_Hop_diem_trung.xlsx'."""
+    return writer.split_path(out_path, "diem_trung")
+
+def write_matrix(matrix, path):
+    """
+    Ghi ma trận ra path (định dạng theo đuôi file), trải ra từng khúc SV; trả đường dẫn đã ghi.
+    xlsx mà số môn + 1 cột Mã SV vượt writer.EXCEL_MAX_COLUMNS thì Excel không mở được -> ghi CSV cùng tên.
+    """
+    if writer.format_of(path) == "xlsx" and len(matrix.columns) > writer.EXCEL_MAX_COLUMNS:
+        path = writer.with_extension(path, "csv")
+    sink = writer.open_sink(path, matrix.columns)
+    for frame in matrix.iter_frames():
+        sink.append(frame)
+    sink.close()
+    return path
@@ -0,0 +1,45 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from ghep_diem import prefetch
+
+# ======================= XỬ LÝ NHIỀU FILE SONG SONG ==========================
+
+def default_workers():
+    """Số tiến trình mặc định: số nhân CPU của máy."""
+    return os.cpu_count() or 1
+
+def map_files(func, paths, workers=1, cache=None):
+    """
+    Gọi func(path) cho từng file, trả về kết quả lần lượt theo đúng thứ tự paths.
+    workers > 1: chạy trong process pool (func phải là hàm ở mức module để pickle được).
+    Ít file hoặc workers <= 1: chạy tuần tự, không tốn chi phí tạo process; bytes các file kế tiếp được
+    đọc trước trên thread nền trong lúc xử lý file hiện tại (ghep_diem.prefetch).
+    cache (ghep_diem.cache.ParseCache): file không đổi lấy kết quả từ cache.
+    """
+    paths = list(paths)
+    if cache is not None:
+        yield from cache.map_files(func, paths, workers)
+        return
+    if workers <= 1 or len(paths) < 2:
+        yield from prefetch.map_prefetched(func, paths)
+        return
+    workers = min(workers, len(paths))
+    # gom vài file / lượt gửi để giảm chi phí pickle khi có hàng nghìn file nhỏ
+    chunksize = max(1, min(16, len(paths) // (workers * 4)))
+    ex = ProcessPoolExecutor(max_workers=workers)
+    try:
+        yield from ex.map(func, paths, chunksize=chunksize)
+    finally:
+        # người gọi dừng giữa chừng (hủy): bỏ các file chưa bắt đầu, chờ file đang chạy xong
+        ex.shutdown(wait=True, cancel_futures=True)
+
+def parse_workers(text):
+    """Đọc số tiến trình người dùng nhập; rỗng -> mặc định, không hợp lệ -> ValueError."""
+    text = str(text).strip()
+    if text == "":
+        return default_workers()
+    n = int(text)
+    if n < 1:
+        raise ValueError(f"Số tiến trình phải >= 1: {n}")
+    return n
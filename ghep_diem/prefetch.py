@@ -0,0 +1,128 @@
+"""
+Đọc trước file khi ghép tuần tự (1 tiến trình), cho thư mục điểm trên ổ mạng (SMB): mỗi lần đọc file phải chờ mạng,
+nên trong lúc file hiện tại đang được parse, vài thread nền đã tải sẵn bytes các file kế tiếp vào bộ nhớ
+(chờ mạng không giữ GIL nên chạy song song được với phần parse). Số file đọc trước và tổng dung lượng
+đang giữ trong bộ nhớ đều có giới hạn; file đọc lỗi thì để profile tự đọc lại và báo lỗi như thường.
+"""
+import os
+import threading
+
+from ghep_diem import sources
+
+# số file đọc trước tối đa / tổng dung lượng (MB) đang giữ trong bộ nhớ; đặt qua biến môi trường
+# (cli --read-ahead / --read-ahead-mb), READ_AHEAD_ENV = 0 để tắt
+READ_AHEAD_ENV = "GHEP_DIEM_READ_AHEAD"
+READ_AHEAD_MB_ENV = "GHEP_DIEM_READ_AHEAD_MB"
+READ_AHEAD = 8
+READ_AHEAD_MB = 256
+
+# số thread đọc file
+THREADS = 4
+
+def read_ahead_settings():
+    """(số file đọc trước, số byte tối đa) theo biến môi trường, mặc định READ_AHEAD / READ_AHEAD_MB."""
+    files = int(os.environ.get(READ_AHEAD_ENV) or READ_AHEAD)
+    mb = int(os.environ.get(READ_AHEAD_MB_ENV) or READ_AHEAD_MB)
+    return max(0, files), max(1, mb) * 1024 * 1024
+
+class Prefetcher:
+    """
+    Đọc trước bytes của paths trên các thread nền, lấy ra theo đúng thứ tự: for path, data in prefetcher
+    (data = bytes, None nếu đọc lỗi). Chỉ đọc trước tối đa window file so với file đang lấy ra, và ngừng
+    đọc thêm khi các file đã đọc chưa lấy ra vượt max_bytes (file sắp lấy ra thì luôn đọc, để file lớn vẫn qua được).
+    read: hàm đọc 1 file (mặc định sources.read_bytes), thay được bằng hàm giả lập ổ mạng chậm khi đo.
+    Dùng với with (hoặc gọi close()) để dừng các thread khi người gọi thôi lấy giữa chừng.
+    """
+
+    def __init__(self, paths, window=READ_AHEAD, max_bytes=READ_AHEAD_MB * 1024 * 1024, threads=THREADS,
+                 read=sources.read_bytes):
+        self.paths = list(paths)
+        self.window = max(1, window)
+        self.max_bytes = max_bytes
+        self.read = read
+        self._cond = threading.Condition()
+        # file kế tiếp cần giao cho thread đọc / file kế tiếp người gọi lấy ra
+        self._next = 0
+        self._pos = 0
+        # vị trí -> (bytes hoặc None, số byte đã giữ chỗ)
+        self._ready = {}
+        self._buffered = 0
+        self._closed = False
+        self._threads = [threading.Thread(target=self._worker, daemon=True)
+                         for _ in range(max(1, min(threads, self.window, len(self.paths))))]
+        for t in self._threads:
+            t.start()
+
+    def _size(self, path):
+        try:
+            return sources.signature(path)[0]
+        except Exception:
+            return 0
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._closed and self._next < len(self.paths) and self._next - self._pos >= self.window:
+                    self._cond.wait()
+                if self._closed or self._next >= len(self.paths):
+                    return
+                i = self._next
+                self._next += 1
+            path = self.paths[i]
+            size = self._size(path)
+            with self._cond:
+                # file đứng trước trong hàng luôn được đọc, để không kẹt khi file lớn hơn max_bytes
+                while not self._closed and self._buffered and self._buffered + size > self.max_bytes and i > self._pos:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                self._buffered += size
+            try:
+                data = self.read(path)
+            except Exception:
+                data = None
+            with self._cond:
+                self._ready[i] = (data, size)
+                self._cond.notify_all()
+
+    def __iter__(self):
+        while self._pos < len(self.paths):
+            i = self._pos
+            with self._cond:
+                while i not in self._ready:
+                    self._cond.wait()
+                data, size = self._ready.pop(i)
+                self._buffered -= size
+                self._pos = i + 1
+                self._cond.notify_all()
+            yield self.paths[i], data
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._ready.clear()
+            self._cond.notify_all()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def map_prefetched(func, paths, window=None, max_bytes=None):
+    """
+    func(path) cho từng file theo thứ tự (như parallel.map_files tuần tự) nhưng bytes các file kế tiếp được
+    đọc trước trên thread nền; func đọc file qua sources.open_binary nên lấy được bytes đã đọc sẵn.
+    window / max_bytes mặc định theo read_ahead_settings(); window = 0: không đọc trước.
+    """
+    default_window, default_bytes = read_ahead_settings()
+    window = default_window if window is None else window
+    if window <= 0 or len(paths) < 2:
+        for p in paths:
+            yield func(p)
+        return
+    with Prefetcher(paths, window, max_bytes or default_bytes) as ahead:
+        for p, data in ahead:
+            with sources.preloaded(p, data):
+                result = func(p)
+            yield result
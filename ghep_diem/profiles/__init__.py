@@ -0,0 +1,22 @@
+"""
+Các kiểu file điểm (profile). Mỗi công cụ tương ứng 1 profile, mỗi profile có:
+- NAME, COLUMNS: tên profile và các cột của bảng kết quả
+- extract_file(path) -> (DataFrame hoặc None, các dòng log): xử lý 1 file
+- extract_sheet(path, sheet): như extract_file trên file đã đọc (reader.read_sheet_once)
+- skip_file(path, reason): kết quả (None, log) của file bị pre-scan bỏ (reader.NotGradeSheet)
+- build_result(parts) -> DataFrame: ghép kết quả các file
+- hằng số bố cục (HEADER_MARKERS / HEADER_SEARCH_ROWS hoặc HEADER_ROW...) dùng để nhận dạng kiểu file
+Profile "auto" nhận dạng kiểu cho từng file và gọi profile tương ứng.
+"""
+from ghep_diem.profiles import aq, auto, lms, lms_v1, lms_v2
+
+PROFILES = {p.NAME: p for p in (lms, aq, lms_v2, lms_v1, auto)}
+
+def get_profile(name):
+    """Lấy profile theo tên (vd. "lms"); truyền vào module profile thì trả lại nguyên."""
+    if not isinstance(name, str):
+        return name
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Không có profile '{name}'. Các profile: {', '.join(PROFILES)}") from None
@@ -0,0 +1,143 @@
+"""Profile "aq": file AQ theo thư mục (Gopdiem_AQ_V2.py) - dò header 10 dòng đầu, mã môn/nhóm ở C5/C6."""
+import os
+import re
+from ghep_diem import compact, masv, reader
+
+NAME = "aq"
+COLUMNS = ['Mã SV', 'Điểm TBC', 'Mã môn học', 'Nhóm']
+
+# Bố cục file: header là dòng đầu tiên (trong 10 dòng) có 'Mã SV' hoặc 'TBC'; mã môn/nhóm ở C5/C6
+HEADER_MARKERS = ("mã sv", "tbc")
+HEADER_SEARCH_ROWS = 10
+
+# Các mẫu regex biên dịch sẵn (mỗi file dùng lại, không tra cache của re)
+_PAREN_RE = re.compile(r'\((.*?)\)')
+_GROUP_RE = re.compile(r'-\s*(\w+)')
+
+# ======================= HÀM HỖ TRỢ ==========================
+
+def read_excel_with_header_detect(sheet):
+    """Dựng bảng từ file đã đọc (reader.read_sheet_once), tự động tìm dòng có Mã SV hoặc TBC để làm header (10 dòng đầu)"""
+    return reader.frame_with_header_detect(sheet.rows, markers=HEADER_MARKERS, max_rows=HEADER_SEARCH_ROWS)
+
+def find_column(df, keywords):
+    """Tìm tên cột chứa 1 trong các keyword (không phân biệt hoa thường)"""
+    for c in df.columns:
+        c_low = str(c).lower()
+        for kw in keywords:
+            if kw in c_low:
+                return c
+    return None
+
+def pick_columns(path, head):
+    """Cho reader.read_sheet_once: dòng header và cột Mã SV / TBC trên các dòng đầu (như extract_sheet), không có -> None"""
+    header_row = reader.locate_header_row(head.rows, HEADER_MARKERS, HEADER_SEARCH_ROWS)
+    if header_row is None:
+        return None
+    header = reader.header_frame(head.rows[header_row])
+    col_ma_sv = find_column(header, ['mã sv', 'masv'])
+    col_tbc = find_column(header, ['tbc', 'đtp'])
+    if col_ma_sv is None or col_tbc is None:
+        return None
+    id_col = header.columns.get_loc(col_ma_sv)
+    return header_row, (id_col, header.columns.get_loc(col_tbc)), id_col
+
+def reject_reason(path, head):
+    """Cho reader.read_sheet_once (pre-scan): lý do bỏ file nhận ra trên các dòng đầu (như extract_sheet), hoặc None"""
+    if not head.rows:
+        return "sheet trống"
+    header_row = reader.locate_header_row(head.rows, HEADER_MARKERS, HEADER_SEARCH_ROWS)
+    header = reader.header_frame(head.rows[header_row or 0])
+    if find_column(header, ['mã sv', 'masv']) is None:
+        return f"không có cột Mã SV trong {HEADER_SEARCH_ROWS} dòng đầu"
+    if find_column(header, ['tbc', 'đtp']) is None:
+        return "có cột Mã SV nhưng không có cột TBC (danh sách lớp / điểm danh?)"
+    return None
+
+PROJECTION = reader.Projection(HEADER_SEARCH_ROWS, pick_columns, NAME, reject_reason, HEADER_MARKERS)
+
+def extract_subject_group_from_cell(c5, c6):
+    """Tách mã môn học + nhóm từ giá trị ô C5 (hoặc C6) đã đọc sẵn cùng bảng điểm"""
+    try:
+        # thử ô C5 trước, nếu rỗng thử ô C6
+        cell_value = c5 or c6
+        if not cell_value:
+            return None, None
+
+        text = str(cell_value)
+        # Lấy mã môn học trong dấu ngoặc
+        subject_match = _PAREN_RE.search(text)
+        subject_code = subject_match.group(1).strip() if subject_match else None
+
+        # Lấy nhóm sau dấu -
+        group_match = _GROUP_RE.search(text)
+        group_code = group_match.group(1).strip() if group_match else None
+
+        return subject_code, group_code
+    except:
+        return None, None
+
+# ======================= XỬ LÝ 1 FILE ==========================
+
+def extract_file(file_path):
+    """Xử lý 1 file: trả về (DataFrame các dòng SV hợp lệ hoặc None nếu bỏ qua, các dòng log) (chạy được trong process pool)"""
+    # mở file 1 lần: lấy luôn ô C5/C6 và bảng điểm
+    try:
+        sheet = reader.read_sheet_once(file_path, projection=PROJECTION)
+    except reader.NotGradeSheet as e:
+        return skip_file(file_path, e)
+    except:
+        return None, []
+    return extract_sheet(file_path, sheet)
+
+def skip_file(file_path, reason):
+    """Kết quả của file bị pre-scan bỏ (reader.NotGradeSheet): (None, dòng log lý do)"""
+    return None, [f"Bỏ qua {os.path.basename(file_path)}: {reason}"]
+
+def extract_sheet(file_path, sheet):
+    """Như extract_file nhưng trên file đã đọc sẵn (reader.read_sheet_once)"""
+    logs = []
+    # lấy mã môn học + nhóm từ ô C5/C6
+    subject_code, group_code = extract_subject_group_from_cell(sheet.c5, sheet.c6)
+
+    # bố cục đã dò lúc đọc file (pick_columns / cache bố cục): không dò lại header và cột
+    layout = reader.sheet_layout(sheet, NAME)
+    try:
+        if layout is not None:
+            df = reader.frame_from_rows(sheet.rows, layout.header_row)
+        else:
+            df = read_excel_with_header_detect(sheet)
+    except:
+        return None, logs
+
+    if layout is not None:
+        col_ma_sv, col_tbc = reader.layout_columns(df, layout)
+    else:
+        col_ma_sv = find_column(df, ['mã sv', 'masv'])
+        col_tbc = find_column(df, ['tbc', 'đtp'])
+
+    if col_ma_sv is None or col_tbc is None:
+        # bỏ qua file không đủ cột
+        return None, logs
+
+    try:
+        temp = df[[col_ma_sv, col_tbc]].copy()
+    except:
+        return None, logs
+
+    # lọc bỏ các dòng mà cột Mã SV bị trống
+    temp = temp[temp[col_ma_sv].notna()]
+
+    # lọc bỏ các dòng thống kê không phải sinh viên
+    temp = temp[masv.valid_masv_mask(temp[col_ma_sv])]
+
+    temp.rename(columns={col_ma_sv: 'Mã SV', col_tbc: 'Điểm TBC'}, inplace=True)
+    temp['Mã môn học'] = subject_code
+    temp['Nhóm'] = group_code
+
+    # mã môn / nhóm / Mã SV lặp lại nhiều dòng -> category (xem ghep_diem.compact)
+    return compact.compact_frame(temp), logs
+
+def build_result(all_data):
+    """Ghép các bảng của từng file thành bảng kết quả"""
+    return compact.concat_parts(all_data)
@@ -0,0 +1,123 @@
+"""
+Profile "auto": nhận dạng kiểu file (lms / lms_v2 / lms_v1 / aq) cho từng file theo bố cục khai báo
+trong từng profile, nên 1 thư mục lẫn nhiều kiểu file được ghép trong 1 lượt, mỗi file chỉ đọc 1 lần.
+Bảng kết quả dùng cột của profile lms.
+"""
+import os
+from ghep_diem import compact, reader, timing
+from ghep_diem.profiles import aq, lms, lms_v1, lms_v2
+
+NAME = "auto"
+COLUMNS = lms.COLUMNS
+
+# đổi cột kết quả của từng profile về cột chung
+_V2_RENAME = {'MSSV': 'Mã SV', 'Mã nhóm': 'Nhóm', 'Điểm trung bình cộng': 'Điểm TBC'}
+RENAME = {lms_v2.NAME: _V2_RENAME, lms_v1.NAME: _V2_RENAME}
+_BY_NAME = {p.NAME: p for p in (lms, lms_v2, lms_v1, aq)}
+
+# ======================= NHẬN DẠNG ==========================
+
+def _header_at(rows, i):
+    """Các ô tiêu đề (chữ thường) ở dòng i, không có -> []."""
+    if i is None or i >= len(rows):
+        return []
+    return [str(c).lower() for c in rows[i]]
+
+def _has(header, keywords):
+    return any(kw in c for c in header for kw in keywords)
+
+def detect(path, sheet):
+    """
+    Chọn profile cho 1 file đã đọc (reader.read_sheet_once), thử lần lượt:
+    - lms: dò được dòng 'Mã SV' trong 15 dòng đầu và có cột TBC ĐTP
+    - lms_v2 / lms_v1: C5/C6 không có tiêu đề môn '(MÃ)', dòng 8 có cột MSSV và tên file có mã môn-nhóm;
+      có cột TBC -> lms_v2, không có mà đủ tới cột L -> lms_v1
+    - aq: trong 10 dòng đầu có dòng tiêu đề gồm cột Mã SV và cột TBC/ĐTP
+    Không khớp -> None.
+    """
+    rows = sheet.rows
+
+    header = _header_at(rows, reader.locate_header_row(rows, lms.HEADER_MARKERS, lms.HEADER_SEARCH_ROWS))
+    if any('tbc' in c and 'đtp' in c for c in header):
+        return lms
+
+    titled = aq.extract_subject_group_from_cell(sheet.c5, sheet.c6)[0] is not None
+    header = _header_at(rows, lms_v2.HEADER_ROW)
+    if (not titled and any(lms_v2.is_mssv_header(c) for c in header)
+            and any(lms_v2.extract_info_from_filename(os.path.basename(path)))):
+        if _has(header, ('tbc',)):
+            return lms_v2
+        if len(header) > lms_v1.SCORE_COLUMN_INDEX:
+            return lms_v1
+
+    header = _header_at(rows, reader.locate_header_row(rows, aq.HEADER_MARKERS, aq.HEADER_SEARCH_ROWS))
+    if _has(header, ('mã sv', 'masv')) and _has(header, ('tbc', 'đtp')):
+        return aq
+    return None
+
+def pick_columns(path, head):
+    """
+    Cho reader.read_sheet_once: nhận dạng trên các dòng đầu rồi đọc bớt theo profile đó.
+    Chỉ với lms / lms_v2 / lms_v1: nhận ra aq trên các dòng đầu vẫn có thể thành lms_v1 khi đủ cả bảng
+    (lms_v1 cần bảng rộng tới cột L) nên file aq đọc cả sheet. Với 3 kiểu này detect trên các dòng đầu và trên
+    cả sheet cho cùng kết quả, nên extract_sheet lấy luôn profile từ Layout trả về.
+    """
+    profile = detect(path, head)
+    if profile in (lms, lms_v2, lms_v1):
+        return reader.pick_layout(profile.PROJECTION, path, head)
+    return None
+
+def reject_reason(path, head):
+    """
+    Cho reader.read_sheet_once (pre-scan): không nhận dạng được kiểu nào trên các dòng đầu -> lý do, không thì None.
+    Trừ file có cột MSSV ở dòng 8 và mã môn-nhóm trong tên file: có thể là lms_v1 khi đủ cả bảng (cột L).
+    """
+    if not head.rows:
+        return "sheet trống"
+    if detect(path, head) is not None:
+        return None
+    if (any(lms_v2.is_mssv_header(c) for c in _header_at(head.rows, lms_v2.HEADER_ROW))
+            and any(lms_v2.extract_info_from_filename(os.path.basename(path)))):
+        return None
+    if any(lms_v2.is_mssv_header(c) or 'masv' in str(c).lower() for row in head.rows for c in row):
+        return "có cột Mã SV nhưng không có cột điểm TBC (danh sách lớp / điểm danh?)"
+    return f"không có cột Mã SV trong {len(head.rows)} dòng đầu"
+
+PROJECTION = reader.Projection(max(lms.HEADER_SEARCH_ROWS, aq.HEADER_SEARCH_ROWS, lms_v2.HEADER_ROW + 1), pick_columns,
+                               reject=reject_reason)
+
+# ======================= XỬ LÝ 1 FILE ==========================
+
+def extract_file(path):
+    """Đọc file 1 lần, nhận dạng kiểu rồi xử lý bằng profile tương ứng; trả về (DataFrame theo COLUMNS hoặc None, các dòng log)."""
+    try:
+        sheet = reader.read_sheet_once(path, projection=PROJECTION)
+    except reader.NotGradeSheet as e:
+        return skip_file(path, e)
+    except Exception as e:
+        return None, [f"Bỏ qua {os.path.basename(path)}: lỗi đọc file ({e})."]
+    return extract_sheet(path, sheet)
+
+def skip_file(path, reason):
+    """Kết quả của file bị pre-scan bỏ (reader.NotGradeSheet): (None, dòng log lý do)."""
+    return None, [f"Bỏ qua {os.path.basename(path)}: {reason}"]
+
+def extract_sheet(path, sheet):
+    """Như extract_file nhưng trên file đã đọc sẵn (reader.read_sheet_once)."""
+    basename = os.path.basename(path)
+    with timing.stage("detect"):
+        # đã nhận dạng trên các dòng đầu lúc đọc file (pick_columns): bố cục là của profile đó, không dò lại
+        layout = sheet.layout
+        profile = _BY_NAME[layout.profile] if layout is not None else detect(path, sheet)
+    if profile is None:
+        return None, [f"Bỏ qua {basename}: không nhận dạng được kiểu file."]
+
+    temp, logs = profile.extract_sheet(path, sheet)
+    if temp is not None:
+        temp = temp.rename(columns=RENAME.get(profile.NAME, {}))
+        temp = temp[COLUMNS]
+    return temp, [f"{basename}: kiểu {profile.NAME}"] + logs
+
+def build_result(all_data):
+    """Ghép các bảng của từng file thành bảng kết quả."""
+    return compact.concat_parts(all_data)[COLUMNS]
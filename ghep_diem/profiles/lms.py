@@ -0,0 +1,245 @@
+"""Profile "lms": file LMS theo thư mục (Ghep_diem_LMS.py) - dò header 15 dòng đầu, mã môn/nhóm ở C5/C6 hoặc tên file."""
+import os
+import re
+from ghep_diem import compact, masv, reader
+
+NAME = "lms"
+COLUMNS = ['Mã SV', 'Mã môn học', 'Nhóm', 'Điểm TBC']
+
+# Bố cục file: header là dòng đầu tiên (trong 15 dòng) có chữ 'Mã SV'; mã môn/nhóm ở C5/C6, thiếu thì lấy từ tên file
+HEADER_MARKERS = ("mã sv",)
+HEADER_SEARCH_ROWS = 15
+
+# Các mẫu regex biên dịch sẵn (mỗi file dùng lại, không tra cache của re)
+_PAREN_RE = re.compile(r'\((.*?)\)')
+_TRAILING_GROUP_RE = re.compile(r'-\s*([A-Za-z0-9]+)\s*$')
+_SUBJECT_TOKEN_RE = re.compile(r'\b([A-Za-z]{2,}\d{2,})\b')
+_FILENAME_CODE_RE = re.compile(r'\((?:\d+-)?([A-Za-z0-9]+)-(\d+)\)', re.IGNORECASE)
+_FILENAME_TOKEN_RE = re.compile(r'([A-Za-z]{2,}\d{2,})[-_ ]+(\d{1,3})')
+
+# ======================= HỖ TRỢ LẤY HEADER / CỘT ==========================
+
+def read_excel_with_header_detect(sheet):
+    """Dựng bảng từ file đã đọc (reader.read_sheet_once), tự động tìm dòng chứa 'Mã SV' để làm header (15 dòng đầu)."""
+    return reader.frame_with_header_detect(sheet.rows, markers=HEADER_MARKERS, max_rows=HEADER_SEARCH_ROWS)
+
+def find_column(df, keywords):
+    """Tìm cột chứa 1 trong các keyword (không phân biệt hoa thường)."""
+    for c in df.columns:
+        c_low = str(c).lower()
+        for kw in keywords:
+            if kw in c_low:
+                return c
+    return None
+
+def find_tbc_dtp_column(df):
+    """Tìm chính xác cột TBC ĐTP (*) (ưu tiên cột chứa cả 'tbc' và 'đtp')."""
+    for c in df.columns:
+        c_low = str(c).lower().replace('\n', ' ')
+        if 'tbc' in c_low and 'đtp' in c_low:
+            return c
+    # một số file có dấu khác, thử tìm 'đtp' hoặc 'tbc' chứa 'đtp'
+    for c in df.columns:
+        c_low = str(c).lower().replace('\n', ' ')
+        if 'đtp' in c_low or 'tbc đtp' in c_low:
+            return c
+    return None
+
+def pick_columns(path, head):
+    """
+    Cho reader.read_sheet_once: dòng header và cột Mã SV / TBC ĐTP tìm trên các dòng đầu (như extract_sheet),
+    để các dòng sau chỉ đọc 2 cột đó. Không tìm được -> None (đọc cả sheet).
+    """
+    header_row = reader.locate_header_row(head.rows, HEADER_MARKERS, HEADER_SEARCH_ROWS)
+    if header_row is None:
+        return None
+    header = reader.header_frame(head.rows[header_row])
+    col_ma_sv = find_column(header, ['mã sv', 'masv'])
+    col_tbc = find_tbc_dtp_column(header)
+    if col_ma_sv is None or col_tbc is None:
+        return None
+    id_col = header.columns.get_loc(col_ma_sv)
+    return header_row, (id_col, header.columns.get_loc(col_tbc)), id_col
+
+def reject_reason(path, head):
+    """
+    Cho reader.read_sheet_once (pre-scan): lý do bỏ file nhận ra ngay trên các dòng đầu, hoặc None.
+    Cùng điều kiện với extract_sheet: dòng header (không có thì dòng đầu) thiếu cột Mã SV hoặc TBC ĐTP.
+    """
+    if not head.rows:
+        return "sheet trống"
+    header_row = reader.locate_header_row(head.rows, HEADER_MARKERS, HEADER_SEARCH_ROWS)
+    header = reader.header_frame(head.rows[header_row or 0])
+    if find_column(header, ['mã sv', 'masv']) is None:
+        return f"không có cột Mã SV trong {HEADER_SEARCH_ROWS} dòng đầu"
+    if find_tbc_dtp_column(header) is None:
+        return "có cột Mã SV nhưng không có cột TBC ĐTP (danh sách lớp / điểm danh?)"
+    return None
+
+PROJECTION = reader.Projection(HEADER_SEARCH_ROWS, pick_columns, NAME, reject_reason, HEADER_MARKERS)
+
+# ======================= HỖ TRỢ LẤY MÃ MÔN / NHÓM ==========================
+
+def extract_subject_group_from_cell(c5, c6):
+    """
+    Lấy text ô C5/C6 (đã đọc sẵn cùng bảng điểm), xử lý một vài dạng:
+    - "Tiếng Anh 1 (LCE315) - 06" -> subject=LCE315, group=06
+    - Có thể gặp "(251-LCE315-01)" -> subject=LCE315, group=01
+    """
+    try:
+        # thử C5 trước, nếu rỗng thử C6
+        raw = c5
+        if raw is None or str(raw).strip() == "":
+            raw = c6
+        if raw is None:
+            return None, None
+
+        text = str(raw).strip()
+
+        # 1) nếu có phần trong ngoặc dạng 251-LCE315-01 hoặc LCE315
+        paren = _PAREN_RE.search(text)
+        subject_code = None
+        group_code = None
+        if paren:
+            inside = paren.group(1).strip()
+            # nếu inside có dấu '-' phân tách như 251-LCE315-01
+            parts = inside.split('-')
+            if len(parts) >= 3:
+                # parts e.g. ['251','LCE315','01']
+                subject_code = parts[1].strip()
+                group_code = parts[2].strip()
+            elif len(parts) == 2:
+                # e.g. 'LCE315-01' hoặc '251-LCE315'
+                # nếu phần đầu là số, lấy phần sau làm subject (251-LCE315)
+                if parts[0].isdigit():
+                    subject_code = parts[1].strip()
+                else:
+                    subject_code = parts[0].strip()
+                    group_code = parts[1].strip()
+            else:
+                # chỉ có 1 phần trong ngoặc, có thể là LCE315
+                subject_code = inside.strip()
+
+        # 2) nếu không có ngoặc, thử tách pattern " - 06" ở cuối
+        if group_code is None:
+            gm = _TRAILING_GROUP_RE.search(text)
+            if gm:
+                group_code = gm.group(1).strip()
+
+        # 3) nếu subject_code vẫn None, tìm mã dạng LEX123 trong chuỗi
+        if subject_code is None:
+            sm = _SUBJECT_TOKEN_RE.search(text)
+            if sm:
+                subject_code = sm.group(1).strip()
+
+        return subject_code, group_code
+    except:
+        return None, None
+
+def extract_subject_group_from_filename(filename):
+    """
+    Tách mã môn + nhóm từ tên file nếu không tìm được trong file.
+    Ví dụ: "...(251-LCE315-01).xlsx" => LCE315, 01
+    """
+    base = os.path.basename(filename)
+    m = _FILENAME_CODE_RE.search(base)
+    if m:
+        return m.group(1), m.group(2)
+    # thử tìm pattern LCE315-01 không trong ngoặc
+    m2 = _FILENAME_TOKEN_RE.search(base)
+    if m2:
+        return m2.group(1), m2.group(2)
+    return None, None
+
+def extract_subject_group(file_path, sheet):
+    """Tổng hợp: thử cell trước, nếu ko có thử filename."""
+    sub, grp = extract_subject_group_from_cell(sheet.c5, sheet.c6)
+    if (sub is None or sub == "") or (grp is None or grp == ""):
+        # thử filename
+        fn_sub, fn_grp = extract_subject_group_from_filename(file_path)
+        if sub is None or sub == "":
+            sub = fn_sub
+        if grp is None or grp == "":
+            grp = fn_grp
+    # chuẩn hóa None -> ""
+    if sub is None:
+        sub = ""
+    if grp is None:
+        grp = ""
+    return sub, grp
+
+# ======================= XỬ LÝ 1 FILE ==========================
+
+def extract_file(path):
+    """
+    Xử lý 1 file: trả về DataFrame (Mã SV, Mã môn học, Nhóm, Điểm TBC) các dòng hợp lệ,
+    hoặc None nếu bỏ qua file, kèm các dòng log. Hàm ở mức module để chạy được trong process pool.
+    """
+    # mở file 1 lần: lấy luôn ô C5/C6 và bảng chính
+    try:
+        sheet = reader.read_sheet_once(path, projection=PROJECTION)
+    except reader.NotGradeSheet as e:
+        return skip_file(path, e)
+    except:
+        return None, []
+    return extract_sheet(path, sheet)
+
+def skip_file(path, reason):
+    """Kết quả của file bị pre-scan bỏ (reader.NotGradeSheet): (None, dòng log lý do)."""
+    return None, [f"Bỏ qua {os.path.basename(path)}: {reason}"]
+
+def extract_sheet(path, sheet):
+    """Như extract_file nhưng trên file đã đọc sẵn (reader.read_sheet_once)."""
+    logs = []
+    # lấy subject & group (cell trước, filename sau)
+    subject_code, group_code = extract_subject_group(path, sheet)
+
+    # bố cục đã dò lúc đọc file (pick_columns / cache bố cục): không dò lại header và cột
+    layout = reader.sheet_layout(sheet, NAME)
+
+    # dựng bảng chính
+    try:
+        if layout is not None:
+            df = reader.frame_from_rows(sheet.rows, layout.header_row)
+        else:
+            df = read_excel_with_header_detect(sheet)
+    except:
+        return None, logs
+
+    # tìm cột Mã SV và cột TBC ĐTP
+    if layout is not None:
+        col_ma_sv, col_tbc = reader.layout_columns(df, layout)
+    else:
+        col_ma_sv = find_column(df, ['mã sv', 'masv'])
+        col_tbc = find_tbc_dtp_column(df)
+
+    if col_ma_sv is None or col_tbc is None:
+        # không đủ thông tin để lấy dữ liệu -> bỏ qua file
+        return None, logs
+
+    try:
+        temp = df[[col_ma_sv, col_tbc]].copy()
+    except:
+        return None, logs
+
+    # lọc: chỉ dòng có khả năng là SV thật
+    temp = temp[masv.probably_masv_mask(temp[col_ma_sv])]
+    # thêm cột thông tin môn & nhóm, đảm bảo có kiểu str
+    temp = temp.copy()
+    temp.rename(columns={col_ma_sv: 'Mã SV', col_tbc: 'Điểm TBC'}, inplace=True)
+    temp['Mã môn học'] = str(subject_code) if subject_code is not None else ""
+    temp['Nhóm'] = str(group_code) if group_code is not None else ""
+    # đưa cột theo thứ tự mong muốn
+    cols_order = ['Mã SV', 'Mã môn học', 'Nhóm', 'Điểm TBC']
+    # nếu có các cột khác thì giữ nguyên sau đó
+    temp = temp[[c for c in cols_order if c in temp.columns] + [c for c in temp.columns if c not in cols_order]]
+
+    # mã môn / nhóm / Mã SV lặp lại nhiều dòng -> category (xem ghep_diem.compact)
+    return compact.compact_frame(temp), logs
+
+def build_result(all_data):
+    """Ghép các bảng của từng file thành bảng kết quả."""
+    result = compact.concat_parts(all_data)
+    # đảm bảo thứ tự final
+    final_cols = [c for c in COLUMNS if c in result.columns] + [c for c in result.columns if c not in COLUMNS]
+    return result[final_cols]
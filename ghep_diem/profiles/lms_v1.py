@@ -0,0 +1,148 @@
+"""Profile "lms_v1": file LMS chọn lẻ (gop_LMS_v1.py) - header dòng 8, điểm lấy ở cột L."""
+import os
+import re
+import pandas as pd
+from ghep_diem import compact, masv, reader
+
+NAME = "lms_v1"
+COLUMNS = ['MSSV', 'Mã môn học', 'Mã nhóm', 'Điểm trung bình cộng']
+
+# Bố cục file: header cố định ở dòng 8 (index 7), điểm ở cột L (index 11), mã môn/nhóm từ tên file
+HEADER_ROW = 7
+SCORE_COLUMN_INDEX = 11
+
+# Các mẫu regex biên dịch sẵn (mỗi file dùng lại, không tra cache của re)
+_TERM_CODE_GROUP_RE = re.compile(r"\((\d+)-([A-Z0-9]+)-(\d+)\)")
+_SUBJECT_TOKEN_RE = re.compile(r"([A-Z]{2,}\d{2,})")
+
+# ---------- Cấu hình / helper ----------
+def extract_info_from_filename(filename):
+    """Lấy mã môn học và mã nhóm từ tên file dạng: (251-CPS201-07)"""
+    match = _TERM_CODE_GROUP_RE.search(filename.upper())
+    if match:
+        return match.group(2), match.group(3)
+    # fallback: tìm token kiểu CPS201 trong tên file
+    match2 = _SUBJECT_TOKEN_RE.search(filename.upper())
+    if match2:
+        return match2.group(1), ''
+    return '', ''
+
+def find_mssv_column(df):
+    """Tìm cột MSSV (dựa vào tiêu đề)"""
+    for c in df.columns:
+        cs = str(c).upper()
+        if ("MÃ" in cs and "SINH" in cs) or "MSSV" in cs or "MÃ SV" in cs or "MÃSINH" in cs:
+            return c
+    return None
+
+def find_score_column(df):
+    """Cột điểm theo tên (chứa 'TBC' hoặc 'ĐIỂM'), dùng khi bảng không đủ tới cột L"""
+    for c in df.columns:
+        cs = str(c).upper()
+        if "TBC" in cs or "TBC ĐTP" in cs or "TỔNG" in cs or "ĐIỂM TRUNG" in cs or "ĐIỂM" in cs:
+            return c
+    return None
+
+def pick_columns(p, head):
+    """
+    Cho reader.read_sheet_once: cột MSSV và cột L ở dòng header, để các dòng sau chỉ đọc 2 cột đó.
+    Các dòng đầu chưa đủ tới cột L (bảng có thể rộng hơn ở dưới) hoặc không có cột MSSV -> None (đọc cả sheet).
+    """
+    if len(head.rows) <= HEADER_ROW or len(head.rows[HEADER_ROW]) <= SCORE_COLUMN_INDEX:
+        return None
+    header = reader.header_frame(head.rows[HEADER_ROW])
+    mssv_col = find_mssv_column(header)
+    if mssv_col is None:
+        return None
+    id_col = header.columns.get_loc(mssv_col)
+    return HEADER_ROW, (id_col, SCORE_COLUMN_INDEX), id_col
+
+def reject_reason(p, head):
+    """
+    Cho reader.read_sheet_once (pre-scan): dòng header không có cột MSSV (như extract_sheet) -> lý do, không thì None.
+    Thiếu cột điểm thì chưa kết luận được: cột L có thể chỉ có ở các dòng dưới.
+    """
+    if len(head.rows) <= HEADER_ROW:
+        return f"chỉ có {len(head.rows)} dòng, không có dòng tiêu đề {HEADER_ROW + 1}"
+    if find_mssv_column(reader.header_frame(head.rows[HEADER_ROW])) is None:
+        return f"dòng {HEADER_ROW + 1} không có cột MSSV"
+    return None
+
+PROJECTION = reader.Projection(HEADER_ROW + 1, pick_columns, NAME, reject_reason)
+
+# ---------- Xử lý file ----------
+def extract_file(p):
+    """
+    Xử lý 1 file, trả về (DataFrame hợp lệ hoặc None, các dòng log).
+    Log được gom lại để in theo đúng thứ tự file khi chạy song song.
+    """
+    try:
+        sheet = reader.read_sheet_once(p, projection=PROJECTION)
+    except reader.NotGradeSheet as e:
+        return skip_file(p, e)
+    except Exception as e:
+        return None, [f">>> Xử lý file: {os.path.basename(p)}", f"  Lỗi đọc file: {e}"]
+    return extract_sheet(p, sheet)
+
+def skip_file(p, reason):
+    """Kết quả của file bị pre-scan bỏ (reader.NotGradeSheet): (None, các dòng log lý do)."""
+    return None, [f">>> Xử lý file: {os.path.basename(p)}", f"  ❌ Bỏ qua: {reason}"]
+
+def extract_sheet(p, sheet):
+    """Như extract_file nhưng trên file đã đọc sẵn (reader.read_sheet_once)."""
+    logs = []
+    log_func = logs.append
+    basename = os.path.basename(p)
+    log_func(f">>> Xử lý file: {basename}")
+    ma_mon, ma_nhom = extract_info_from_filename(basename)
+    try:
+        # header=7 => dùng dòng 8 làm tiêu đề (user nói dòng 8); cùng kết quả với pd.read_excel(p, header=7)
+        df = reader.frame_from_rows(sheet.rows, HEADER_ROW)
+    except Exception as e:
+        log_func(f"  Lỗi đọc file: {e}")
+        return None, logs
+
+    # Tìm cột MSSV (dựa vào tiêu đề); bố cục đã dò lúc đọc file (pick_columns / cache bố cục) thì không dò lại
+    layout = reader.sheet_layout(sheet, NAME)
+    mssv_col = df.columns[layout.id_col] if layout is not None else find_mssv_column(df)
+    if mssv_col is None:
+        log_func("  ❌ Không tìm thấy cột MSSV theo tên. Bỏ file này.")
+        return None, logs
+
+    # Lấy điểm từ cột L (index 11) nếu có, ngược lại fallback tìm theo tên chứa 'TBC' hoặc 'ĐIỂM'
+    if df.shape[1] > SCORE_COLUMN_INDEX:
+        tbc_series = df.iloc[:, SCORE_COLUMN_INDEX]   # cột L
+        tbc_col_header = df.columns[SCORE_COLUMN_INDEX]
+        log_func(f"  Lấy điểm từ cột L (header: '{tbc_col_header}').")
+    else:
+        # fallback: tìm bằng tên cột
+        tbc_col_header = find_score_column(df)
+        if tbc_col_header is None:
+            log_func("  ❌ Không tìm thấy cột điểm (cột L và không có cột theo tên). Bỏ file này.")
+            return None, logs
+        tbc_series = df[tbc_col_header]
+        log_func(f"  Lấy điểm từ cột theo tên: '{tbc_col_header}'.")
+
+    # Tạo DataFrame tạm
+    temp = pd.DataFrame()
+    temp['MSSV'] = masv.format_mssv_series(df[mssv_col])
+    # convert điểm numeric (nếu dạng text hay có dấu) -> numeric, lỗi -> NaN
+    temp['Điểm trung bình cộng'] = pd.to_numeric(tbc_series, errors='coerce')
+    temp['Mã môn học'] = ma_mon
+    temp['Mã nhóm'] = ma_nhom
+
+    # Lọc: MSSV không rỗng, điểm không rỗng
+    before = len(temp)
+    temp = temp[temp['MSSV'].notna()]
+    temp = temp[temp['MSSV'].str.replace(r'\s+', '', regex=True) != '']
+    temp = temp[temp['Điểm trung bình cộng'].notna()]
+    after = len(temp)
+
+    log_func(f"  Dòng trước lọc: {before}, sau lọc hợp lệ: {after}")
+    # mã môn / nhóm / MSSV lặp lại nhiều dòng -> category (xem ghep_diem.compact)
+    return (compact.compact_frame(temp) if after > 0 else None), logs
+
+def build_result(all_parts):
+    merged = compact.concat_parts(all_parts)
+    # Sắp cột cho dễ nhìn
+    return merged[COLUMNS]
@@ -0,0 +1,161 @@
+"""Profile "lms_v2": file LMS chọn lẻ (Ghep_Diem_LMS_V2.py) - header dòng 8, mã môn/nhóm từ tên file "(MUE249 - 01)" / "(251-CPS201-07)"."""
+import os
+import re
+import pandas as pd
+from ghep_diem import compact, masv, reader
+
+NAME = "lms_v2"
+COLUMNS = ['MSSV', 'Mã môn học', 'Mã nhóm', 'Điểm trung bình cộng']
+
+# Bố cục file: header cố định ở dòng 8 (index 7), mã môn/nhóm chỉ lấy từ tên file
+HEADER_ROW = 7
+
+# Các mẫu regex biên dịch sẵn (mỗi file dùng lại, không tra cache của re)
+_CODE_GROUP_RE = re.compile(r"\(([A-Z0-9]+)\s*-\s*(\d+)\)")
+_TERM_CODE_GROUP_RE = re.compile(r"\(\d+\-([A-Z0-9]+)\-(\d+)\)")
+
+def extract_info_from_filename(filename):
+    """
+    Lấy mã môn học và mã nhóm từ tên file có thể dạng:
+    - Tin học đại cương - Nhóm 07(251-CPS201-07)
+    - Tổ chức sự kiện (Âm nhạc) (MUE249 - 01)
+    """
+    fn = filename.upper()
+
+    # Trường hợp kiểu (MUE249 - 01)
+    m = _CODE_GROUP_RE.findall(fn)
+    if m:
+        # lấy cặp cuối cùng vì có thể có nhiều
+        ma_mon, ma_nhom = m[-1]
+        return ma_mon, ma_nhom
+
+    # Trường hợp kiểu (251-CPS201-07)
+    m2 = _TERM_CODE_GROUP_RE.findall(fn)
+    if m2:
+        ma_mon, ma_nhom = m2[-1]
+        return ma_mon, ma_nhom
+
+    # fallback
+    return '', ''
+
+def is_mssv_header(c):
+    """Tiêu đề cột có phải cột MSSV không (Mã sinh viên / MSSV / Mã SV)."""
+    cs = str(c).upper()
+    return ("MÃ" in cs and "SINH" in cs) or "MSSV" in cs or "MÃ SV" in cs or "MÃSINH" in cs
+
+def find_mssv_column(df):
+    for c in df.columns:
+        if is_mssv_header(c):
+            return c
+    return None
+
+def find_tbc_column(df):
+    """Cột TBC ĐTP (*), không có thì cột đầu tiên có chữ TBC."""
+    for c in df.columns:
+        cs = str(c).upper().replace(" ", "")
+        if "TBC" in cs and "ĐTP" in cs:
+            return c
+    # fallback chỉ có TBC
+    for c in df.columns:
+        cs = str(c).upper()
+        if "TBC" in cs:
+            return c
+    return None
+
+def pick_columns(p, head):
+    """Cho reader.read_sheet_once: cột MSSV / TBC ở dòng header (như extract_sheet), thiếu -> None (đọc cả sheet)."""
+    if len(head.rows) <= HEADER_ROW:
+        return None
+    header = reader.header_frame(head.rows[HEADER_ROW])
+    mssv_col = find_mssv_column(header)
+    tbc_col = find_tbc_column(header)
+    if mssv_col is None or tbc_col is None:
+        return None
+    id_col = header.columns.get_loc(mssv_col)
+    return HEADER_ROW, (id_col, header.columns.get_loc(tbc_col)), id_col
+
+def reject_reason(p, head):
+    """Cho reader.read_sheet_once (pre-scan): dòng header thiếu cột MSSV / TBC (như extract_sheet) -> lý do, không thì None."""
+    if len(head.rows) <= HEADER_ROW:
+        return f"chỉ có {len(head.rows)} dòng, không có dòng tiêu đề {HEADER_ROW + 1}"
+    header = reader.header_frame(head.rows[HEADER_ROW])
+    if find_mssv_column(header) is None:
+        return f"dòng {HEADER_ROW + 1} không có cột MSSV"
+    if find_tbc_column(header) is None:
+        return f"dòng {HEADER_ROW + 1} có cột MSSV nhưng không có cột TBC (danh sách lớp / điểm danh?)"
+    return None
+
+PROJECTION = reader.Projection(HEADER_ROW + 1, pick_columns, NAME, reject_reason)
+
+def extract_file(p):
+    """
+    Xử lý 1 file, trả về (DataFrame hợp lệ hoặc None, các dòng log).
+    Log được gom lại để in theo đúng thứ tự file khi chạy song song.
+    """
+    try:
+        sheet = reader.read_sheet_once(p, projection=PROJECTION)
+    except reader.NotGradeSheet as e:
+        return skip_file(p, e)
+    except Exception as e:
+        return None, [f">>> Xử lý file: {os.path.basename(p)}", f"  Lỗi đọc file: {e}"]
+    return extract_sheet(p, sheet)
+
+def skip_file(p, reason):
+    """Kết quả của file bị pre-scan bỏ (reader.NotGradeSheet): (None, các dòng log lý do)."""
+    return None, [f">>> Xử lý file: {os.path.basename(p)}", f"  ❌ Bỏ qua: {reason}"]
+
+def extract_sheet(p, sheet):
+    """Như extract_file nhưng trên file đã đọc sẵn (reader.read_sheet_once)."""
+    logs = []
+    log_func = logs.append
+    basename = os.path.basename(p)
+    log_func(f">>> Xử lý file: {basename}")
+    ma_mon, ma_nhom = extract_info_from_filename(basename)
+    try:
+        # cùng kết quả với pd.read_excel(p, header=7) nhưng không mở lại file
+        df = reader.frame_from_rows(sheet.rows, HEADER_ROW)
+    except Exception as e:
+        log_func(f"  Lỗi đọc file: {e}")
+        return None, logs
+
+    # bố cục đã dò lúc đọc file (pick_columns / cache bố cục): không dò lại cột
+    layout = reader.sheet_layout(sheet, NAME)
+    if layout is not None:
+        mssv_col, tbc_col = reader.layout_columns(df, layout)
+    else:
+        mssv_col = find_mssv_column(df)
+        tbc_col = find_tbc_column(df)
+
+    # Tìm cột MSSV
+    if mssv_col is None:
+        log_func("  ❌ Không tìm thấy cột MSSV.")
+        return None, logs
+
+    # Tìm cột TBC ĐTP (*)
+    if tbc_col is None:
+        log_func("  ❌ Không tìm thấy cột TBC ĐTP.")
+        return None, logs
+
+    log_func(f"  Lấy điểm từ cột: '{tbc_col}'")
+
+    temp = pd.DataFrame()
+    temp['MSSV'] = masv.format_mssv_series(df[mssv_col])
+    temp['Điểm trung bình cộng'] = pd.to_numeric(df[tbc_col], errors='coerce')
+    temp['Mã môn học'] = ma_mon
+    temp['Mã nhóm'] = ma_nhom
+
+    # Lọc bỏ dòng trống
+    before = len(temp)
+    temp = temp[temp['MSSV'].notna()]
+    temp = temp[temp['MSSV'].str.replace(r'\s+', '', regex=True) != '']
+    temp = temp[temp['Điểm trung bình cộng'].notna()]
+    after = len(temp)
+
+    log_func(f"  Dòng trước lọc: {before}, sau lọc hợp lệ: {after}")
+    # mã môn / nhóm / MSSV lặp lại nhiều dòng -> category (xem ghep_diem.compact)
+    return (compact.compact_frame(temp) if after > 0 else None), logs
+
+def build_result(all_parts):
+    merged = compact.concat_parts(all_parts)
+    # Sắp cột cho dễ nhìn
+    return merged[COLUMNS]
@@ -0,0 +1,457 @@
+import datetime
+import functools
+import hashlib
+import importlib.util
+import io
+import math
+import os
+import re
+import zipfile
+from collections import namedtuple
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from ghep_diem import cache, sources, timing
+
+# ======================= ĐỌC FILE 1 LẦN ==========================
+
+# Kết quả 1 lần đọc file: giá trị ô C5, C6 (của sheet active) và các dòng dữ liệu
+# của sheet đầu tiên (list of list, ô trống -> "", như dữ liệu pandas đưa vào TextParser);
+# layout: bố cục (Layout) profile đã dò trên các dòng đầu khi đọc bớt, None nếu không dò
+SheetData = namedtuple("SheetData", ["c5", "c6", "rows", "layout"], defaults=(None,))
+
+def _convert_cell(cell):
+    """Chuyển giá trị ô openpyxl giống pandas (ô trống -> "", 12.0 -> 12, lỗi -> NaN)."""
+    from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+    if cell.value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return float("nan")
+    if cell.data_type == TYPE_NUMERIC:
+        val = int(cell.value)
+        if val == cell.value:
+            return val
+        return float(cell.value)
+    return cell.value
+
+def _normalize_rows(rows):
+    """Bỏ các dòng trống ở cuối và kéo các dòng về cùng độ rộng (như pandas)."""
+    last = len(rows) - 1
+    while last >= 0 and not rows[last]:
+        last -= 1
+    rows = rows[:last + 1]
+    if rows:
+        width = max(len(r) for r in rows)
+        rows = [r + [""] * (width - len(r)) if len(r) < width else r for r in rows]
+    return rows
+
+def _cell_at(rows, r, c):
+    """Lấy giá trị ô (r, c) (đánh số từ 0) trong rows, không có -> None."""
+    if r < len(rows) and c < len(rows[r]) and rows[r][c] != "":
+        return rows[r][c]
+    return None
+
+# ======================= ENGINE ĐỌC FILE ==========================
+
+# engine đọc file: "auto" chọn theo loại file, hoặc ép 1 engine (vd. để so sánh); biến môi trường
+# được tiến trình con kế thừa nên dùng được với process pool (cli --reader đặt biến này)
+ENGINE_ENV = "GHEP_DIEM_READER"
+ENGINES = ("auto", "calamine", "openpyxl", "xlrd")
+
+# loại file (theo nội dung, không theo đuôi) -> các engine thử lần lượt;
+# calamine (python-calamine, viết bằng Rust) nhanh hơn nhiều nhưng không bắt buộc cài
+ENGINE_ORDER = {
+    "xlsx": ("calamine", "openpyxl"),
+    "xls": ("calamine", "xlrd"),
+}
+
+# module cần cho từng engine
+_ENGINE_MODULES = {"calamine": "python_calamine", "openpyxl": "openpyxl", "xlrd": "xlrd"}
+
+# đuôi file openpyxl chịu mở theo đường dẫn
+_OPENPYXL_EXTS = (".xlsx", ".xlsm", ".xltx", ".xltm")
+
+# chữ ký đầu file: xlsx là file ZIP, xls (Excel 97-2003) là file OLE2
+_SIGNATURES = ((b"PK\x03\x04", "xlsx"), (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "xls"))
+
+@functools.lru_cache(maxsize=None)
+def engine_available(name):
+    return importlib.util.find_spec(_ENGINE_MODULES[name]) is not None
+
+def file_kind(src, file_path):
+    """'xlsx' / 'xls' theo 8 byte đầu của src (đường dẫn hoặc BytesIO, xem sources.open_binary); không rõ -> theo đuôi."""
+    if isinstance(src, io.BytesIO):
+        with src.getbuffer() as buf:
+            head = bytes(buf[:8])
+    else:
+        with open(src, "rb") as f:
+            head = f.read(8)
+    for magic, kind in _SIGNATURES:
+        if head.startswith(magic):
+            return kind
+    return "xls" if os.path.splitext(file_path)[1].lower() == ".xls" else "xlsx"
+
+def pick_engine(kind, engine=None):
+    """
+    Engine đọc file loại kind: engine được chọn (tham số hoặc biến môi trường ENGINE_ENV) nếu đã cài
+    và đọc được loại file này, không thì engine đầu tiên đã cài trong ENGINE_ORDER[kind].
+    """
+    engine = engine or os.environ.get(ENGINE_ENV) or "auto"
+    if engine not in ENGINES:
+        raise ValueError(f"Engine đọc file không hỗ trợ: {engine} (chỉ có {', '.join(ENGINES)})")
+    order = ENGINE_ORDER[kind]
+    for name in ((engine,) if engine in order else ()) + order:
+        if engine_available(name):
+            return name
+    raise ImportError(f"Đọc file .{kind} cần cài thêm "
+                      + " hoặc ".join(_ENGINE_MODULES[n].replace("_", "-") for n in order)
+                      + f" (pip install {_ENGINE_MODULES[order[-1]]}).")
+
+# ======================= ĐỌC FILE 1 LẦN ==========================
+
+def read_sheet_once(file_path, engine=None, projection=None):
+    """
+    Mở workbook đúng 1 lần và trả về SheetData: ô C5/C6 để lấy mã môn/nhóm và toàn bộ dòng của bảng điểm.
+    Engine chọn theo loại file (pick_engine): calamine nếu đã cài, không thì openpyxl (xlsx) / xlrd (xls);
+    mọi engine cho cùng giá trị ô. File trong ZIP ('x.zip::/tên.xlsx') đọc từ bộ nhớ.
+    projection (Projection của profile): chỉ lấy giá trị các cột cần dùng, dừng ở cuối bảng điểm.
+    Mọi engine duyệt sheet từng dòng qua _collect_rows nên đọc bớt / pre-scan áp dụng như nhau.
+    """
+    src = sources.open_binary(file_path)
+    kind = file_kind(src, file_path)
+    name = pick_engine(kind, engine)
+    if name == "calamine":
+        return _read_calamine(src, kind, file_path, projection)
+    if name == "xlrd":
+        return _read_xlrd(src, file_path, projection)
+    if isinstance(src, str) and os.path.splitext(src)[1].lower() not in _OPENPYXL_EXTS:
+        # file xlsx bị đặt đuôi khác (vd. .xls): openpyxl từ chối theo đuôi nên đọc qua bộ nhớ
+        src = io.BytesIO(sources.read_bytes(src))
+    return _read_openpyxl(src, file_path, projection)
+
+def _read_openpyxl(src, file_path, projection):
+    """openpyxl read-only, duyệt tuần tự: không load style, không giải nén file lần thứ 2."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(src, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb.worksheets[0]
+        active = wb.active
+        active_c56 = None
+        if active is not None and active is not ws:
+            # sheet active khác sheet đầu: đọc riêng 2 ô (chỉ parse tới dòng 6)
+            active.reset_dimensions()
+            cells = [row[0] for row in active.iter_rows(min_row=5, max_row=6, min_col=3, max_col=3, values_only=True)]
+            active_c56 = tuple((cells + [None, None])[:2])
+        ws.reset_dimensions()
+        c56 = [None, None]
+
+        def raw_rows():
+            for n, row in enumerate(ws.rows):
+                # C5 / C6: dòng 5, 6 (index 4, 5), cột C (index 2) -> lấy luôn trong lượt duyệt
+                if n in (4, 5) and len(row) > 2:
+                    c56[n - 4] = row[2].value
+                yield row
+
+        rows, layout = _collect_rows(raw_rows(), _convert_cell, _cell_value, file_path, projection, active_c56)
+    finally:
+        wb.close()
+    c5, c6 = active_c56 or c56
+    return SheetData(c5, c6, _normalize_rows(rows), layout)
+
+def _cell_value(cell):
+    return cell.value
+
+def _convert_value(value):
+    """Giá trị ô calamine -> như _convert_cell (12.0 -> 12, ngày -> datetime như openpyxl)."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+        return datetime.datetime(value.year, value.month, value.day)
+    return value
+
+def _active_sheet(src):
+    """Vị trí sheet active của file xlsx (activeTab trong xl/workbook.xml), không có -> 0."""
+    try:
+        with zipfile.ZipFile(src) as zf:
+            m = re.search(rb'activeTab="(\d+)"', zf.read("xl/workbook.xml"))
+    except (KeyError, zipfile.BadZipFile):
+        return 0
+    finally:
+        if isinstance(src, io.BytesIO):
+            src.seek(0)
+    return int(m.group(1)) if m else 0
+
+def _calamine_rows(sheet):
+    """
+    Các dòng của sheet calamine, đổi sang giá trị Python lần lượt từng dòng (iter_rows) thay vì cả sheet (to_python).
+    iter_rows đã kể các dòng trống đầu sheet nhưng bỏ các cột trống bên trái: thêm lại để giữ đúng vị trí cột.
+    """
+    start = sheet.start
+    pad = [""] * start[1] if start else []
+    for row in sheet.iter_rows():
+        yield pad + row if pad else row
+
+def _read_calamine(src, kind, file_path, projection):
+    """
+    python-calamine: mã Rust parse cả sheet đầu khi mở sheet (python-calamine không đọc tuần tự được),
+    còn giá trị ô chỉ đổi sang Python khi duyệt tới dòng đó, nên đọc bớt / pre-scan bỏ được phần đổi giá trị.
+    Giữ nguyên vị trí dòng/cột (không bỏ vùng trống đầu sheet).
+    """
+    from python_calamine import CalamineWorkbook
+
+    active = _active_sheet(src) if kind == "xlsx" else 0
+    if isinstance(src, io.BytesIO):
+        wb = CalamineWorkbook.from_filelike(src)
+    else:
+        with open(src, "rb") as f:
+            wb = CalamineWorkbook.from_filelike(f)
+    active_c56 = None
+    if active:
+        # sheet active khác sheet đầu: chỉ đọc tới dòng 6
+        head = wb.get_sheet_by_index(active).to_python(skip_empty_area=False, nrows=6)
+        head = [[_convert_value(v) for v in row] for row in head]
+        active_c56 = (_cell_at(head, 4, 2), _cell_at(head, 5, 2))
+    raw_rows = _calamine_rows(wb.get_sheet_by_index(0))
+    rows, layout = _collect_rows(raw_rows, _convert_value, _same, file_path, projection, active_c56)
+    rows = _normalize_rows(rows)
+    c5, c6 = active_c56 or (_cell_at(rows, 4, 2), _cell_at(rows, 5, 2))
+    return SheetData(c5, c6, rows, layout)
+
+def _same(value):
+    return value
+
+def _read_xlrd(src, file_path, projection):
+    """
+    xlrd (file .xls khi không có python-calamine): xlrd parse cả sheet khi mở sheet, giá trị ô đổi lần lượt từng dòng
+    (như pandas đổi ô xlrd: ngày -> datetime, 12.0 -> 12, lỗi -> NaN). C5/C6 lấy ở sheet đầu.
+    """
+    import xlrd
+
+    if isinstance(src, io.BytesIO):
+        book = xlrd.open_workbook(file_contents=src.getvalue(), on_demand=True, ragged_rows=True)
+    else:
+        book = xlrd.open_workbook(src, on_demand=True, ragged_rows=True)
+    try:
+        ws = book.sheet_by_index(0)
+        convert = functools.partial(_convert_xlrd_cell, book.datemode)
+        raw_rows = (ws.row(i) for i in range(ws.nrows))
+        rows, layout = _collect_rows(raw_rows, convert, _cell_value, file_path, projection)
+    finally:
+        book.release_resources()
+    rows = _normalize_rows(rows)
+    return SheetData(_cell_at(rows, 4, 2), _cell_at(rows, 5, 2), rows, layout)
+
+def _convert_xlrd_cell(datemode, cell):
+    """Giá trị ô xlrd -> như pandas (pandas.io.excel._xlrd): ngày -> datetime (ngày gốc -> time), 12.0 -> 12, lỗi -> NaN."""
+    from xlrd import XL_CELL_BOOLEAN, XL_CELL_DATE, XL_CELL_ERROR, XL_CELL_NUMBER, xldate
+
+    value = cell.value
+    if cell.ctype == XL_CELL_NUMBER:
+        if math.isfinite(value) and value == int(value):
+            return int(value)
+        return value
+    if cell.ctype == XL_CELL_DATE:
+        try:
+            value = xldate.xldate_as_datetime(value, datemode)
+        except OverflowError:
+            return value
+        if value.timetuple()[:3] == ((1904, 1, 1) if datemode else (1899, 12, 31)):
+            return datetime.time(value.hour, value.minute, value.second, value.microsecond)
+        return value
+    if cell.ctype == XL_CELL_ERROR:
+        return float("nan")
+    if cell.ctype == XL_CELL_BOOLEAN:
+        return bool(value)
+    return value
+
+# ======================= ĐỌC BỚT CỘT / DÒNG ==========================
+
+# Khai báo của profile để đọc bớt: đọc đủ search_rows dòng đầu, rồi pick(đường dẫn, SheetData các dòng đầu)
+# trả (dòng header, các cột cần dùng (cột Mã SV, cột điểm), cột Mã SV) hoặc None (đọc cả sheet như thường);
+# name: tên profile, namespace trong cache bố cục (pick_layout); None -> không dùng cache, pick tự trả Layout
+# (profile "auto" gọi pick_layout của profile nhận dạng được);
+# reject(đường dẫn, SheetData các dòng đầu): khi pick trả None, lý do file chắc chắn không phải bảng điểm
+# (profile sẽ bỏ file đó dù đọc cả sheet) -> dừng đọc, NotGradeSheet; None -> đọc cả sheet;
+# markers: header là dòng đầu tiên (trong search_rows dòng) có 1 trong các markers (locate_header_row),
+# None -> header ở dòng cố định
+Projection = namedtuple("Projection", ["search_rows", "pick", "name", "reject", "markers"], defaults=(None, None, None))
+
+# Kết quả dò bố cục của profile (pick_layout): tên profile, dòng header, các cột cần dùng, cột Mã SV
+Layout = namedtuple("Layout", ["profile", "header_row", "columns", "id_col"])
+
+class NotGradeSheet(ValueError):
+    """File không phải bảng điểm (danh sách lớp, điểm danh, ghi chú...), nhận ra trên các dòng đầu; str(e) là lý do."""
+
+# dòng cuối bảng điểm (tổng số SV, điều kiện dự thi, chữ ký CBGD): không còn dòng SV nào sau đó
+FOOTER_MARKERS = ("số sv", "cbgd", "điều kiện")
+
+def _is_footer(raw, id_col, value_of):
+    """Ô Mã SV trống hoặc là chữ, và có ô chữ bắt đầu bằng 1 trong FOOTER_MARKERS."""
+    first = value_of(raw[id_col]) if id_col < len(raw) else None
+    if first is not None and first != "" and not isinstance(first, str):
+        return False
+    for cell in raw:
+        v = value_of(cell)
+        if isinstance(v, str) and v.lstrip().lower().startswith(FOOTER_MARKERS):
+            return True
+    return False
+
+def _collect_rows(raw_rows, convert, value_of, file_path, projection, active_c56=None):
+    """
+    Đổi các dòng thô (ô openpyxl / giá trị calamine) thành dòng giá trị như pandas, bỏ ô trống ở cuối dòng;
+    trả về (các dòng, Layout profile dò được hoặc None).
+    convert: ô thô -> giá trị; value_of: ô thô -> giá trị gốc (để dò dòng cuối bảng).
+    projection: sau projection.search_rows dòng đầu, nếu pick chọn được cột thì từ đó chỉ đổi giá trị
+    các cột đó (ô khác để trống, bảng vẫn đủ cột như cũ) cho tới dòng cuối bảng (FOOTER_MARKERS);
+    không chọn được mà projection.reject cho biết file không phải bảng điểm thì dừng luôn (NotGradeSheet).
+    Từ dòng cuối bảng trở đi (vài dòng ghi chú / chữ ký) đọc đủ mọi ô: các ô đó (vd. 'Điều kiện dự thi' nằm
+    trong cột Mã SV) quyết định kiểu pandas suy ra cho cả cột, bỏ đi thì '0012300' thành số 12300.
+    """
+    rows = []
+    layout = None
+    # các cột giữ lại (None: đọc đủ mọi cột), cột Mã SV, độ rộng dòng tối đa cần đọc
+    keep = None
+    id_col = width = 0
+    for raw in raw_rows:
+        if keep is not None and _is_footer(raw, id_col, value_of):
+            keep = None
+        if keep is not None:
+            row = [""] * min(len(raw), width)
+            for j in keep:
+                if j < len(raw):
+                    row[j] = convert(raw[j])
+        else:
+            row = [convert(cell) for cell in raw]
+        while row and row[-1] == "":
+            row.pop()
+        rows.append(row)
+        if projection is not None and keep is None and len(rows) == projection.search_rows:
+            head = _normalize_rows(list(rows))
+            c5, c6 = active_c56 or (_cell_at(head, 4, 2), _cell_at(head, 5, 2))
+            layout = pick_layout(projection, file_path, SheetData(c5, c6, head))
+            if layout is None:
+                _check_grade_sheet(projection, file_path, SheetData(c5, c6, head))
+            else:
+                keep, id_col = layout.columns, layout.id_col
+                width = max(keep) + 1
+                # dòng cuối bảng đã nằm trong các dòng đầu: phần còn lại đọc đủ
+                if any(_is_footer(r, id_col, _same) for r in rows[layout.header_row + 1:]):
+                    keep = None
+            projection = None
+    if projection is not None:
+        # sheet ngắn hơn search_rows dòng: đã đọc hết, chỉ còn báo lý do nếu không phải bảng điểm
+        head = _normalize_rows(list(rows))
+        c5, c6 = active_c56 or (_cell_at(head, 4, 2), _cell_at(head, 5, 2))
+        _check_grade_sheet(projection, file_path, SheetData(c5, c6, head))
+    return rows, layout
+
+def _check_grade_sheet(projection, file_path, head):
+    """Pre-scan: projection.reject trên các dòng đầu trả lý do -> NotGradeSheet (không đọc tiếp phần còn lại)."""
+    if projection.reject is None:
+        return
+    reason = projection.reject(file_path, head)
+    if reason:
+        raise NotGradeSheet(reason)
+
+def _cell_kind(value):
+    if value == "":
+        return "-"
+    return "s" if isinstance(value, str) else "n"
+
+def layout_fingerprint(rows, header_row):
+    """
+    Dấu vân tay bố cục 1 mẫu file: ô nào có chữ / có số ở các dòng trên header (tiêu đề, tên môn... đổi theo file
+    nhưng vị trí thì không) và nguyên văn dòng header. Cùng dấu vân tay -> dò header / cột ra cùng kết quả.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for row in rows[:header_row]:
+        h.update("".join(_cell_kind(v) for v in row).rstrip("-").encode("ascii") + b"|")
+    header = list(rows[header_row])
+    while header and header[-1] == "":
+        header.pop()
+    h.update(repr(header).encode("utf-8"))
+    return h.hexdigest()
+
+def pick_layout(projection, file_path, head):
+    """
+    projection.pick qua cache bố cục (cache.layout_cache), trả về Layout hoặc None: thử dấu vân tay các dòng đầu
+    với dòng header (projection.markers: dòng locate_header_row chọn; header cố định: từng dòng header đã gặp
+    của profile), khớp thì dùng lại kết quả dò; chưa gặp thì dò như thường rồi ghi nhớ.
+    """
+    if projection.name is None:
+        return projection.pick(file_path, head)
+    layouts = cache.layout_cache(projection.name)
+    if layouts is not None:
+        if projection.markers:
+            # header là dòng đầu tiên có markers (như extract_sheet): chỉ dùng lại bố cục có header ở đúng dòng đó,
+            # kể cả khi dòng phía trên có chữ 'mã sv' mà vẫn trùng dấu vân tay với 1 mẫu đã gặp
+            found = locate_header_row(head.rows, projection.markers, projection.search_rows)
+            header_rows = () if found is None else (found,)
+        else:
+            header_rows = sorted({layout.header_row for layout in layouts.plans().values()})
+        for header_row in header_rows:
+            if header_row < len(head.rows):
+                layout = layouts.get(layout_fingerprint(head.rows, header_row))
+                if layout is not None:
+                    return layout
+    plan = projection.pick(file_path, head)
+    if plan is None:
+        return None
+    layout = Layout(projection.name, *plan)
+    if layouts is not None:
+        layouts.put(layout_fingerprint(head.rows, layout.header_row), layout)
+    return layout
+
+def sheet_layout(sheet, profile_name):
+    """
+    Bố cục profile profile_name đã dò lúc đọc file (SheetData.layout), để extract_sheet dựng bảng thẳng từ
+    dòng header và cột đã biết, không dò lại; file đọc không qua projection của profile đó -> None (dò như thường).
+    """
+    layout = sheet.layout
+    return layout if layout is not None and layout.profile == profile_name else None
+
+def layout_columns(df, layout):
+    """Tên các cột layout.columns (cột Mã SV, cột điểm) của bảng dựng từ dòng header layout.header_row."""
+    return [df.columns[j] for j in layout.columns]
+
+def header_frame(row):
+    """DataFrame rỗng có đúng các tên cột pandas đặt cho dòng header row (ô trống -> 'Unnamed: i', tên trùng -> '.1')."""
+    return frame_from_rows([row], 0)
+
+# ======================= DÒ HEADER TRONG BỘ NHỚ ==========================
+
+def locate_header_row(rows, markers, max_rows):
+    """
+    Tìm dòng header trong max_rows dòng đầu: dòng đầu tiên có ô chứa 1 trong các
+    markers (so sánh chữ thường). Không tìm thấy -> None.
+    """
+    for i, row in enumerate(rows[:max_rows]):
+        cells = [str(c).lower() for c in row]
+        if any(m in c for c in cells for m in markers):
+            return i
+    return None
+
+def frame_from_rows(rows, header_row=0):
+    """Dựng DataFrame từ các dòng đã đọc, cùng kết quả với pd.read_excel(header=header_row)."""
+    if not rows:
+        # sheet rỗng: pd.read_excel trả về DataFrame rỗng
+        return pd.DataFrame()
+    with timing.stage("parse"):
+        return TextParser(rows, header=header_row, skip_blank_lines=False).read()
+
+def frame_with_header_detect(rows, markers=("mã sv",), max_rows=15):
+    """Dò header trên các dòng đã đọc rồi dựng DataFrame (không tìm thấy -> dòng đầu)."""
+    with timing.stage("header"):
+        header_row = locate_header_row(rows, markers, max_rows)
+    return frame_from_rows(rows, header_row if header_row is not None else 0)
+
+def read_excel_with_header_detect(file_path, markers=("mã sv",), max_rows=15):
+    """
+    Đọc Excel, tự động tìm dòng chứa 1 trong các markers để làm header.
+    Thay vì gọi pd.read_excel(header=i) cho từng i (giải nén + parse lại cả file),
+    file chỉ được parse 1 lần rồi dò header trên dữ liệu trong bộ nhớ.
+    """
+    return frame_with_header_detect(read_sheet_once(file_path).rows, markers, max_rows)
@@ -0,0 +1,164 @@
+"""
+Nguồn file điểm: file Excel trên đĩa (cả thư mục con) hoặc file Excel nằm trong file ZIP.
+File trong ZIP được đọc thẳng vào bộ nhớ, không giải nén ra đĩa; đường dẫn của nó là 1 chuỗi
+'D:/Diem/HK1.zip::/Khoa CNTT/Tin hoc (251-CPS201-07).xlsx' nên vẫn truyền được qua process pool / cache
+như đường dẫn thường, và os.path.basename vẫn cho tên file (các profile lấy mã môn/nhóm từ đó),
+kể cả file nằm ngay gốc ZIP ('HK1.zip::/Tin hoc.xlsx' -> 'Tin hoc.xlsx').
+"""
+import fnmatch
+import glob
+import io
+import os
+import zipfile
+from contextlib import contextmanager
+
+EXCEL_EXTS = ('.xlsx', '.xls')
+
+# ngăn cách đường dẫn file ZIP và tên file bên trong; kết thúc bằng '/' để os.path.basename tách ra tên file
+ZIP_SEP = "::/"
+
+# ======================= ĐƯỜNG DẪN TRONG ZIP ==========================
+
+def member_path(zip_path, member):
+    return f"{zip_path}{ZIP_SEP}{member}"
+
+def split_member(path):
+    """'a.zip::/x/y.xlsx' -> ('a.zip', 'x/y.xlsx'); đường dẫn thường -> (path, None)."""
+    zip_path, sep, member = path.partition(ZIP_SEP)
+    if sep and zip_path.lower().endswith(".zip"):
+        return zip_path, member
+    return path, None
+
+def is_excel_name(name):
+    """Tên file Excel, bỏ file khóa tạm '~$...' của Excel khi đang mở."""
+    base = name.replace("\\", "/").rsplit("/", 1)[-1]
+    return base.lower().endswith(EXCEL_EXTS) and not base.startswith("~$")
+
+# đường dẫn -> bytes đã đọc sẵn (ghep_diem.prefetch), chỉ trong lúc xử lý file đó
+_preloaded = {}
+
+@contextmanager
+def preloaded(path, data):
+    """Trong khối with, open_binary(path) dùng data (bytes đã đọc sẵn) thay vì đọc lại file; data None: đọc như thường."""
+    if data is None:
+        yield
+        return
+    _preloaded[path] = data
+    try:
+        yield
+    finally:
+        _preloaded.pop(path, None)
+
+def read_bytes(path):
+    """Toàn bộ nội dung file (file trong ZIP: nội dung đã giải nén)."""
+    zip_path, member = split_member(path)
+    if member is None:
+        with open(path, "rb") as f:
+            return f.read()
+    with zipfile.ZipFile(zip_path) as zf:
+        return zf.read(member)
+
+def load_bytes(path):
+    """Bytes đã đọc sẵn (preloaded) của path nếu có, không thì đọc cả file (read_bytes)."""
+    data = _preloaded.get(path)
+    return data if data is not None else read_bytes(path)
+
+def open_binary(path):
+    """
+    Thứ đưa vào openpyxl / pd.read_excel: file thường giữ nguyên đường dẫn,
+    file trong ZIP hoặc đã đọc sẵn (preloaded) -> BytesIO chứa nội dung trong bộ nhớ.
+    """
+    data = _preloaded.get(path)
+    if data is not None:
+        return io.BytesIO(data)
+    zip_path, member = split_member(path)
+    if member is None:
+        return path
+    return io.BytesIO(read_bytes(path))
+
+def open_stream(path):
+    """Mở để đọc tuần tự từng khúc (vd. băm nội dung), file trong ZIP giải nén dần, không đọc cả file."""
+    zip_path, member = split_member(path)
+    if member is None:
+        return open(path, "rb")
+    with zipfile.ZipFile(zip_path) as zf:
+        # stream của member vẫn đọc được sau khi đóng ZipFile (zipfile đếm tham chiếu file gốc)
+        return zf.open(member)
+
+def signature(path):
+    """(kích thước, mtime_ns) để biết file đã đổi chưa; file trong ZIP: kích thước gốc + mtime của file ZIP."""
+    zip_path, member = split_member(path)
+    st = os.stat(zip_path)
+    if member is None:
+        return st.st_size, st.st_mtime_ns
+    with zipfile.ZipFile(zip_path) as zf:
+        return zf.getinfo(member).file_size, st.st_mtime_ns
+
+# ======================= LIỆT KÊ FILE ==========================
+
+def _matches(rel, patterns):
+    """rel khớp 1 trong các mẫu glob: mẫu có '/' so với cả đường dẫn tương đối, không có thì so với tên file."""
+    rel = rel.replace(os.sep, "/")
+    base = rel.rsplit("/", 1)[-1]
+    return any(fnmatch.fnmatch(rel if "/" in p else base, p) for p in patterns)
+
+def _selected(rel, include, exclude):
+    if include and not _matches(rel, include):
+        return False
+    return not (exclude and _matches(rel, exclude))
+
+def zip_members(zip_path, include=(), exclude=(), prefix=""):
+    """Các file Excel trong file ZIP (thứ tự như trong ZIP), dạng member_path; prefix: đường dẫn tương đối của ZIP khi lọc."""
+    out = []
+    with zipfile.ZipFile(zip_path) as zf:
+        for info in zf.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith("__MACOSX/") or not is_excel_name(name):
+                continue
+            if _selected(f"{prefix}{name}", include, exclude):
+                out.append(member_path(zip_path, name))
+    return out
+
+def _walk(folder, recursive):
+    """(đường dẫn, đường dẫn tương đối) các file trong thư mục; recursive: cả thư mục con, theo thứ tự tên."""
+    if not recursive:
+        for f in os.listdir(folder):
+            path = os.path.join(folder, f)
+            if os.path.isfile(path):
+                yield path, f
+        return
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        for f in sorted(files):
+            path = os.path.join(root, f)
+            yield path, os.path.relpath(path, folder)
+
+def list_sources(source, recursive=False, include=(), exclude=()):
+    """
+    Các file Excel lấy từ source:
+    - thư mục: file Excel trong thư mục (thứ tự như os.listdir); recursive: cả thư mục con
+      và các file Excel bên trong file .zip gặp trên đường;
+    - file .zip: các file Excel bên trong; file Excel: chính nó; còn lại coi là mẫu glob (vd. 'in/**/*.xlsx').
+    include / exclude: mẫu glob lọc theo đường dẫn tương đối so với source (vd. '*CNTT*', 'Khoa A/*', '*_cu.xlsx').
+    """
+    if os.path.isdir(source):
+        out = []
+        for path, rel in _walk(source, recursive):
+            if is_excel_name(path) and _selected(rel, include, exclude):
+                out.append(path)
+            elif recursive and path.lower().endswith(".zip") and zipfile.is_zipfile(path):
+                out.extend(zip_members(path, include, exclude, prefix=f"{rel}/"))
+        return out
+    if os.path.isfile(source):
+        if source.lower().endswith(".zip"):
+            return zip_members(source, include, exclude)
+        return [source]
+    out = []
+    for p in sorted(glob.glob(source, recursive=True)):
+        if not os.path.isfile(p):
+            continue
+        if p.lower().endswith(".zip"):
+            out.extend(zip_members(p, include, exclude))
+        elif is_excel_name(p) and _selected(os.path.basename(p), include, exclude):
+            out.append(p)
+    return out
@@ -0,0 +1,194 @@
+"""
+CSDL tra cứu điểm (SQLite): mỗi lượt ghép (1 học kỳ / 1 đợt, đặt tên run) ghi thêm các dòng kết quả vào
+1 file .sqlite3 có chỉ mục theo Mã SV và theo (mã môn, nhóm), nên tra "mọi điểm của SV X qua các học kỳ"
+chỉ mất vài ms thay vì mở lại hàng chục file kết quả.
+Khóa mỗi dòng là (run, Mã SV, mã môn, nhóm): ghép lại cùng 1 run thì các dòng cũ của run đó được thay toàn bộ
+(không còn dòng của file đã xóa / đã sửa), các run khác giữ nguyên.
+"""
+import math
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+from ghep_diem import matrix
+
+# tên file CSDL mặc định (giao diện: đặt trong thư mục lưu file kết quả)
+DEFAULT_NAME = "Tra_cuu_diem.sqlite3"
+
+# cột bảng kết quả tra cứu
+LOOKUP_COLUMNS = ["Lượt ghép", "Mã SV", "Mã môn học", "Nhóm", "Điểm", "File"]
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS scores (
+        run TEXT NOT NULL,
+        student_id TEXT NOT NULL,
+        subject TEXT NOT NULL,
+        grp TEXT NOT NULL,
+        score,
+        source TEXT NOT NULL,
+        updated REAL NOT NULL,
+        PRIMARY KEY (run, student_id, subject, grp)
+    );
+    CREATE INDEX IF NOT EXISTS scores_student ON scores (student_id);
+    CREATE INDEX IF NOT EXISTS scores_subject ON scores (subject, grp);
+    CREATE TABLE IF NOT EXISTS runs (
+        run TEXT PRIMARY KEY,
+        profile TEXT,
+        files INTEGER NOT NULL,
+        rows INTEGER NOT NULL,
+        updated REAL NOT NULL
+    );
+"""
+
+def default_run_name(source):
+    """Tên lượt ghép mặc định: tên thư mục / file nguồn (vd. 'D:/Diem/HK1_2025' -> 'HK1_2025')."""
+    return os.path.splitext(os.path.basename(os.path.normpath(source)))[0] or "ghep_diem"
+
+def _text(value):
+    """Giá trị khóa -> chữ: 2251010000.0 và 2251010000 là 1 mã, ô trống -> ''."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+def _score(value):
+    """Điểm số -> float, chữ (vd. 'Vắng') giữ nguyên, trống -> NULL."""
+    if value is None or (isinstance(value, float) and math.isnan(value)) or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return str(value).strip()
+
+def _connect(db_path):
+    folder = os.path.dirname(os.path.abspath(db_path))
+    os.makedirs(folder, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+# ======================= GHI ==========================
+
+class ResultStore:
+    """
+    Ghi dần bảng từng file của 1 lượt ghép vào CSDL (add(part, path), như duplicates.ConflictIndex),
+    trong 1 transaction: commit() khi ghép xong, rollback() khi bị hủy / lỗi để không để lại lượt ghép dở dang.
+    Kết nối mở ở lần add đầu tiên, nên dùng được từ thread nền của giao diện; lúc đó xóa luôn các dòng cũ
+    của run trong cùng transaction (bị hủy thì các dòng cũ vẫn còn nguyên).
+    """
+
+    def __init__(self, db_path, run, profile=None):
+        self.db_path = db_path
+        self.run = run
+        self.profile = profile
+        self.files = 0
+        self.rows = 0
+        self._conn = None
+        # (cột Mã SV, cột mã môn, cột nhóm hoặc None, cột điểm); () nếu bảng thiếu cột
+        self.columns = None
+
+    def add(self, part, path):
+        """Ghi (ghi đè theo khóa) các dòng của bảng 1 file; dòng thiếu Mã SV / mã môn bị bỏ qua."""
+        if self.columns is None:
+            try:
+                self.columns = (matrix.pick_column(part, matrix.ID_COLUMNS),
+                                matrix.pick_column(part, matrix.SUBJECT_COLUMNS),
+                                next((c for c in matrix.GROUP_COLUMNS if c in part.columns), None),
+                                matrix.pick_column(part, matrix.SCORE_COLUMNS))
+            except ValueError:
+                self.columns = ()
+        if not self.columns or not len(part):
+            return
+        id_col, subject_col, group_col, score_col = self.columns
+        ids = map(_text, part[id_col].to_numpy(dtype=object))
+        subjects = map(_text, part[subject_col].to_numpy(dtype=object))
+        groups = map(_text, part[group_col].to_numpy(dtype=object)) if group_col else [""] * len(part)
+        scores = map(_score, part[score_col].to_numpy(dtype=object))
+        source = os.path.basename(path)
+        now = time.time()
+        rows = [(self.run, i, s, g, v, source, now) for i, s, g, v in zip(ids, subjects, groups, scores) if i and s]
+        if self._conn is None:
+            self._conn = _connect(self.db_path)
+            self._conn.execute("DELETE FROM scores WHERE run = ?", (self.run,))
+        self._conn.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        self.files += 1
+        self.rows += len(rows)
+
+    def commit(self):
+        """Chốt lượt ghép (ghi cả số file / số dòng vào bảng runs) và đóng kết nối."""
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?)",
+                               (self.run, self.profile, self.files, self.rows, time.time()))
+            self._conn.commit()
+        finally:
+            self._conn.close()
+            self._conn = None
+
+    def rollback(self):
+        """Bỏ các dòng đã ghi của lượt ghép này (bị hủy / lỗi)."""
+        if self._conn is None:
+            return
+        try:
+            self._conn.rollback()
+        finally:
+            self._conn.close()
+            self._conn = None
+
+    def summary(self):
+        return f"CSDL tra cứu: {self.rows:,} dòng ({self.files} file) -> {self.db_path} (lượt '{self.run}')"
+
+# ======================= TRA CỨU ==========================
+
+def lookup(db_path, student_id=None, subject=None, group=None, run=None):
+    """
+    Các dòng khớp điều kiện (bỏ trống = không lọc), theo lượt ghép, mã môn, nhóm; cột LOOKUP_COLUMNS.
+    Tra theo Mã SV hoặc mã môn (+ nhóm) dùng chỉ mục, không quét cả bảng.
+    """
+    if not os.path.isfile(db_path):
+        raise FileNotFoundError(f"Chưa có CSDL tra cứu: {db_path}")
+    where, params = [], []
+    for column, value in (("student_id", student_id), ("subject", subject), ("grp", group), ("run", run)):
+        if value is not None and _text(value) != "":
+            where.append(f"{column} = ?")
+            params.append(_text(value))
+    sql = "SELECT run, student_id, subject, grp, score, source FROM scores"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY run, subject, grp, student_id"
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+    return pd.DataFrame(rows, columns=LOOKUP_COLUMNS)
+
+def list_runs(db_path):
+    """Các lượt ghép đã lưu: run, profile, số file, số dòng, thời điểm ghi (mới nhất trước)."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        rows = conn.execute("SELECT run, profile, files, rows, updated FROM runs ORDER BY updated DESC").fetchall()
+    finally:
+        conn.close()
+    return [(run, profile, files, n, time.strftime("%Y-%m-%d %H:%M", time.localtime(updated)))
+            for run, profile, files, n, updated in rows]
+
+def format_rows(table, limit=200):
+    """Bảng tra cứu -> các dòng chữ để in ra log / cửa sổ (tối đa limit dòng)."""
+    if not len(table):
+        return ["Không tìm thấy."]
+    lines = [" | ".join(LOOKUP_COLUMNS)]
+    for row in table.head(limit).itertuples(index=False):
+        score = row[4]
+        if isinstance(score, float):
+            score = "" if math.isnan(score) else f"{score:g}"
+        lines.append(" | ".join("" if v is None else str(v) for v in (*row[:4], score, row[5])))
+    if len(table) > limit:
+        lines.append(f"... và {len(table) - limit:,} dòng nữa")
+    return lines
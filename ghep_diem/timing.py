@@ -0,0 +1,195 @@
+"""
+Đo thời gian từng bước khi ghép: đọc file (openpyxl, kèm ô C5/C6), dò header, dựng bảng, lọc Mã SV,
+dò file / dòng trùng, ghép (concat), ghi file. Số liệu từng file được đo ngay trong tiến trình xử lý file đó
+rồi gửi về cùng kết quả; RunReport gom lại để in tóm tắt ra log và ghi báo cáo JSON cạnh file kết quả.
+"""
+import json
+import os
+import time
+import zipfile
+from collections import namedtuple
+from contextlib import contextmanager
+
+# tên bước -> nhãn khi in log (theo thứ tự xử lý)
+STAGE_LABELS = {
+    "read": "Đọc file (kèm C5/C6)",
+    "detect": "Nhận dạng kiểu",
+    "header": "Dò header",
+    "parse": "Dựng bảng",
+    "filter": "Lọc Mã SV",
+    "other": "Xử lý khác",
+    "dedupe": "Dò trùng",
+    "store": "Ghi CSDL tra cứu",
+    "build": "Ghép (concat)",
+    "write": "Ghi file",
+    "matrix": "Bảng điểm ngang",
+}
+
+# số file chậm nhất liệt kê trong log / báo cáo
+SLOWEST_COUNT = 20
+
+# Số liệu 1 file: seconds = tổng thời gian xử lý, stages = {bước: giây}; cached = lấy từ cache, không đọc lại
+FileStats = namedtuple("FileStats", ["path", "bytes", "rows_in", "rows_out", "seconds", "stages", "cached"])
+
+# ======================= ĐO TRONG TỪNG FILE ==========================
+
+# thời gian cộng dồn theo bước của file đang xử lý (mỗi tiến trình xử lý 1 file 1 lúc)
+_current = {}
+
+@contextmanager
+def stage(name):
+    """Cộng thời gian chạy khối lệnh vào bước name của file đang xử lý."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _current[name] = _current.get(name, 0.0) + time.perf_counter() - t0
+
+def timed_extract(profile_name, path):
+    """
+    Như profile.extract_file(path) nhưng trả thêm FileStats: (DataFrame hoặc None, các dòng log, FileStats).
+    Hàm ở mức module (dùng với functools.partial) để chạy được trong process pool.
+    """
+    from ghep_diem import reader, sources
+    from ghep_diem.profiles import get_profile
+
+    profile = get_profile(profile_name)
+    _current.clear()
+    t0 = time.perf_counter()
+    sheet = rejected = None
+    try:
+        sheet = reader.read_sheet_once(path, projection=getattr(profile, "PROJECTION", None))
+    except reader.NotGradeSheet as e:
+        rejected = e
+    except Exception:
+        pass
+    t_read = time.perf_counter() - t0
+    # dò header / cột khi đọc bớt (reader.Projection) đã tính trong bước đọc
+    _current.clear()
+    if rejected is not None:
+        # pre-scan đã bỏ file: ghi lý do như extract_file, không mở lại file
+        temp, logs = profile.skip_file(path, rejected)
+    elif sheet is None:
+        # để profile tự báo lỗi đọc file như khi không đo
+        temp, logs = profile.extract_file(path)
+    else:
+        temp, logs = profile.extract_sheet(path, sheet)
+    seconds = time.perf_counter() - t0
+
+    stages = {"read": t_read}
+    stages.update(_current)
+    stages["other"] = max(0.0, seconds - sum(stages.values()))
+    try:
+        nbytes = sources.signature(path)[0]
+    except (OSError, KeyError, zipfile.BadZipFile):
+        nbytes = 0
+    stats = FileStats(path, nbytes, len(sheet.rows) if sheet is not None else 0,
+                      len(temp) if temp is not None else 0, seconds, stages, False)
+    return temp, logs, stats
+
+# ======================= BÁO CÁO CẢ LƯỢT ==========================
+
+def report_path(out_path):
+    """'out/Tong_Hop.xlsx' -> 'out/Tong_Hop.report.json'."""
+    return f"{os.path.splitext(out_path)[0]}.report.json"
+
+class RunReport:
+    """
+    Số liệu 1 lượt ghép: từng file (add_file) và các bước chung (stage("build"), stage("write")).
+    summary_lines() để in ra log, save() ghi JSON.
+    """
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.workers = 1
+        self.started = time.time()
+        self.files = []
+        self.stages = {}
+        self._t0 = time.perf_counter()
+        self.merge_seconds = None
+        # (byte bảng kết quả trong RAM, byte nếu không dùng category), xem compact.memory_saving
+        self.result_memory = None
+
+    def add_file(self, stats):
+        self.files.append(stats)
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - t0
+
+    def finish(self):
+        """Chốt thời gian ghép (từ lúc tạo tới giờ); bước ghi đo riêng vì giao diện còn chờ chọn nơi lưu."""
+        self.merge_seconds = time.perf_counter() - self._t0
+
+    def total_seconds(self):
+        if self.merge_seconds is None:
+            self.finish()
+        return self.merge_seconds + self.stages.get("write", 0.0)
+
+    def stage_totals(self):
+        """Tổng thời gian theo bước của các file đọc mới, cộng các bước chung."""
+        totals = {name: 0.0 for name in STAGE_LABELS}
+        for f in self.files:
+            if not f.cached:
+                for name, seconds in f.stages.items():
+                    totals[name] = totals.get(name, 0.0) + seconds
+        for name, seconds in self.stages.items():
+            totals[name] = totals.get(name, 0.0) + seconds
+        return totals
+
+    def slowest(self, n=SLOWEST_COUNT):
+        return sorted((f for f in self.files if not f.cached), key=lambda f: f.seconds, reverse=True)[:n]
+
+    def summary_lines(self):
+        cached = sum(f.cached for f in self.files)
+        mb = sum(f.bytes for f in self.files if not f.cached) / (1024 * 1024)
+        rows_in = sum(f.rows_in for f in self.files if not f.cached)
+        rows_out = sum(f.rows_out for f in self.files)
+        lines = ["--- Thống kê thời gian ---",
+                 f"  {len(self.files)} file ({cached} lấy từ cache), đọc {mb:.1f} MB, "
+                 f"{rows_in:,} dòng trong file -> {rows_out:,} dòng kết quả",
+                 f"  Tổng: {self.total_seconds():.2f}s"
+                 + (f" ({self.workers} tiến trình, thời gian các file cộng dồn mọi tiến trình)" if self.workers > 1 else "")]
+        totals = self.stage_totals()
+        lines.append("  " + " | ".join(f"{STAGE_LABELS.get(k, k)}: {v:.2f}s" for k, v in totals.items() if v > 0))
+        if self.result_memory is not None:
+            used, as_object = self.result_memory
+            lines.append(f"  Bảng kết quả trong RAM: {used / 1024 ** 2:.1f} MB "
+                         f"(không dùng category: {as_object / 1024 ** 2:.1f} MB, tiết kiệm {(as_object - used) / 1024 ** 2:.1f} MB)")
+        slowest = self.slowest()
+        if slowest:
+            lines.append(f"  {len(slowest)} file chậm nhất:")
+            for f in slowest:
+                top = max(f.stages, key=f.stages.get)
+                lines.append(f"    {f.seconds:6.2f}s  {os.path.basename(f.path)} "
+                             f"({f.rows_out} dòng, {f.bytes / 1024:.0f} KB, lâu nhất: {STAGE_LABELS.get(top, top)})")
+        return lines
+
+    def to_dict(self):
+        files = [dict(f._asdict(), seconds=round(f.seconds, 4),
+                      stages={k: round(v, 4) for k, v in f.stages.items()}) for f in self.files]
+        return {
+            "profile": self.profile,
+            "workers": self.workers,
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "total_seconds": round(self.total_seconds(), 4),
+            "files": len(self.files),
+            "cached_files": sum(f.cached for f in self.files),
+            "bytes": sum(f.bytes for f in self.files),
+            "rows_in": sum(f.rows_in for f in self.files),
+            "rows_out": sum(f.rows_out for f in self.files),
+            "stages": {k: round(v, 4) for k, v in self.stage_totals().items()},
+            "result_memory": (None if self.result_memory is None else
+                              {"bytes": self.result_memory[0], "object_bytes": self.result_memory[1]}),
+            "slowest": [f["path"] for f in sorted(files, key=lambda f: f["seconds"], reverse=True)
+                        if not f["cached"]][:SLOWEST_COUNT],
+            "per_file": files,
+        }
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
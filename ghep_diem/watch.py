@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+import zipfile
+
+from ghep_diem import parallel, sources, writer
+
+# ======================= THEO DÕI THƯ MỤC, GHÉP LẠI PHẦN THAY ĐỔI ==========================
+
+def scan_folder(folder, recursive=False, include=(), exclude=(), skip=()):
+    """
+    {đường dẫn: (kích thước, mtime)} của các file Excel trong thư mục, cùng danh sách và thứ tự như khi ghép thường
+    (sources.list_sources: recursive gồm cả thư mục con và file trong ZIP, include / exclude là mẫu glob).
+    skip: các đường dẫn bỏ qua (vd. file kết quả nằm trong thư mục).
+    """
+    skip = {os.path.normcase(os.path.abspath(p)) for p in skip}
+    found = {}
+    for path in sources.list_sources(folder, recursive, include, exclude):
+        if os.path.normcase(os.path.abspath(path)) in skip:
+            continue
+        try:
+            found[path] = sources.signature(path)
+        except (OSError, KeyError, zipfile.BadZipFile):
+            # file vừa bị xóa / ZIP đang ghi dở
+            continue
+    return found
+
+class FolderWatcher:
+    """
+    So sánh các lần quét thư mục để biết file nào được thêm / sửa / xóa.
+    File chỉ được báo khi kích thước + mtime giữ nguyên giữa 2 lần quét liên tiếp
+    (tránh đọc file đang được copy / lưu dở). Lần quét đầu báo mọi file là "thêm".
+    """
+
+    def __init__(self, folder, recursive=False, include=(), exclude=(), skip=()):
+        self.folder = folder
+        self.recursive = recursive
+        self.include = include
+        self.exclude = exclude
+        self.skip = skip
+        self.known = {}
+        self.last_scan = None
+        self.order = []
+
+    def poll(self):
+        """Trả về (added, changed, removed) kể từ lần poll trước; không quét được (ZIP đang ghi dở...) -> chờ lần sau."""
+        try:
+            now = scan_folder(self.folder, self.recursive, self.include, self.exclude, self.skip)
+        except (OSError, zipfile.BadZipFile):
+            return [], [], []
+        first = self.last_scan is None
+        prev = self.last_scan or {}
+        self.last_scan = now
+        added, changed = [], []
+        for path, sig in now.items():
+            if self.known.get(path) == sig:
+                continue
+            if not first and prev.get(path) != sig:
+                # còn đang thay đổi -> chờ lần quét sau
+                continue
+            (changed if path in self.known else added).append(path)
+            self.known[path] = sig
+        removed = [p for p in self.known if p not in now]
+        for p in removed:
+            del self.known[p]
+        self.order = [p for p in now if p in self.known]
+        return added, changed, removed
+
+def write_atomic(result, out_path):
+    """Ghi ra file tạm rồi đổi tên, để file kết quả luôn đầy đủ (không bị đọc lúc đang ghi dở)."""
+    root, ext = os.path.splitext(out_path)
+    tmp_path = f"{root}.~tmp{ext}"
+    writer.write_result(result, tmp_path)
+    os.replace(tmp_path, out_path)
+
+def watch_merge(folder, out_path, extract_func, build_func, log_func, workers=1,
+                progress_func=None, cancel_event=None, cache=None, interval=2.0, recursive=False, include=(), exclude=()):
+    """
+    Chế độ theo dõi: ghép toàn bộ thư mục 1 lần, sau đó cứ interval giây quét lại,
+    chỉ đọc lại các file được thêm / sửa, bỏ phần của file bị xóa và ghi lại out_path.
+    extract_func(path): kết quả 1 file (DataFrame hoặc None, các dòng log, ...) như extract_file của profile
+    (phần thêm phía sau, vd. số liệu đo của timing.timed_extract, được bỏ qua).
+    build_func(parts): ghép list DataFrame thành bảng kết quả.
+    recursive / include / exclude: chọn file như khi ghép thường (xem scan_folder).
+    Chạy tới khi cancel_event được set.
+    """
+    cancel_event = cancel_event or threading.Event()
+    root, ext = os.path.splitext(out_path)
+    watcher = FolderWatcher(folder, recursive, include, exclude, skip=(out_path, f"{root}.~tmp{ext}"))
+    results = {}
+    dirty = False
+    while not cancel_event.is_set():
+        added, changed, removed = watcher.poll()
+        todo = added + changed
+        if todo or removed:
+            t0 = time.perf_counter()
+            for path, (temp, logs, *_) in zip(todo, parallel.map_files(extract_func, todo, workers, cache)):
+                for line in logs:
+                    log_func(line)
+                results[path] = temp
+            for path in removed:
+                results.pop(path, None)
+            log_func(f"[{time.strftime('%H:%M:%S')}] +{len(added)} thêm, ~{len(changed)} sửa, "
+                     f"-{len(removed)} xóa ({time.perf_counter() - t0:.1f}s)")
+            dirty = True
+        if dirty:
+            parts = [results[p] for p in watcher.order if results.get(p) is not None]
+            rows = sum(len(p) for p in parts)
+            try:
+                if parts:
+                    write_atomic(build_func(parts), out_path)
+                    log_func(f"  Đã cập nhật {out_path}: {rows} dòng từ {len(parts)} file.")
+                else:
+                    log_func("  Chưa có dữ liệu hợp lệ để ghi.")
+                dirty = False
+            except OSError as e:
+                # thường do file kết quả đang mở trong Excel -> thử lại ở lần quét sau
+                log_func(f"  Chưa ghi được file kết quả ({e}), sẽ thử lại.")
+            if progress_func is not None:
+                progress_func(len(watcher.order), len(watcher.order), rows)
+        cancel_event.wait(interval)
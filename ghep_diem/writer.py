@@ -0,0 +1,294 @@
+"""
+Ghi bảng kết quả ra file: xlsx (ghi luồng, bộ nhớ không đổi theo số dòng), CSV hoặc Parquet.
+Định dạng chọn theo đuôi file kết quả. Bảng quá 1.048.576 dòng được chia sang nhiều sheet,
+hoặc tách thành từng file theo mã môn học (write_split).
+open_sink: ghi dần từng phần (kết quả từng file) mà không cần giữ cả bảng trong bộ nhớ.
+"""
+import math
+import os
+import re
+
+import pandas as pd
+from openpyxl import Workbook
+
+FORMATS = ("xlsx", "csv", "parquet")
+
+# số dòng đổi sang giá trị Python mỗi lần khi ghi xlsx
+CHUNK_ROWS = 10_000
+
+# giới hạn dòng 1 sheet Excel (kể cả dòng tiêu đề)
+EXCEL_MAX_ROWS = 1_048_576
+
+# giới hạn cột 1 sheet Excel (cột XFD)
+EXCEL_MAX_COLUMNS = 16_384
+
+# cột dùng để tách file theo môn (các profile đều có)
+SUBJECT_COLUMN = "Mã môn học"
+
+# cột điểm của các profile (lms / aq / auto và lms_v2 / lms_v1)
+SCORE_COLUMNS = ("Điểm TBC", "Điểm trung bình cộng")
+
+# ======================= ĐỊNH DẠNG / TÊN FILE ==========================
+
+def format_of(path):
+    """Định dạng theo đuôi file; đuôi lạ hoặc không có đuôi coi là xlsx."""
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    return ext if ext in FORMATS else "xlsx"
+
+def with_extension(path, fmt):
+    """Đặt đuôi file theo định dạng: 'Tong_Hop' / 'Tong_Hop.xlsx' -> 'Tong_Hop.csv' (fmt='csv')."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Định dạng không hỗ trợ: {fmt} (chỉ có {', '.join(FORMATS)})")
+    root, ext = os.path.splitext(path)
+    if ext.lower().lstrip(".") in FORMATS:
+        path = root
+    return f"{path}.{fmt}"
+
+# ======================= GHI FILE ==========================
+
+def sheet_count(n_rows, max_rows=EXCEL_MAX_ROWS):
+    """Số sheet cần để ghi n_rows dòng dữ liệu (mỗi sheet còn 1 dòng tiêu đề)."""
+    return max(1, math.ceil(n_rows / (max_rows - 1)))
+
+def iter_rows(result, chunk_rows=CHUNK_ROWS, positions=None):
+    """
+    Duyệt các dòng của bảng (tuple giá trị Python, ô trống là None), đổi kiểu từng khúc chunk_rows dòng.
+    positions: chỉ duyệt các dòng ở vị trí này (vd. 1 môn), không tách bảng con ra trước.
+    """
+    n_rows = len(result) if positions is None else len(positions)
+    for start in range(0, n_rows, chunk_rows):
+        if positions is None:
+            chunk = result.iloc[start:start + chunk_rows]
+        else:
+            chunk = result.take(positions[start:start + chunk_rows])
+        columns = [_cell_values(chunk.iloc[:, j]) for j in range(chunk.shape[1])]
+        yield from zip(*columns)
+
+def _cell_values(col):
+    return col.astype(object).where(col.notna(), None).tolist()
+
+def write_xlsx(result, path, positions=None, max_rows=EXCEL_MAX_ROWS, extra_sheets=()):
+    """
+    Ghi xlsx bằng openpyxl chế độ write_only: từng dòng được ghi thẳng xuống file tạm,
+    không dựng cả workbook trong bộ nhớ như result.to_excel.
+    Quá max_rows dòng thì ghi tiếp sang Sheet2, Sheet3... (cùng tiêu đề), vẫn chỉ duyệt bảng 1 lần.
+    extra_sheets: [(tên sheet, bảng)] ghi thêm sau các sheet kết quả (vd. bảng xung đột).
+    """
+    sink = XlsxSink(path, result.columns, max_rows)
+    sink.append(result, positions)
+    for title, frame in extra_sheets:
+        sink.add_sheet(title, frame)
+    sink.close()
+
+def write_csv(result, path):
+    """Ghi CSV UTF-8 có BOM để Excel mở đúng tiếng Việt."""
+    result.to_csv(path, index=False, encoding="utf-8-sig")
+
+def write_parquet(result, path):
+    """Ghi Parquet (cần pyarrow hoặc fastparquet)."""
+    try:
+        _parquet_safe(result).to_parquet(path, index=False)
+    except ImportError as e:
+        raise RuntimeError("Ghi Parquet cần cài thêm pyarrow (pip install pyarrow).") from e
+
+def _parquet_safe(result):
+    """
+    Cột lẫn số và chữ (vd. Mã SV) đổi hết sang chữ, Parquet cần mỗi cột 1 kiểu.
+    Cột category giữ nguyên (Parquet lưu dạng dictionary) trừ khi bảng giá trị lẫn số và chữ.
+    """
+    out = None
+    for j in range(result.shape[1]):
+        col = result.iloc[:, j]
+        values = col.cat.categories if isinstance(col.dtype, pd.CategoricalDtype) else col
+        if values.dtype == object and pd.api.types.infer_dtype(values, skipna=True) in ("mixed", "mixed-integer"):
+            col = col.astype(object)
+            if out is None:
+                out = result.copy(deep=False)
+            out.isetitem(j, col.where(col.isna(), col.astype(str)))
+    return result if out is None else out
+
+WRITERS = {"xlsx": write_xlsx, "csv": write_csv, "parquet": write_parquet}
+
+def write_result(result, path, fmt=None, extra_sheets=()):
+    """
+    Ghi bảng kết quả ra path theo định dạng fmt (mặc định: theo đuôi file).
+    extra_sheets: [(tên sheet, bảng)] ghi thêm, chỉ với xlsx.
+    """
+    fmt = fmt or format_of(path)
+    if fmt == "xlsx":
+        write_xlsx(result, path, extra_sheets=extra_sheets)
+    else:
+        WRITERS[fmt](result, path)
+
+# ======================= GHI DẦN TỪNG PHẦN ==========================
+
+class XlsxSink:
+    """Ghi xlsx dần từng phần (cùng cột), tự sang sheet mới khi đầy như write_xlsx."""
+
+    def __init__(self, path, columns, max_rows=EXCEL_MAX_ROWS):
+        self.path = path
+        self.columns = list(columns)
+        self.max_rows = max_rows
+        self.rows = 0
+        self._wb = Workbook(write_only=True)
+        self._ws = None
+        self._used = max_rows
+        self._sheets = 0
+
+    @property
+    def sheets(self):
+        """Số sheet kết quả (không tính sheet thêm bằng add_sheet)."""
+        return max(1, self._sheets)
+
+    def _next_sheet(self):
+        self._sheets += 1
+        self._ws = self._wb.create_sheet(f"Sheet{self._sheets}")
+        self._ws.append([str(c) for c in self.columns])
+        self._used = 1
+
+    def append(self, part, positions=None):
+        for row in iter_rows(part, positions=positions):
+            if self._used >= self.max_rows:
+                self._next_sheet()
+            self._ws.append(row)
+            self._used += 1
+            self.rows += 1
+
+    def add_sheet(self, title, frame):
+        """Ghi frame vào 1 sheet riêng tên title, sau các sheet kết quả (gọi khi đã append xong)."""
+        if self._ws is None:
+            self._next_sheet()
+        ws = self._wb.create_sheet(title)
+        ws.append([str(c) for c in frame.columns])
+        for row in iter_rows(frame):
+            ws.append(row)
+
+    def close(self):
+        if self._ws is None:
+            self._next_sheet()
+        self._wb.save(self.path)
+
+class CsvSink:
+    """Ghi CSV dần từng phần, tiêu đề chỉ ghi 1 lần (cùng kết quả với write_csv trên cả bảng)."""
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = list(columns)
+        self.rows = 0
+        self.sheets = 1
+        # newline="": để pandas tự xuống dòng như khi ghi thẳng ra đường dẫn
+        self._f = open(path, "w", encoding="utf-8-sig", newline="")
+
+    def append(self, part):
+        part.to_csv(self._f, index=False, header=self.rows == 0)
+        self.rows += len(part)
+
+    def close(self):
+        if self.rows == 0:
+            pd.DataFrame(columns=self.columns).to_csv(self._f, index=False)
+        self._f.close()
+
+class ParquetSink:
+    """
+    Ghi Parquet dần từng row group (cần pyarrow). Schema phải chốt từ phần đầu mà các file có thể cho
+    cùng 1 cột kiểu khác nhau (Mã SV là số ở file này, chữ ở file khác), nên các cột ghi dạng chữ (ô trống -> null),
+    trừ cột điểm (SCORE_COLUMNS) ghi số thực như khi ghi cả bảng; điểm là chữ không đổi được sang số
+    (vd. 'Vắng') thành null, đếm trong text_scores để báo lại.
+    """
+
+    def __init__(self, path, columns):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Ghi Parquet cần cài thêm pyarrow (pip install pyarrow).") from e
+        self._pa = pa
+        self._pq = pq
+        self.path = path
+        self.columns = list(columns)
+        self.rows = 0
+        self.sheets = 1
+        self.text_scores = 0
+        self._schema = pa.schema([(str(c), pa.float64() if c in SCORE_COLUMNS else pa.string())
+                                  for c in self.columns])
+        self._writer = None
+
+    def append(self, part):
+        frame = pd.DataFrame({str(c): self._score_values(part[c]) if c in SCORE_COLUMNS else _text_values(part[c])
+                              for c in self.columns})
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.path, self._schema)
+        self._writer.write_table(self._pa.Table.from_pandas(frame, schema=self._schema, preserve_index=False))
+        self.rows += len(part)
+
+    def _score_values(self, col):
+        """Điểm -> float, ô trống -> None; chữ không phải số -> None và tăng text_scores."""
+        out = []
+        for v in _cell_values(col):
+            if isinstance(v, str) and not v.strip():
+                v = None
+            if v is not None:
+                try:
+                    v = float(v)
+                except (TypeError, ValueError):
+                    v = None
+                    self.text_scores += 1
+            out.append(v)
+        return out
+
+    def close(self):
+        if self._writer is None:
+            write_parquet(pd.DataFrame(columns=self.columns), self.path)
+        else:
+            self._writer.close()
+
+def _text_values(col):
+    """Giá trị dạng chữ như khi mở CSV (12 -> '12', 8.5 -> '8.5'), ô trống -> None."""
+    return [None if v is None else str(v) for v in _cell_values(col)]
+
+SINKS = {"xlsx": XlsxSink, "csv": CsvSink, "parquet": ParquetSink}
+
+def open_sink(path, columns, fmt=None):
+    """Mở bộ ghi dần cho path (định dạng theo đuôi file): sink.append(part) từng phần, cuối cùng sink.close()."""
+    return SINKS[fmt or format_of(path)](path, columns)
+
+# ======================= TÁCH FILE THEO MÔN ==========================
+
+def split_path(path, key):
+    """'out/Tong_Hop.xlsx' + 'LCE315' -> 'out/Tong_Hop_LCE315.xlsx' (bỏ ký tự không dùng được trong tên file)."""
+    root, ext = os.path.splitext(path)
+    key = re.sub(r'[\\/:*?"<>|\s]+', "_", str(key)).strip("_") or "khong_ma_mon"
+    return f"{root}_{key}{ext}"
+
+def _unused_path(path, used):
+    """
+    path nếu chưa có trong used, không thì thêm _2, _3... (vd. 'LCE/315' và 'LCE 315' cùng thành 'LCE_315');
+    so không phân biệt hoa thường như tên file trên Windows. Ghi path trả về vào used.
+    """
+    root, ext = os.path.splitext(path)
+    candidate, n = path, 1
+    while candidate.lower() in used:
+        n += 1
+        candidate = f"{root}_{n}{ext}"
+    used.add(candidate.lower())
+    return candidate
+
+def write_split(result, path, column=SUBJECT_COLUMN, fmt=None):
+    """
+    Tách bảng kết quả thành từng file theo giá trị cột column (mặc định: mã môn học).
+    Chỉ lấy vị trí dòng của từng nhóm, không tạo bảng con cho xlsx. Trả về list (đường dẫn file, số dòng).
+    Mã môn khác nhau nhưng cùng tên file sau khi bỏ ký tự lạ không ghi đè nhau: file sau thêm hậu tố _2, _3...
+    """
+    fmt = fmt or format_of(path)
+    keys = result[column].astype(object).fillna("")
+    written = []
+    used = set()
+    groups = keys.groupby(keys).indices
+    for key, positions in sorted(groups.items(), key=lambda kv: str(kv[0])):
+        out_path = _unused_path(split_path(path, key), used)
+        if fmt == "xlsx":
+            write_xlsx(result, out_path, positions=positions)
+        else:
+            WRITERS[fmt](result.take(positions), out_path)
+        written.append((out_path, len(positions)))
+    return written
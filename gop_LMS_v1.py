@@ -1,129 +1,52 @@
 # gop_diem_gui.py
-import os
-import re
-import pandas as pd
+import multiprocessing
 import tkinter as tk
-from tkinter import filedialog, messagebox, scrolledtext
-
-# ---------- Cấu hình / helper ----------
-def extract_info_from_filename(filename):
-    """Lấy mã môn học và mã nhóm từ tên file dạng: (251-CPS201-07)"""
-    match = re.search(r"\((\d+)-([A-Z0-9]+)-(\d+)\)", filename.upper())
-    if match:
-        return match.group(2), match.group(3)
-    # fallback: tìm token kiểu CPS201 trong tên file
-    match2 = re.search(r"([A-Z]{2,}\d{2,})", filename.upper())
-    if match2:
-        return match2.group(1), ''
-    return '', ''
-
-def format_mssv_value(v):
-    """Chuẩn hóa MSSV: nếu là số nguyên như 12345.0 -> '12345'"""
-    if pd.isna(v):
-        return ''
-    try:
-        f = float(v)
-        if f.is_integer():
-            return str(int(f))
-        else:
-            return str(v).strip()
-    except Exception:
-        return str(v).strip()
-
-# ---------- Xử lý file ----------
-def merge_files(paths, log_func):
-    all_parts = []
-    for p in paths:
-        basename = os.path.basename(p)
-        log_func(f">>> Xử lý file: {basename}")
-        ma_mon, ma_nhom = extract_info_from_filename(basename)
-        try:
-            # header=7 => dùng dòng 8 làm tiêu đề (user nói dòng 8)
-            df = pd.read_excel(p, header=7, engine='openpyxl')
-        except Exception as e:
-            log_func(f"  Lỗi đọc file: {e}")
-            continue
-
-        # Tìm cột MSSV (dựa vào tiêu đề)
-        mssv_col = None
-        for c in df.columns:
-            cs = str(c).upper()
-            if ("MÃ" in cs and "SINH" in cs) or "MSSV" in cs or "MÃ SV" in cs or "MÃSINH" in cs:
-                mssv_col = c
-                break
-
-        if mssv_col is None:
-            log_func("  ❌ Không tìm thấy cột MSSV theo tên. Bỏ file này.")
-            continue
-
-        # Lấy điểm từ cột L (index 11) nếu có, ngược lại fallback tìm theo tên chứa 'TBC' hoặc 'ĐIỂM'
-        if df.shape[1] >= 12:
-            tbc_series = df.iloc[:, 11]   # cột L
-            tbc_col_header = df.columns[11]
-            log_func(f"  Lấy điểm từ cột L (header: '{tbc_col_header}').")
-        else:
-            # fallback: tìm bằng tên cột
-            tbc_col_header = None
-            for c in df.columns:
-                cs = str(c).upper()
-                if "TBC" in cs or "TBC ĐTP" in cs or "TỔNG" in cs or "ĐIỂM TRUNG" in cs or "ĐIỂM" in cs:
-                    tbc_col_header = c
-                    break
-            if tbc_col_header is None:
-                log_func("  ❌ Không tìm thấy cột điểm (cột L và không có cột theo tên). Bỏ file này.")
-                continue
-            tbc_series = df[tbc_col_header]
-            log_func(f"  Lấy điểm từ cột theo tên: '{tbc_col_header}'.")
-
-        # Tạo DataFrame tạm
-        temp = pd.DataFrame()
-        temp['MSSV'] = df[mssv_col].apply(format_mssv_value)
-        # convert điểm numeric (nếu dạng text hay có dấu) -> numeric, lỗi -> NaN
-        temp['Điểm trung bình cộng'] = pd.to_numeric(tbc_series, errors='coerce')
-        temp['Mã môn học'] = ma_mon
-        temp['Mã nhóm'] = ma_nhom
-
-        # Lọc: MSSV không rỗng, điểm không rỗng
-        before = len(temp)
-        temp = temp[temp['MSSV'].notna()]
-        temp = temp[temp['MSSV'].str.replace(r'\s+', '', regex=True) != '']
-        temp = temp[temp['Điểm trung bình cộng'].notna()]
-        after = len(temp)
-
-        log_func(f"  Dòng trước lọc: {before}, sau lọc hợp lệ: {after}")
-        if after > 0:
-            all_parts.append(temp)
-
-    if not all_parts:
-        return None
-    merged = pd.concat(all_parts, ignore_index=True)
-    # Sắp cột cho dễ nhìn
-    merged = merged[['MSSV', 'Mã môn học', 'Mã nhóm', 'Điểm trung bình cộng']]
-    return merged
+from tkinter import filedialog, messagebox, scrolledtext, ttk
+from ghep_diem import duplicates, engine, parallel, timing
+from ghep_diem.background import BackgroundTask, format_progress
+from ghep_diem.cache import ParseCache
 
 # ---------- Giao diện Tkinter ----------
 class App:
     def __init__(self, root):
         self.root = root
         root.title("Gộp dữ liệu điểm - Lấy cột L cho Điểm trung bình cộng")
-        root.geometry("750x480")
+        root.geometry("750x540")
 
         frm_top = tk.Frame(root)
         frm_top.pack(fill='x', padx=10, pady=8)
 
-        btn_add = tk.Button(frm_top, text="Chọn file Excel", width=18, command=self.select_files)
-        btn_add.pack(side='left', padx=5)
+        self.btn_add = tk.Button(frm_top, text="Chọn file Excel", width=18, command=self.select_files)
+        self.btn_add.pack(side='left', padx=5)
+
+        self.btn_clear = tk.Button(frm_top, text="Xóa danh sách", width=12, command=self.clear_list)
+        self.btn_clear.pack(side='left', padx=5)
 
-        btn_clear = tk.Button(frm_top, text="Xóa danh sách", width=12, command=self.clear_list)
-        btn_clear.pack(side='left', padx=5)
+        self.btn_merge = tk.Button(frm_top, text="Gộp dữ liệu và lưu", width=20, command=self.process_files)
+        self.btn_merge.pack(side='right', padx=5)
 
-        btn_merge = tk.Button(frm_top, text="Gộp dữ liệu và lưu", width=20, command=self.process_files)
-        btn_merge.pack(side='right', padx=5)
+        self.workers_var = tk.IntVar(value=parallel.default_workers())
+        spn_workers = tk.Spinbox(frm_top, from_=1, to=max(64, parallel.default_workers()), width=4, textvariable=self.workers_var)
+        spn_workers.pack(side='right', padx=(0, 10))
+        lbl_workers = tk.Label(frm_top, text="Số tiến trình:")
+        lbl_workers.pack(side='right')
 
         # Listbox các file
         self.lb = tk.Listbox(root, width=110, height=8)
         self.lb.pack(padx=10, pady=(0,8))
 
+        # Tiến độ + nút hủy (việc gộp chạy nền, cửa sổ không bị treo)
+        frm_progress = tk.Frame(root)
+        frm_progress.pack(fill='x', padx=10)
+        self.progress = ttk.Progressbar(frm_progress, mode='determinate')
+        self.progress.pack(side='left', fill='x', expand=True)
+        self.btn_cancel = tk.Button(frm_progress, text="Hủy", width=8, state='disabled', command=self.cancel)
+        self.btn_cancel.pack(side='right', padx=(8, 5))
+        self.status_var = tk.StringVar(value="")
+        lbl_status = tk.Label(root, textvariable=self.status_var, anchor='w')
+        lbl_status.pack(fill='x', padx=10, pady=(0, 4))
+        self.task = BackgroundTask(root, self.log_write, self.show_progress)
+
         # Log area
         lbl_log = tk.Label(root, text="Nhật ký xử lý:")
         lbl_log.pack(anchor='w', padx=10)
@@ -151,34 +74,94 @@ class App:
         self.log.delete('1.0', tk.END)
         self.log.configure(state='disabled')
 
+    def set_busy(self, busy):
+        state = 'disabled' if busy else 'normal'
+        for btn in (self.btn_add, self.btn_clear, self.btn_merge):
+            btn.configure(state=state)
+        self.btn_cancel.configure(state='normal' if busy else 'disabled')
+        if not busy:
+            self.progress.stop()
+            self.progress.configure(mode='determinate')
+
+    def show_progress(self, done, total, rows, elapsed):
+        self.progress.configure(maximum=total, value=done)
+        self.status_var.set(format_progress(done, total, rows, elapsed))
+
+    def cancel(self):
+        self.task.cancel()
+        self.btn_cancel.configure(state='disabled')
+        self.log_write("Đang hủy, chờ file hiện tại xử lý xong...")
+
     def process_files(self):
+        if self.task.running():
+            return
         paths = list(self.lb.get(0, tk.END))
         if not paths:
             messagebox.showwarning("Cảnh báo", "Vui lòng chọn ít nhất 1 file Excel.")
             return
-        self.log_write("Bắt đầu gộp...")
-
-        merged = merge_files(paths, self.log_write)
+        try:
+            workers = parallel.parse_workers(self.workers_var.get())
+        except (ValueError, tk.TclError):
+            messagebox.showwarning("Cảnh báo", "Số tiến trình phải là số nguyên >= 1.")
+            return
+        self.log_write(f"Bắt đầu gộp... ({workers} tiến trình)")
+
+        self.set_busy(True)
+        self.progress.configure(maximum=len(paths), value=0)
+        self.status_var.set(format_progress(0, len(paths), 0, 0))
+        self.report = timing.RunReport("lms_v1")
+        self.conflicts = duplicates.ConflictIndex()
+        self.task.start(self.on_merged, engine.merge_files, paths, "lms_v1", self.task.log, workers,
+                        self.task.progress, self.task.cancel_event, ParseCache("lms_v1"), self.report,
+                        self.conflicts)
+
+    def on_merged(self, merged, error):
+        if error is not None:
+            self.set_busy(False)
+            messagebox.showerror("Lỗi", f"Lỗi khi gộp: {error}")
+            self.log_write(f"Lỗi khi gộp: {error}")
+            return
+        if self.task.cancelled():
+            self.set_busy(False)
+            self.status_var.set("Đã hủy.")
+            return
         if merged is None or merged.empty:
+            self.set_busy(False)
             messagebox.showerror("Kết quả", "Không tìm thấy dữ liệu hợp lệ để gộp.")
             return
 
         save_path = filedialog.asksaveasfilename(
             defaultextension=".xlsx",
-            filetypes=[("Excel file", "*.xlsx")],
+            # csv / parquet ghi nhanh hơn nhiều khi không cần mở bằng Excel
+            filetypes=[("Excel file", "*.xlsx"), ("CSV (UTF-8)", "*.csv"), ("Parquet", "*.parquet")],
             title="Lưu file gộp"
         )
-        if save_path:
-            try:
-                merged.to_excel(save_path, index=False)
-                messagebox.showinfo("Hoàn tất", f"Đã gộp dữ liệu và lưu tại:\n{save_path}")
-                self.log_write(f"Hoàn tất. File lưu tại: {save_path}")
-            except Exception as e:
-                messagebox.showerror("Lỗi lưu", f"Lỗi khi lưu file: {e}")
-                self.log_write(f"Lỗi lưu file: {e}")
+        if not save_path:
+            self.set_busy(False)
+            return
+        # ghi file cũng chạy nền; không cho hủy giữa lúc đang ghi
+        self.btn_cancel.configure(state='disabled')
+        self.status_var.set(f"Đang lưu {len(merged)} dòng...")
+        self.progress.configure(mode='indeterminate')
+        self.progress.start(15)
+        self.task.start(lambda _, e: self.on_saved(save_path, e), engine.save_result, merged, save_path,
+                        False, self.task.log, self.report, self.conflicts)
+
+    def on_saved(self, save_path, error):
+        self.set_busy(False)
+        if error is not None:
+            self.status_var.set("Lỗi lưu file.")
+            messagebox.showerror("Lỗi lưu", f"Lỗi khi lưu file: {error}")
+            self.log_write(f"Lỗi lưu file: {error}")
+            return
+        self.status_var.set("Hoàn tất.")
+        messagebox.showinfo("Hoàn tất", f"Đã gộp dữ liệu và lưu tại:\n{save_path}")
+        self.log_write(f"Hoàn tất. File lưu tại: {save_path}")
 
 # ---------- Chạy ứng dụng ----------
 if __name__ == "__main__":
+    # cần cho process pool khi đóng gói exe (Windows)
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = App(root)
     root.mainloop()
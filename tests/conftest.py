@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(autouse=True)
+def _cache_dir(tmp_path, monkeypatch):
+    """Cache kết quả / cache bố cục của mỗi test nằm trong thư mục tạm riêng, không dùng cache của máy."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.delenv("LOCALAPPDATA", raising=False)
+    monkeypatch.setenv("GHEP_DIEM_LAYOUT_CACHE", str(tmp_path / "layouts"))
+    from ghep_diem import cache
+    cache._layout_cache.cache_clear()
+
+@pytest.fixture(scope="session")
+def synth_files(tmp_path_factory):
+    """Vài file điểm giả mỗi bố cục (benchmarks/synth.py), dùng chung cho các test chỉ đọc."""
+    from benchmarks import synth
+    return synth.generate(str(tmp_path_factory.mktemp("synth")), "mixed", n_files=12, n_rows=30, seed=3)
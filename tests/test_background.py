@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+from ghep_diem import background, engine
+
+class FakeRoot:
+    """Thay cửa sổ Tk: root.after chỉ ghi lại hàm, pump() gọi lần lượt như vòng lặp chính."""
+
+    def __init__(self):
+        self.pending = []
+
+    def after(self, ms, func):
+        self.pending.append(func)
+
+    def pump(self, timeout=30):
+        deadline = time.monotonic() + timeout
+        while self.pending:
+            assert time.monotonic() < deadline, "tác vụ nền không kết thúc"
+            self.pending.pop(0)()
+            time.sleep(0.001)
+
+@pytest.fixture
+def ui():
+    root = FakeRoot()
+    events = {"log": [], "progress": [], "done": []}
+    task = background.BackgroundTask(root, events["log"].append,
+                                     lambda done, total, rows, elapsed: events["progress"].append((done, total, rows)),
+                                     poll_ms=1)
+    return root, task, events
+
+def test_cancel_stops_after_current_file(synth_files, ui):
+    root, task, events = ui
+
+    def progress(done, total, rows):
+        task.progress(done, total, rows)
+        if done == 2:
+            # như bấm Hủy trong lúc đang ghép
+            task.cancel()
+
+    task.start(lambda result, error: events["done"].append((result, error)),
+               engine.merge_files, synth_files, "auto", task.log, 1, progress, task.cancel_event)
+    assert task.running()
+    root.pump()
+    assert not task.running() and task.cancelled()
+    assert events["done"] == [(None, None)]
+    assert [done for done, _, _ in events["progress"]] == [1, 2]
+    assert events["log"][-1] == f"⏹ Đã hủy sau 2/{len(synth_files)} file."
+
+def test_error_reaches_on_done(ui):
+    root, task, events = ui
+
+    def fail():
+        task.log("đang đọc")
+        raise ValueError("hỏng")
+
+    task.start(lambda result, error: events["done"].append((result, error)), fail)
+    with pytest.raises(RuntimeError):
+        task.start(lambda *_: None, fail)
+    root.pump()
+    (result, error), = events["done"]
+    assert result is None and isinstance(error, ValueError) and events["log"] == ["đang đọc"]
+
+def test_on_done_can_start_next_task(ui):
+    root, task, events = ui
+    task.start(lambda result, error: task.start(lambda r, e: events["done"].append(r), lambda: result + 1),
+               lambda: 1)
+    root.pump()
+    assert events["done"] == [2]
+
+@pytest.mark.parametrize("done, total, rows, elapsed, expected", [
+    (0, 10, 0, 0.0, "0/10 file · 0 dòng"),
+    (4, 10, 12345, 20.0, "4/10 file · 12.345 dòng · còn khoảng 00:30"),
+    (1, 3, 50, 1900.0, "1/3 file · 50 dòng · còn khoảng 1:03:20"),
+    (10, 10, 1234567, 75.4, "10/10 file · 1.234.567 dòng · 01:15"),
+])
+def test_format_progress(done, total, rows, elapsed, expected):
+    assert background.format_progress(done, total, rows, elapsed) == expected
@@ -0,0 +1,141 @@
+import os
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from benchmarks import synth
+from ghep_diem import cache, reader, sources
+from ghep_diem.profiles import aq, lms, lms_v1, lms_v2
+
+def _count_calls(monkeypatch, module, name):
+    calls = []
+    real = getattr(module, name)
+
+    def counted(path, *args, **kwargs):
+        calls.append(path)
+        return real(path, *args, **kwargs)
+
+    monkeypatch.setattr(module, name, counted)
+    return calls
+
+def test_cache_miss_reads_each_file_once(tmp_path, monkeypatch):
+    # không đọc trước trên thread nền: mọi lần đọc file đều qua sources.read_bytes
+    monkeypatch.setenv("GHEP_DIEM_READ_AHEAD", "0")
+    paths = synth.generate(str(tmp_path / "in"), "lms", n_files=4, n_rows=20, seed=1)
+    reads = _count_calls(monkeypatch, sources, "read_bytes")
+    hashes = _count_calls(monkeypatch, sources, "open_stream")
+    c = cache.ParseCache("lms", cache_dir=str(tmp_path / "cache"))
+
+    first = list(c.map_files(lms.extract_file, paths))
+    assert (c.hits, c.misses) == (0, 4)
+    assert sorted(reads) == sorted(paths)
+    assert hashes == []
+
+    # mtime đổi, nội dung giữ nguyên: băm lại 1 file, vẫn dùng kết quả cũ
+    st = os.stat(paths[0])
+    os.utime(paths[0], ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    reads.clear()
+    second = list(c.map_files(lms.extract_file, paths))
+    assert (c.hits, c.misses) == (4, 0)
+    assert reads == [] and hashes == [paths[0]]
+    for (a, _), (b, _) in zip(first, second):
+        pd.testing.assert_frame_equal(a, b)
+
+def test_hashed_call_matches_content_hash(tmp_path):
+    path = synth.generate(str(tmp_path), "lms", n_files=1, n_rows=5)[0]
+    digest, _ = cache.hashed_call(lms.extract_file, path)
+    assert digest == cache.content_hash(path)
+
+def _results_equal(a, b):
+    for (df_a, logs_a), (df_b, logs_b) in zip(a, b):
+        assert logs_a == logs_b
+        if df_a is None:
+            assert df_b is None
+        else:
+            pd.testing.assert_frame_equal(df_a, df_b)
+
+@pytest.mark.parametrize("profile", [lms, aq, lms_v2, lms_v1])
+def test_layout_cache_skips_known_templates(synth_files, profile, monkeypatch):
+    found = []
+    pick = profile.PROJECTION.pick
+
+    def counted_pick(path, head):
+        plan = pick(path, head)
+        found.append(plan is not None)
+        return plan
+
+    monkeypatch.setattr(profile, "PROJECTION", profile.PROJECTION._replace(pick=counted_pick))
+    first = [profile.extract_file(p) for p in synth_files]
+    assert any(found)
+    picks = len(found)
+    found.clear()
+    second = [profile.extract_file(p) for p in synth_files]
+    assert not any(found)
+    _results_equal(first, second)
+
+    # tắt cache: không tra / ghi cache bố cục nào, kết quả vẫn như cũ
+    monkeypatch.setenv(cache.LAYOUT_ENV, "off")
+    assert cache.layout_cache(profile.NAME) is None
+    used = []
+    found.clear()
+    for name in ("plans", "get", "put"):
+        monkeypatch.setattr(cache.LayoutCache, name, lambda self, *args, name=name: used.append(name))
+    _results_equal(first, [profile.extract_file(p) for p in synth_files])
+    assert used == [] and len(found) >= picks
+
+# các hàm dò header / cột của profile (pick_columns khi đọc, extract_sheet khi chưa biết bố cục)
+DETECTORS = {lms: ("read_excel_with_header_detect", "find_column", "find_tbc_dtp_column"),
+             aq: ("read_excel_with_header_detect", "find_column"),
+             lms_v2: ("find_mssv_column", "find_tbc_column"), lms_v1: ("find_mssv_column",)}
+
+@pytest.mark.parametrize("profile", list(DETECTORS))
+def test_known_layout_skips_detection(synth_files, profile, monkeypatch):
+    paths = [p for i, p in enumerate(synth_files) if synth.LAYOUTS[i % len(synth.LAYOUTS)] == profile.NAME]
+    first = [profile.extract_file(p) for p in paths]
+    calls = []
+    for name in DETECTORS[profile]:
+        real = getattr(profile, name)
+        monkeypatch.setattr(profile, name, lambda *args, real=real: calls.append(real) or real(*args))
+    # file cùng mẫu: bố cục lấy từ cache, extract_sheet dựng bảng thẳng từ dòng header / cột đã biết
+    second = [profile.extract_file(p) for p in paths]
+    assert calls == []
+    _results_equal(first, second)
+
+def test_layout_cache_follows_setting(tmp_path, monkeypatch):
+    monkeypatch.setenv(cache.LAYOUT_ENV, str(tmp_path / "a"))
+    a = cache.layout_cache("lms")
+    assert cache.layout_cache("lms") is a
+    monkeypatch.setenv(cache.LAYOUT_ENV, str(tmp_path / "b"))
+    assert cache.layout_cache("lms").cache_dir == str(tmp_path / "b")
+    monkeypatch.setenv(cache.LAYOUT_ENV, "off")
+    assert cache.layout_cache("lms") is None
+
+def _template(path, note):
+    """Mẫu lms: tiêu đề ở dòng 1, ghi chú (chữ) ở dòng 3, header 'Mã SV' / 'TBC ĐTP' ở dòng 8."""
+    wb = Workbook()
+    ws = wb.active
+    ws["A1"] = "TRƯỜNG ĐẠI HỌC KINH TẾ"
+    ws["A3"] = note
+    ws["C5"] = "Tiếng Anh 1 (LCE315) - 01"
+    for j, h in enumerate(["STT", "Mã SV", "Họ tên", "TBC ĐTP (*)"], start=1):
+        ws.cell(8, j, h)
+    for i in range(20):
+        for j, v in enumerate([i + 1, 2251010000 + i, "Nguyễn Văn An", 7.5], start=1):
+            ws.cell(9 + i, j, v)
+    wb.save(path)
+
+def test_layout_cache_checks_header_row(tmp_path):
+    known, other = str(tmp_path / "a.xlsx"), str(tmp_path / "b.xlsx")
+    _template(known, "Bảng điểm học kỳ 1")
+    # cùng dấu vân tay ở dòng 8 (dòng 3 vẫn là 1 ô chữ) nhưng header là dòng 3 (dòng đầu tiên có 'mã sv')
+    _template(other, "Ghi chú: Mã SV ghi đủ 10 số")
+    assert lms.extract_file(known)[0] is not None
+    full = reader.read_sheet_once(other)
+    head = full._replace(rows=full.rows[:lms.HEADER_SEARCH_ROWS])
+    assert reader.layout_fingerprint(head.rows, 7) == reader.layout_fingerprint(
+        reader.read_sheet_once(known).rows[:lms.HEADER_SEARCH_ROWS], 7)
+    assert reader.pick_layout(lms.PROJECTION, other, head) is None
+    # đọc bớt cho cùng kết quả với đọc cả sheet: file này không có cột TBC ĐTP ở dòng header thật
+    assert lms.extract_sheet(other, full)[0] is None
+    assert lms.extract_file(other)[0] is None
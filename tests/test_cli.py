@@ -0,0 +1,107 @@
+import os
+import shutil
+
+import pytest
+
+from ghep_diem import cache, cli, engine, prefetch, reader, sources
+
+class Calls:
+    """Thay engine.merge_to_file / watch_to_file: ghi lại tham số, không ghép thật."""
+
+    def __init__(self, rows=5):
+        self.rows = rows
+        self.calls = []
+
+    def __call__(self, *args, **kwargs):
+        self.calls.append((args, kwargs))
+        return self.rows
+
+@pytest.fixture
+def merge(monkeypatch):
+    calls = Calls()
+    monkeypatch.setattr(engine, "merge_to_file", calls)
+    return calls
+
+@pytest.fixture(autouse=True)
+def _env(monkeypatch):
+    # cli.main đặt các biến môi trường này cho process pool: monkeypatch trả lại như cũ sau mỗi test
+    # (setenv trước để monkeypatch nhớ cả biến chưa có, delenv không ghi nhận biến chưa có)
+    for name in (reader.ENGINE_ENV, prefetch.READ_AHEAD_ENV, prefetch.READ_AHEAD_MB_ENV, cache.LAYOUT_ENV):
+        monkeypatch.setenv(name, "")
+        monkeypatch.delenv(name)
+
+@pytest.fixture
+def folder(tmp_path, synth_files):
+    src = tmp_path / "HK1"
+    (src / "Khoa A").mkdir(parents=True)
+    for p in synth_files[:3]:
+        shutil.copy(p, src)
+    shutil.copy(synth_files[3], src / "Khoa A")
+    return str(src)
+
+def test_defaults_map_to_merge_to_file(folder, tmp_path, merge):
+    out = str(tmp_path / "out" / "Tong_Hop")
+    assert cli.main([folder, "-o", out, "-p", "auto", "-w", "3", "-q"]) == 0
+    (args, kwargs), = merge.calls
+    assert args[0] == sources.list_sources(folder)
+    assert args[1:3] == (f"{out}.xlsx", "auto") and args[4] == 3
+    assert os.path.isdir(tmp_path / "out")
+    assert isinstance(kwargs["cache"], cache.ParseCache)
+    assert kwargs == dict(cache=kwargs["cache"], split_by_subject=False, stream=False, matrix_policy=None,
+                          skip_duplicate_files=True, store=None)
+
+def test_options_map_to_merge_to_file(folder, tmp_path, merge):
+    out = str(tmp_path / "Tong_Hop")
+    argv = [folder, "-r", "--exclude", "*CPS201*", "-o", out, "-f", "csv", "--matrix", "last",
+            "--keep-duplicate-files", "--no-cache", "--reader", "openpyxl", "--read-ahead", "2",
+            "--read-ahead-mb", "64", "-q"]
+    assert cli.main(argv) == 0
+    (args, kwargs), = merge.calls
+    assert args[0] == sources.list_sources(folder, True, (), ["*CPS201*"]) and len(args[0]) == 3
+    assert args[1] == f"{out}.csv"
+    assert kwargs["cache"] is None and kwargs["matrix_policy"] == "last"
+    assert kwargs["skip_duplicate_files"] is False
+    assert os.environ[reader.ENGINE_ENV] == "openpyxl" and os.environ[cache.LAYOUT_ENV] == "off"
+    assert (os.environ[prefetch.READ_AHEAD_ENV], os.environ[prefetch.READ_AHEAD_MB_ENV]) == ("2", "64")
+
+def test_inputs_deduplicated_and_output_skipped(folder, merge):
+    top = sources.list_sources(folder)
+    out = os.path.join(folder, os.path.basename(top[0]))
+    assert cli.main([folder, top[1], "-o", out, "-q"]) == 0
+    (args, _), = merge.calls
+    assert args[0] == top[1:]
+
+def test_store_and_stream(folder, tmp_path, merge):
+    db = str(tmp_path / "Tra_cuu.sqlite3")
+    assert cli.main([folder, "-o", str(tmp_path / "a.csv"), "--stream", "--store", db, "--run", "HK1_2025"]) == 0
+    (_, kwargs), = merge.calls
+    assert kwargs["stream"] is True
+    assert (kwargs["store"].db_path, kwargs["store"].run, kwargs["store"].profile) == (db, "HK1_2025", "lms")
+
+def test_watch_maps_to_watch_to_file(folder, tmp_path, monkeypatch, merge):
+    watch = Calls()
+    monkeypatch.setattr(engine, "watch_to_file", watch)
+    out = str(tmp_path / "Tong_Hop.xlsx")
+    assert cli.main([folder, "--watch", "-r", "--include", "Khoa A/*", "-o", out, "-p", "lms_v2", "-w", "2"]) == 0
+    (args, kwargs), = watch.calls
+    assert args[:3] == (folder, out, "lms_v2") and args[4] == 2
+    assert (kwargs["recursive"], kwargs["include"], kwargs["exclude"]) == (True, ["Khoa A/*"], [])
+    assert not kwargs["cancel_event"].is_set() and not merge.calls
+
+@pytest.mark.parametrize("extra", [["--stream", "--matrix"], ["--stream", "--split-by-subject"], ["-w", "0"],
+                                   ["--watch", "--matrix"]])
+def test_invalid_combinations(folder, tmp_path, merge, extra):
+    assert cli.main([folder, "-o", str(tmp_path / "a.xlsx"), *extra]) == 2
+    assert not merge.calls
+
+def test_no_rows_exit_code(folder, tmp_path, merge):
+    merge.rows = 0
+    assert cli.main([folder, "-o", str(tmp_path / "a.xlsx"), "-q"]) == 1
+    assert cli.main([str(tmp_path / "khong_co" / "*.xlsx"), "-o", str(tmp_path / "a.xlsx"), "-q"]) == 1
+    assert len(merge.calls) == 1
+
+def test_merges_for_real(folder, tmp_path):
+    out = str(tmp_path / "Tong_Hop.csv")
+    assert cli.main([folder, "-r", "-o", out, "-p", "auto", "-w", "1", "-q"]) == 0
+    expected = engine.merge_files(sources.list_sources(folder, True), "auto", lambda _: None)
+    assert sum(1 for _ in open(out, encoding="utf-8-sig")) == len(expected) + 1
@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from ghep_diem import compact, writer
+
+def _part(ids, subject, group, scores):
+    return pd.DataFrame({"Mã SV": ids, "Họ và tên": [f"SV {i}" for i in range(len(ids))],
+                         "Mã môn học": subject, "Nhóm": group, "Điểm TBC": scores})
+
+PARTS = [
+    _part([2251010000, 2251010001, 2251010002], "LCE315", "06", [8.0, 7.5, None]),
+    _part(["2251010000", "SV-01"], "CPS201", 1, [9.0, 4.0]),
+    _part([2251010003, 2251010000], "LCE315", "07", ["Vắng", 6.0]),
+]
+
+def _as_object(df):
+    return df.astype(object).where(df.notna(), None)
+
+def test_concat_parts_matches_pd_concat():
+    expected = pd.concat(PARTS, ignore_index=True)
+    got = compact.concat_parts([compact.compact_frame(p) for p in PARTS])
+    assert list(got.columns) == list(expected.columns)
+    for c in ("Mã SV", "Mã môn học", "Nhóm"):
+        assert isinstance(got[c].dtype, pd.CategoricalDtype)
+    assert not isinstance(got["Họ và tên"].dtype, pd.CategoricalDtype)
+    assert _as_object(got).values.tolist() == _as_object(expected).values.tolist()
+    # cùng kiểu từng ô (1 và '1', 2251010000 và '2251010000' không bị gộp)
+    assert [type(v) for v in got["Nhóm"]] == [type(v) for v in expected["Nhóm"]]
+    assert [type(v) for v in got["Mã SV"]] == [type(v) for v in expected["Mã SV"]]
+
+def test_concat_parts_with_different_columns():
+    parts = [compact.compact_frame(PARTS[0]), compact.compact_frame(PARTS[1].drop(columns="Nhóm"))]
+    expected = pd.concat([PARTS[0], PARTS[1].drop(columns="Nhóm")], ignore_index=True)
+    got = compact.concat_parts(parts)
+    assert isinstance(got["Mã môn học"].dtype, pd.CategoricalDtype)
+    assert _as_object(got).values.tolist() == _as_object(expected).values.tolist()
+
+@pytest.mark.parametrize("fmt", ["csv", "xlsx"])
+def test_float_ids_written_as_integers(tmp_path, fmt):
+    # cột Mã SV có ô trống -> pandas đọc ra float; pd.concat trước đây đổi cả cột sang float
+    with_blank = _part([2251010004.0, float("nan")], "LCE315", "06", [5.0, 6.0])
+    parts = [compact.compact_frame(p) for p in (PARTS[0], with_blank)]
+    assert pd.concat([PARTS[0], with_blank], ignore_index=True)["Mã SV"].iloc[0] == 2251010000.0
+    result = compact.concat_parts(parts)
+    path = str(tmp_path / f"Tong_Hop.{fmt}")
+    writer.write_result(result, path)
+    if fmt == "csv":
+        ids = pd.read_csv(path, dtype=str)["Mã SV"].tolist()
+    else:
+        ids = pd.read_excel(path, dtype=object)["Mã SV"].tolist()
+    assert ids[:4] == (["2251010000", "2251010001", "2251010002", "2251010004"] if fmt == "csv"
+                       else [2251010000, 2251010001, 2251010002, 2251010004])
+    assert pd.isna(ids[4])
+    # số thực không nguyên giữ nguyên
+    assert compact._ids_as_int(pd.Series([2251010000.5, 12.0])).tolist() == [2251010000.5, 12]
@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+
+from ghep_diem import diff, engine, store, writer
+
+def _key(row):
+    return str(row["Mã SV"]).strip(), str(row["Mã môn học"]), str(row["Nhóm"])
+
+def _expected(old, new):
+    """So từng dòng bằng dict: (Mã SV, môn, nhóm) -> (điểm cũ, điểm mới, loại thay đổi)."""
+    a = {_key(r): r["Điểm TBC"] for _, r in old.iterrows()}
+    b = {_key(r): r["Điểm TBC"] for _, r in new.iterrows()}
+    out = {}
+    for k in a.keys() | b.keys():
+        if k not in b:
+            out[k] = (a[k], None, diff.KIND_REMOVED)
+        elif k not in a:
+            out[k] = (None, b[k], diff.KIND_ADDED)
+        elif not (a[k] == b[k] or (pd.isna(a[k]) and pd.isna(b[k]))):
+            out[k] = (a[k], b[k], diff.KIND_CHANGED)
+    return out
+
+def _as_dict(table):
+    return {(r[0], r[1], r[2]): (None if pd.isna(r[3]) else r[3], None if pd.isna(r[4]) else r[4], r[5])
+            for r in table.itertuples(index=False)}
+
+@pytest.fixture(scope="module")
+def runs(tmp_path_factory):
+    """Kết quả ghép thật (profile lms) trên file giả, và bản mới: sửa điểm, bỏ 1 lớp, thêm 1 lớp."""
+    from benchmarks import synth
+    folder = tmp_path_factory.mktemp("diff")
+    paths = synth.generate(str(folder / "in"), "lms", n_files=6, n_rows=25, seed=5)
+    old = engine.merge_files(paths, "lms", log_func=lambda _: None).astype(object)
+    new = old.copy()
+    new.loc[new.index[:7], "Điểm TBC"] = [(v or 0) + 0.5 for v in new["Điểm TBC"].iloc[:7].fillna(0)]
+    first = (new["Mã môn học"] == old["Mã môn học"].iloc[-1]) & (new["Nhóm"] == old["Nhóm"].iloc[-1])
+    new = new[~first]
+    extra = old.head(5).assign(**{"Mã môn học": "MOI101", "Nhóm": "01"})
+    new = pd.concat([new, extra], ignore_index=True)
+    return folder, old, new
+
+def test_diff_matches_row_by_row_comparison(runs):
+    folder, old, new = runs
+    old_path, new_path = str(folder / "cu.xlsx"), str(folder / "moi.csv")
+    writer.write_result(old, old_path)
+    writer.write_result(new, new_path)
+    expected = _expected(old, new)
+    assert {kind for *_, kind in expected.values()} == {diff.KIND_ADDED, diff.KIND_REMOVED, diff.KIND_CHANGED}
+
+    stats = diff.DiffStats()
+    table = pd.concat(diff.iter_diff(old_path, new_path, stats=stats), ignore_index=True)
+    assert _as_dict(table) == expected
+    assert stats.differences == len(expected)
+
+    # bảng lớn: chia phần qua file tạm, cùng kết quả
+    parts = diff.DiffStats()
+    split = pd.concat(diff.iter_diff(old_path, new_path, stats=parts, partitions=4, memory_rows=10),
+                      ignore_index=True)
+    assert parts.partitions == 4
+    assert _as_dict(split) == expected
+
+def test_diff_between_store_runs(runs, tmp_path):
+    _, old, new = runs
+    db = str(tmp_path / "diem.sqlite3")
+    for run, table in (("HK1", old), ("HK1_sua", new)):
+        s = store.ResultStore(db, run)
+        s.add(table, "x.xlsx")
+        s.commit()
+    table = pd.concat(diff.iter_diff(db, db, "HK1", "HK1_sua"), ignore_index=True)
+    assert _as_dict(table) == _expected(old, new)
@@ -0,0 +1,79 @@
+import shutil
+import zipfile
+
+import pandas as pd
+from openpyxl import Workbook
+
+from ghep_diem import duplicates, engine, sources
+
+def _grade_file(path, scores, subject="Tiếng Anh 1 (LCE315) - 06"):
+    """File lms: mã môn/nhóm ở C5, header dòng 8, mỗi (Mã SV, điểm) 1 dòng."""
+    wb = Workbook()
+    ws = wb.active
+    ws["C5"] = subject
+    for j, h in enumerate(["STT", "Mã SV", "Họ tên", "TBC ĐTP (*)"], start=1):
+        ws.cell(8, j, h)
+    for i, (sv, score) in enumerate(scores.items()):
+        for j, v in enumerate([i + 1, sv, "Nguyễn Văn An", score], start=1):
+            ws.cell(9 + i, j, v)
+    wb.save(path)
+    return str(path)
+
+def test_duplicate_files(tmp_path):
+    a = tmp_path / "a.xlsx"
+    a.write_bytes(b"0123456789" * 10)
+    copy = tmp_path / "a (1).xlsx"
+    shutil.copy(a, copy)
+    # cùng kích thước, khác nội dung: giữ lại
+    same_size = tmp_path / "b.xlsx"
+    same_size.write_bytes(b"9876543210" * 10)
+    other = tmp_path / "c.xlsx"
+    other.write_bytes(b"x" * 50)
+    with zipfile.ZipFile(tmp_path / "HK1.zip", "w") as zf:
+        zf.write(a, "Khoa A/a.xlsx")
+    member = sources.member_path(str(tmp_path / "HK1.zip"), "Khoa A/a.xlsx")
+    missing = str(tmp_path / "khong_co.xlsx")
+    paths = [str(a), str(same_size), str(copy), str(other), member, missing]
+    kept, dropped = duplicates.duplicate_files(paths)
+    assert kept == [str(a), str(same_size), str(other), missing]
+    assert dropped == [(str(copy), str(a)), (member, str(a))]
+
+def _part(rows):
+    return pd.DataFrame(rows, columns=["Mã SV", "Mã môn học", "Nhóm", "Điểm TBC"])
+
+def test_conflict_index_kinds():
+    index = duplicates.ConflictIndex()
+    index.add(_part([[2251010001, "LCE315", "06", 8], [2251010002, "LCE315", "06", 7],
+                     [2251010003, "LCE315", "06", 5]]), "in/a.xlsx")
+    # cùng điểm khác kiểu (8 / 8.0 / '8') là trùng dòng; khác nhóm là khóa khác
+    index.add(_part([[2251010001, "LCE315", "06", "8"], [2251010002, "LCE315", "06", 9.5],
+                     [2251010003, "LCE315", "07", 5]]), "in/b.xlsx")
+    index.add(_part([[2251010001, "LCE315", "06", 8.0]]), "in/c.xlsx")
+    table = index.table()
+    assert list(table.columns) == ["Mã SV", "Mã môn học", "Nhóm", "Số lần", "Các điểm", "Các file", "Loại"]
+    assert table.values.tolist() == [
+        ["2251010001", "LCE315", "06", 3, "8; 8; 8", "a.xlsx; b.xlsx; c.xlsx", duplicates.KIND_REPEAT],
+        ["2251010002", "LCE315", "06", 2, "7; 9.5", "a.xlsx; b.xlsx", duplicates.KIND_CONFLICT]]
+    lines = index.summary_lines()
+    assert lines[0].startswith("⚠ 1 mã SV có điểm khác nhau") and "1 mã SV bị lặp dòng" in lines[0]
+    assert "7; 9.5" in lines[1]
+
+def test_merge_skips_copies_and_writes_conflict_sheet(tmp_path):
+    scores = {2251010000 + i: 5 + i / 10 for i in range(10)}
+    (tmp_path / "in").mkdir()
+    a = _grade_file(tmp_path / "in" / "a.xlsx", scores)
+    copy = tmp_path / "in" / "a - Copy.xlsx"
+    shutil.copy(a, copy)
+    # nộp lại với 1 điểm đã sửa
+    b = _grade_file(tmp_path / "in" / "b.xlsx", {**scores, 2251010003: 9.0})
+    out = str(tmp_path / "out.xlsx")
+    logs = []
+    rows = engine.merge_to_file([a, str(copy), b], out, "lms", logs.append)
+    assert rows == 20
+    assert any("Bỏ qua a - Copy.xlsx: trùng nội dung với a.xlsx" in line for line in logs)
+
+    sheet = pd.read_excel(out, sheet_name=duplicates.SHEET_NAME, dtype=str)
+    assert len(sheet) == 10 and set(sheet["Số lần"]) == {"2"} and set(sheet["Các file"]) == {"a.xlsx; b.xlsx"}
+    conflict = sheet[sheet["Loại"] == duplicates.KIND_CONFLICT]
+    assert conflict[["Mã SV", "Các điểm"]].values.tolist() == [["2251010003", "5.3; 9"]]
+    assert (sheet["Loại"] == duplicates.KIND_REPEAT).sum() == 9
@@ -0,0 +1,39 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ghep_diem import masv
+
+# đủ loại giá trị gặp trong cột Mã SV: số nguyên / số thực, NaN, chuỗi có khoảng trắng, dòng ghi chú,
+# mã quá ngắn (nhãn nhóm) / quá dài (vượt 2**53), mã có chữ và dấu gạch
+MIXED = [2251010000, 2251010000.0, 2251010000.5, np.nan, None, "", "   ", " 2251010001 ", "2251010002",
+         "0012300", "01", "1", 1, 12, 123, "12", 7.0, -5, 2 ** 60, float(2 ** 60), "99999999999999999999",
+         "SV-001", "K23/01", "ab c", "Số SV: 40", "Điều kiện dự thi", "TBC", "tbc1", "CBGD: ThS. A", "Nhóm 01",
+         "môn học", "K123", "Mã SV", "2251010003\n", True, datetime.datetime(2024, 1, 2), float("inf")]
+
+def _column(values, dtype=None, n=masv.VECTOR_MIN_ROWS + 100):
+    return pd.Series([values[i % len(values)] for i in range(n)], dtype=dtype)
+
+COLUMNS = {
+    "object": _column(MIXED, object),
+    "float": _column([2251010000.0, np.nan, 12.0, 2251010000.5, 3.0, float(2 ** 60), -1.0]),
+    "int": _column([2251010000, 1, 12, 123, -5, 2 ** 60]),
+    # cột đã lọc bớt dòng: index không liên tục
+    "filtered": _column(MIXED, object).iloc[::-1].set_axis(range(0, 2 * (masv.VECTOR_MIN_ROWS + 100), 2)),
+    "string": _column(["2251010000", " 2251010001 ", "01", "Số SV: 40", None, "SV-001", "tbc"], "string"),
+    # cỡ 1 file điểm: dưới ngưỡng
+    "per_file": _column(MIXED, object, n=50),
+    "per_file_float": _column([2251010000.0, np.nan, 12.0, 2251010000.5], n=50),
+}
+
+@pytest.mark.parametrize("arrow_strings", [False, True])
+@pytest.mark.parametrize("kind", COLUMNS)
+def test_vector_functions_match_per_value(kind, arrow_strings, monkeypatch):
+    # arrow_strings=True: đi đường .str của pandas như khi đã cài pyarrow (không có pyarrow vẫn chạy, chỉ chậm hơn)
+    monkeypatch.setattr(masv, "_ARROW_STRINGS", arrow_strings)
+    col = COLUMNS[kind]
+    pd.testing.assert_series_equal(masv.probably_masv_mask(col), col.apply(masv.is_probably_masv).astype(bool))
+    pd.testing.assert_series_equal(masv.valid_masv_mask(col), col.apply(masv.is_valid_masv).astype(bool))
+    pd.testing.assert_series_equal(masv.format_mssv_series(col), col.apply(masv.format_mssv_value).astype(str))
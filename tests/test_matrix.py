@@ -0,0 +1,74 @@
+import os
+
+import pandas as pd
+import pytest
+
+from ghep_diem import engine, matrix, writer
+
+def _result(n_subjects):
+    return pd.DataFrame({"Mã SV": [2251010000] * n_subjects,
+                         "Điểm TBC": [7.5] * n_subjects,
+                         "Mã môn học": [f"MH{i:05d}" for i in range(n_subjects)],
+                         "Nhóm": ["01"] * n_subjects})
+
+def test_matrix_within_excel_columns_stays_xlsx(tmp_path):
+    m = matrix.build_matrix(_result(3))
+    path = str(tmp_path / "Tong_Hop_ma_tran.xlsx")
+    assert matrix.write_matrix(m, path) == path
+    assert pd.read_excel(path).shape == (1, 4)
+
+def test_matrix_wider_than_excel_falls_back_to_csv(tmp_path):
+    m = matrix.build_matrix(_result(writer.EXCEL_MAX_COLUMNS))
+    path = str(tmp_path / "Tong_Hop_ma_tran.xlsx")
+    written = matrix.write_matrix(m, path)
+    assert written == str(tmp_path / "Tong_Hop_ma_tran.csv")
+    assert not os.path.exists(path)
+    assert pd.read_csv(written).shape == (1, writer.EXCEL_MAX_COLUMNS + 1)
+
+# SV 2251010000 học LCE315 2 lần (nhóm 06 rồi 07, điểm 6 rồi 8.5) và có 1 lần CPS201 trống điểm
+REPEATED = pd.DataFrame({"Mã SV": [2251010000, 2251010001, "2251010000", 2251010000, " 2251010000 "],
+                         "Điểm TBC": [6.0, 7.0, None, 8.5, 5.0],
+                         "Mã môn học": ["LCE315", "LCE315", "CPS201", "LCE315", "CPS201"],
+                         "Nhóm": ["06", "06", "01", "07", "02"]})
+
+def _cells(m):
+    frame = pd.concat(m.iter_frames(), ignore_index=True).set_index("Mã SV")
+    return {(sid, subject): v for (sid, subject), v in frame.stack().dropna().items()}
+
+@pytest.mark.parametrize("policy, lce, cps", [("max", 8.5, 5.0), ("first", 6.0, None), ("last", 8.5, 5.0)])
+def test_policy_on_repeated_student_subject(policy, lce, cps):
+    m = matrix.build_matrix(REPEATED, policy)
+    assert m.shape == (2, 2) and m.columns == ["Mã SV", "CPS201", "LCE315"]
+    cells = _cells(m)
+    assert cells[("2251010000", "LCE315")] == lce and cells[("2251010001", "LCE315")] == 7.0
+    if cps is None:
+        # 'first' giữ lần đầu dù trống điểm
+        assert ("2251010000", "CPS201") not in cells
+    else:
+        assert cells[("2251010000", "CPS201")] == cps
+
+def test_policy_order_follows_rows():
+    swapped = REPEATED.iloc[[3, 1, 2, 0, 4]].reset_index(drop=True)
+    assert _cells(matrix.build_matrix(swapped, "first"))[("2251010000", "LCE315")] == 8.5
+    assert _cells(matrix.build_matrix(swapped, "last"))[("2251010000", "LCE315")] == 6.0
+    assert _cells(matrix.build_matrix(swapped, "max"))[("2251010000", "LCE315")] == 8.5
+    with pytest.raises(ValueError):
+        matrix.build_matrix(REPEATED, "mean")
+
+def test_duplicate_report(tmp_path):
+    m = matrix.build_matrix(REPEATED, "last")
+    dup = m.duplicates
+    assert list(dup.columns) == ["Mã SV", "Mã môn học", "Số lần", "Các điểm", "Các nhóm", "Điểm giữ lại"]
+    assert dup.values.tolist() == [["2251010000", "CPS201", 2, "; 5.0", "01; 02", 5.0],
+                                   ["2251010000", "LCE315", 2, "6.0; 8.5", "06; 07", 8.5]]
+    assert list(matrix.build_matrix(REPEATED.drop(columns="Nhóm")).duplicates.columns) == [
+        "Mã SV", "Mã môn học", "Số lần", "Các điểm", "Điểm giữ lại"]
+    assert not len(matrix.build_matrix(REPEATED.iloc[:3]).duplicates)
+
+    # qua engine.save_matrix: file bảng điểm ngang + file điểm trùng, log theo policy
+    out = str(tmp_path / "Tong_Hop.csv")
+    logs = []
+    engine.save_matrix(REPEATED, out, "first", logs.append)
+    assert pd.read_csv(matrix.duplicates_path(out))["Điểm giữ lại"].tolist()[1] == 6.0
+    assert pd.read_csv(matrix.matrix_path(out)).shape == (2, 3)
+    assert any("2 trường hợp SV có nhiều điểm cùng 1 môn (giữ điểm theo 'first')" in line for line in logs)
@@ -0,0 +1,35 @@
+import os
+
+import pandas as pd
+import pytest
+
+from ghep_diem import engine, parallel
+
+def _file_logs(logs):
+    """Log từng file, bỏ phần thống kê thời gian (số giây khác nhau giữa 2 lần chạy)."""
+    return logs[:logs.index("--- Thống kê thời gian ---")]
+
+def test_map_files_keeps_order(tmp_path):
+    paths = []
+    for i in range(40):
+        p = tmp_path / f"f{i:02d}.xlsx"
+        # kích thước giảm dần: file đầu chạy lâu hơn nhưng kết quả vẫn theo thứ tự paths
+        p.write_bytes(b"x" * (40 - i))
+        paths.append(str(p))
+    expected = [40 - i for i in range(40)]
+    assert list(parallel.map_files(os.path.getsize, paths, workers=1)) == expected
+    assert list(parallel.map_files(os.path.getsize, paths, workers=4)) == expected
+
+@pytest.mark.parametrize("profile", ["auto", "lms"])
+def test_workers_give_same_result_and_logs(synth_files, profile):
+    runs = {}
+    for workers in (1, 3):
+        logs = []
+        result = engine.merge_files(synth_files, profile, logs.append, workers=workers)
+        runs[workers] = (result, _file_logs(logs))
+    pd.testing.assert_frame_equal(runs[3][0], runs[1][0])
+    assert runs[3][1] == runs[1][1]
+    if profile == "auto":
+        # log theo đúng thứ tự file
+        named = [line for line in runs[3][1] if ": kiểu " in line]
+        assert [line.split(": kiểu ")[0] for line in named] == [os.path.basename(p) for p in synth_files]
@@ -0,0 +1,100 @@
+import threading
+import time
+
+from ghep_diem import prefetch
+
+SIZE = 1000
+
+class SlowReads:
+    """Hàm read giả lập ổ mạng chậm: ghi lại file nào bắt đầu đọc lúc người gọi đã lấy ra bao nhiêu file."""
+
+    def __init__(self, paths, delay=0.01, fail=()):
+        self.index = {p: i for i, p in enumerate(paths)}
+        self.delay = delay
+        self.fail = set(fail)
+        self.lock = threading.Lock()
+        self.taken = 0
+        self.held = 0
+        self.peak = 0
+        self.started = []
+
+    def __call__(self, path):
+        with self.lock:
+            self.started.append((self.index[path], self.taken))
+            self.held += SIZE
+            self.peak = max(self.peak, self.held)
+        time.sleep(self.delay)
+        if path in self.fail:
+            raise OSError(path)
+        return path.encode()
+
+    def took(self):
+        with self.lock:
+            self.taken += 1
+            self.held -= SIZE
+
+def _files(tmp_path, n):
+    paths = []
+    for i in range(n):
+        p = tmp_path / f"f{i:02d}.xlsx"
+        p.write_bytes(b"x" * SIZE)
+        paths.append(str(p))
+    return paths
+
+def test_results_in_order_within_window(tmp_path):
+    paths = _files(tmp_path, 20)
+    reads = SlowReads(paths)
+    got = []
+    with prefetch.Prefetcher(paths, window=3, max_bytes=100 * SIZE, threads=4, read=reads) as ahead:
+        for p, data in ahead:
+            got.append((p, data))
+            reads.took()
+            time.sleep(0.005)
+    assert got == [(p, p.encode()) for p in paths]
+    # file thứ i chỉ được đọc khi người gọi đã lấy ra ít nhất i - window file
+    assert all(i - taken <= 3 for i, taken in reads.started)
+
+def test_memory_cap(tmp_path):
+    paths = _files(tmp_path, 12)
+    reads = SlowReads(paths)
+    with prefetch.Prefetcher(paths, window=10, max_bytes=2 * SIZE, threads=4, read=reads) as ahead:
+        for _ in ahead:
+            time.sleep(0.02)
+            reads.took()
+    # tối đa max_bytes, cộng file sắp lấy ra (luôn được đọc) và file người gọi đang giữ (đã trả chỗ, chưa báo took);
+    # không có giới hạn dung lượng thì window cho giữ tới 10 file
+    assert reads.peak <= 4 * SIZE
+
+def test_read_errors_give_none(tmp_path):
+    paths = _files(tmp_path, 6)
+    reads = SlowReads(paths, fail={paths[2], paths[5]})
+    with prefetch.Prefetcher(paths, window=4, read=reads) as ahead:
+        got = list(ahead)
+    assert [p for p, _ in got] == paths
+    assert [data is None for _, data in got] == [False, False, True, False, False, True]
+
+def test_close_stops_threads(tmp_path):
+    paths = _files(tmp_path, 50)
+    release = threading.Event()
+    started = []
+
+    def blocking_read(path):
+        started.append(path)
+        release.wait(5)
+        return b""
+
+    ahead = prefetch.Prefetcher(paths, window=8, threads=4, read=blocking_read)
+    it = iter(ahead)
+    release.set()
+    next(it)
+    release.clear()
+    ahead.close()
+    release.set()
+    for t in ahead._threads:
+        t.join(2)
+        assert not t.is_alive()
+    assert len(started) < len(paths)
+
+def test_map_prefetched_keeps_order(tmp_path):
+    paths = _files(tmp_path, 10)
+    assert list(prefetch.map_prefetched(str.upper, paths, window=3)) == [p.upper() for p in paths]
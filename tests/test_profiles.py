@@ -0,0 +1,117 @@
+import pandas as pd
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from ghep_diem import reader
+from ghep_diem.profiles import aq, auto, lms, lms_v1, lms_v2
+
+@pytest.mark.parametrize("header_row", [0, 7])
+def test_one_pass_read_matches_pandas_and_openpyxl(synth_files, header_row):
+    for path in synth_files:
+        sheet = reader.read_sheet_once(path, engine="openpyxl")
+        wb = load_workbook(path, data_only=True)
+        assert (sheet.c5, sheet.c6) == (wb.active["C5"].value, wb.active["C6"].value)
+        pd.testing.assert_frame_equal(reader.frame_from_rows(sheet.rows, header_row),
+                                      pd.read_excel(path, header=header_row))
+
+def test_subject_cell_comes_from_active_sheet(synth_files, tmp_path):
+    # sheet active khác sheet đầu: C5/C6 lấy ở sheet active, bảng điểm ở sheet đầu (như load_workbook().active)
+    wb = load_workbook(synth_files[0])
+    info = wb.create_sheet("Thông tin")
+    info["C5"] = "Kinh tế vi mô (ECO102) - 09"
+    wb.active = 1
+    path = str(tmp_path / "active.xlsx")
+    wb.save(path)
+    sheet = reader.read_sheet_once(path, engine="openpyxl")
+    assert (sheet.c5, sheet.c6) == ("Kinh tế vi mô (ECO102) - 09", None)
+    assert sheet.rows == reader.read_sheet_once(synth_files[0], engine="openpyxl").rows
+
+@pytest.mark.parametrize("profile", [lms, aq, lms_v2, lms_v1, auto])
+def test_projected_read_matches_full_read(synth_files, profile):
+    projected = 0
+    for path in synth_files:
+        full = reader.read_sheet_once(path)
+        try:
+            sheet = reader.read_sheet_once(path, projection=profile.PROJECTION)
+        except reader.NotGradeSheet:
+            assert profile.extract_sheet(path, full)[0] is None
+            continue
+        projected += sheet.rows != full.rows
+        expected, expected_logs = profile.extract_sheet(path, full)
+        got, logs = profile.extract_sheet(path, sheet)
+        if expected is None:
+            assert got is None
+        else:
+            pd.testing.assert_frame_equal(got, expected)
+        assert logs == expected_logs
+    assert projected
+
+# ======================= FILE KHÔNG PHẢI BẢNG ĐIỂM ==========================
+
+def _table(path, headers, row):
+    wb = Workbook()
+    ws = wb.active
+    ws["A1"] = "TRƯỜNG ĐẠI HỌC KINH TẾ"
+    for j, h in enumerate(headers, start=1):
+        ws.cell(8, j, h)
+    for i in range(20):
+        for j, v in enumerate(row(i), start=1):
+            ws.cell(9 + i, j, v)
+    wb.save(path)
+
+def _class_list(path):
+    _table(path, ["STT", "Mã SV", "Họ đệm", "Tên", "Ngày sinh", "Lớp"],
+           lambda i: [i + 1, 2251010000 + i, "Nguyễn Văn", "An", "01/01/2004", "K25"])
+
+def _attendance(path):
+    _table(path, ["STT", "MSSV", "Họ tên"] + [f"Buổi {k}" for k in range(1, 6)],
+           lambda i: [i + 1, 2251010000 + i, "Trần Thị Bình"] + ["x"] * 5)
+
+def _notes(path):
+    wb = Workbook()
+    for i, line in enumerate(["Ghi chú của giảng viên", "Nộp điểm trước 30/6", "Liên hệ phòng đào tạo"], start=1):
+        wb.active.cell(i, 1, line)
+    wb.save(path)
+
+def _empty(path):
+    Workbook().save(path)
+
+NOT_GRADE = {"Danh sach lop (251-LCE315-01).xlsx": _class_list, "Diem danh (251-LCE315-01).xlsx": _attendance,
+             "Ghi chu GV.xlsx": _notes, "Trong.xlsx": _empty}
+
+# file bỏ ngay từ các dòng đầu (NotGradeSheet); file còn lại của profile vẫn đọc cả sheet rồi mới bỏ:
+# lms_v1 có thể lấy điểm ở cột L dù dòng header không có tên cột điểm, auto có thể nhận ra lms_v1 như vậy
+PRESCAN_REJECTS = {lms: set(NOT_GRADE), aq: set(NOT_GRADE), lms_v2: set(NOT_GRADE),
+                   lms_v1: {"Ghi chu GV.xlsx", "Trong.xlsx"}, auto: {"Ghi chu GV.xlsx", "Trong.xlsx"}}
+
+@pytest.fixture(scope="module")
+def not_grade_files(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("not_grade")
+    paths = {}
+    for name, make in NOT_GRADE.items():
+        paths[name] = str(folder / name)
+        make(paths[name])
+    return paths
+
+@pytest.mark.parametrize("profile", list(PRESCAN_REJECTS))
+def test_not_grade_files_rejected_with_reason(not_grade_files, profile):
+    for name, path in not_grade_files.items():
+        df, logs = profile.extract_file(path)
+        assert df is None
+        # đọc cả sheet cũng bỏ file này: pre-scan không bỏ nhầm, chỉ bỏ sớm hơn
+        assert profile.extract_sheet(path, reader.read_sheet_once(path))[0] is None
+        if name not in PRESCAN_REJECTS[profile]:
+            reader.read_sheet_once(path, projection=profile.PROJECTION)
+            continue
+        with pytest.raises(reader.NotGradeSheet) as e:
+            reader.read_sheet_once(path, projection=profile.PROJECTION)
+        assert str(e.value) and str(e.value) in logs[-1] and "Bỏ qua" in logs[-1]
+
+@pytest.mark.parametrize("profile", list(PRESCAN_REJECTS))
+def test_grade_files_not_rejected(synth_files, profile):
+    from benchmarks import synth
+    # synth_files xoay vòng synth.LAYOUTS: file đúng bố cục của profile (auto: mọi bố cục) không bị pre-scan bỏ
+    for i, path in enumerate(synth_files):
+        if profile is auto or synth.LAYOUTS[i % len(synth.LAYOUTS)] == profile.NAME:
+            reader.read_sheet_once(path, projection=profile.PROJECTION)
+            assert profile.extract_file(path)[0] is not None
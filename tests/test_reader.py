@@ -0,0 +1,192 @@
+import io
+import os
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from ghep_diem import reader
+from ghep_diem.profiles import aq, auto, lms, lms_v1, lms_v2
+
+def _leading_zero_workbook(path, footer_in_id_column=True):
+    """Bảng điểm có Mã SV '0012300' (ô chữ) và dòng 'Điều kiện dự thi' nằm trong cột Mã SV (hoặc cột A)."""
+    wb = Workbook()
+    ws = wb.active
+    ws["C5"] = "Tiếng Anh 1 (LCE315) - 06"
+    rows = [["STT", "Mã SV", "Họ", "Tên", "TBC ĐTP (*)"],
+            [1, "0012300", "A", "B", 7.5],
+            [2, 2251010001, "C", "D", 8],
+            [3, " 2251010002 ", "E", "F", 6]]
+    for r, row in enumerate(rows, start=8):
+        for j, v in enumerate(row, start=1):
+            ws.cell(r, j, v)
+    ws.cell(12, 1, "Số SV: 3")
+    ws.cell(13, 2 if footer_in_id_column else 1, "Điều kiện dự thi: đủ 80%")
+    wb.save(path)
+    return str(path)
+
+def test_projection_keeps_leading_zero_id(tmp_path):
+    path = _leading_zero_workbook(tmp_path / "Tieng Anh (251-LCE315-06).xlsx")
+    for profile in (lms, aq, auto):
+        df, _ = profile.extract_file(path)
+        assert list(df["Mã SV"].astype(object)) == ["0012300", 2251010001, " 2251010002 "], profile.__name__
+
+@pytest.mark.parametrize("footer_in_id_column", [True, False])
+def test_projection_keeps_id_type_of_full_read(tmp_path, footer_in_id_column):
+    # kiểu pandas suy ra cho cột Mã SV phụ thuộc cả các dòng dưới bảng: đọc bớt phải cho cùng kết quả đọc cả sheet
+    path = _leading_zero_workbook(tmp_path / "Tieng Anh (251-LCE315-06).xlsx", footer_in_id_column)
+    full = reader.read_sheet_once(path)
+    for profile in (lms, aq, auto):
+        sheet = reader.read_sheet_once(path, projection=profile.PROJECTION)
+        expected = profile.extract_sheet(path, full)[0]
+        got = profile.extract_sheet(path, sheet)[0]
+        if expected is None:
+            assert got is None
+        else:
+            pd.testing.assert_frame_equal(got, expected)
+
+def _installed(monkeypatch, *names):
+    monkeypatch.setattr(reader, "engine_available", lambda name: name in names)
+
+def test_pick_engine_by_file_kind(monkeypatch):
+    _installed(monkeypatch, "openpyxl", "xlrd")
+    assert reader.pick_engine("xlsx") == "openpyxl"
+    assert reader.pick_engine("xls") == "xlrd"
+    _installed(monkeypatch, "calamine", "openpyxl", "xlrd")
+    assert reader.pick_engine("xlsx") == "calamine"
+    assert reader.pick_engine("xlsx", "openpyxl") == "openpyxl"
+    # engine không đọc được loại file này -> theo thứ tự mặc định
+    assert reader.pick_engine("xlsx", "xlrd") == "calamine"
+    monkeypatch.setenv(reader.ENGINE_ENV, "xlrd")
+    assert reader.pick_engine("xls") == "xlrd"
+    with pytest.raises(ValueError):
+        reader.pick_engine("xlsx", "excel")
+
+def test_missing_xls_engine_names_package(monkeypatch):
+    _installed(monkeypatch, "openpyxl")
+    with pytest.raises(ImportError, match="xlrd"):
+        reader.pick_engine("xls")
+
+def test_file_kind_by_content(synth_files, tmp_path):
+    # file xlsx bị đặt đuôi .xls vẫn đọc bằng engine xlsx
+    renamed = tmp_path / "Diem.xls"
+    renamed.write_bytes(open(synth_files[0], "rb").read())
+    assert reader.file_kind(str(renamed), str(renamed)) == "xlsx"
+    assert reader.read_sheet_once(str(renamed)).rows == reader.read_sheet_once(synth_files[0]).rows
+    ole2 = io.BytesIO(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\0" * 100)
+    assert reader.file_kind(ole2, "Diem.xlsx") == "xls"
+
+@pytest.mark.parametrize("profile", [lms, aq, lms_v2, lms_v1, auto])
+def test_calamine_matches_openpyxl(synth_files, profile):
+    pytest.importorskip("python_calamine")
+    for path in synth_files:
+        for projection in (None, profile.PROJECTION):
+            try:
+                a = reader.read_sheet_once(path, "openpyxl", projection)
+            except reader.NotGradeSheet:
+                with pytest.raises(reader.NotGradeSheet):
+                    reader.read_sheet_once(path, "calamine", projection)
+                continue
+            assert reader.read_sheet_once(path, "calamine", projection) == a
+
+def _as_xls(xlsx_path, xls_path):
+    """Chép giá trị sheet đầu của file xlsx sang file .xls (Excel 97-2003), kèm 1 ô ngày ở cột cuối dòng 1."""
+    import datetime
+    import xlwt
+    from openpyxl import load_workbook
+
+    ws = load_workbook(xlsx_path).worksheets[0]
+    book = xlwt.Workbook()
+    out = book.add_sheet("Sheet1")
+    for row in ws.iter_rows():
+        for cell in row:
+            if cell.value is not None:
+                out.write(cell.row - 1, cell.column - 1, cell.value)
+    out.write(0, ws.max_column + 1, datetime.datetime(2025, 6, 30), xlwt.easyxf(num_format_str="DD/MM/YYYY"))
+    book.save(xls_path)
+    return str(xls_path)
+
+@pytest.mark.parametrize("profile", [lms, aq, lms_v2, lms_v1, auto])
+def test_xlrd_reads_rows_with_projection(synth_files, tmp_path, profile, monkeypatch):
+    pytest.importorskip("xlrd")
+    pytest.importorskip("xlwt")
+    engines = ["xlrd"] + (["calamine"] if reader.engine_available("calamine") else [])
+    pruned = 0
+    for i, path in enumerate(synth_files):
+        xls = _as_xls(path, tmp_path / f"{i}_{profile.NAME}.xls")
+        full = reader.read_sheet_once(xls, "xlrd")
+        # cùng giá trị ô với pandas đọc bằng xlrd, và với calamine
+        expected = pd.read_excel(xls, header=None, engine="xlrd")
+        pd.testing.assert_frame_equal(reader.frame_from_rows(full.rows, None), expected)
+        try:
+            projected = reader.read_sheet_once(xls, "xlrd", profile.PROJECTION)
+        except reader.NotGradeSheet:
+            assert profile.extract_sheet(xls, full)[0] is None
+            for engine in engines[1:]:
+                with pytest.raises(reader.NotGradeSheet):
+                    reader.read_sheet_once(xls, engine, profile.PROJECTION)
+            continue
+        for engine in engines[1:]:
+            assert reader.read_sheet_once(xls, engine, profile.PROJECTION) == projected
+        pruned += projected.rows != full.rows
+        a, logs_a = profile.extract_sheet(xls, full)
+        b, logs_b = profile.extract_sheet(xls, projected)
+        assert logs_a == logs_b
+        if a is None:
+            assert b is None
+        else:
+            pd.testing.assert_frame_equal(a, b)
+    assert pruned
+
+CONVERTERS = {"openpyxl": "_convert_cell", "calamine": "_convert_value", "xlrd": "_convert_xlrd_cell"}
+
+def _engine_file(engine, path, tmp_path):
+    """File cho engine: xlrd chỉ đọc .xls nên chép sang .xls; engine chưa cài -> skip."""
+    if not reader.engine_available(engine):
+        pytest.skip(f"chưa cài {engine}")
+    if engine != "xlrd":
+        return path
+    pytest.importorskip("xlwt")
+    return _as_xls(path, tmp_path / (os.path.splitext(os.path.basename(path))[0] + ".xls"))
+
+def _count_reading(monkeypatch, engine):
+    """Đếm số ô engine đổi giá trị và số dòng _collect_rows lấy từ engine (engine phải đưa dòng lần lượt)."""
+    converted, pulled = [], []
+    real = getattr(reader, CONVERTERS[engine])
+    monkeypatch.setattr(reader, CONVERTERS[engine], lambda *args: converted.append(1) or real(*args))
+    collect = reader._collect_rows
+
+    def counted_collect(raw_rows, *args):
+        assert not isinstance(raw_rows, (list, tuple))
+        return collect((pulled.append(1) or row for row in raw_rows), *args)
+
+    monkeypatch.setattr(reader, "_collect_rows", counted_collect)
+    return converted, pulled
+
+@pytest.mark.parametrize("engine", list(CONVERTERS))
+def test_every_engine_reads_only_projected_columns(tmp_path, engine, monkeypatch):
+    from benchmarks import synth
+    path = _engine_file(engine, synth.generate(str(tmp_path / "in"), "lms", n_files=1, n_rows=60)[0], tmp_path)
+    converted, _ = _count_reading(monkeypatch, engine)
+    reader.read_sheet_once(path, engine)
+    full = len(converted)
+    converted.clear()
+    # chỉ đổi giá trị các ô cột Mã SV / TBC ĐTP từ dòng header trở đi
+    reader.read_sheet_once(path, engine, lms.PROJECTION)
+    assert 0 < len(converted) < full / 2
+
+@pytest.mark.parametrize("engine", list(CONVERTERS))
+def test_every_engine_prescans_first_rows_only(tmp_path, engine, monkeypatch):
+    roster = str(tmp_path / "Danh sach lop.xlsx")
+    wb = Workbook()
+    wb.active.append(["STT", "Mã SV", "Họ tên", "Lớp"])
+    for r in range(300):
+        wb.active.append([r + 1, 2251010000 + r, "Nguyễn Văn An", "K25"])
+    wb.save(roster)
+    roster = _engine_file(engine, roster, tmp_path)
+    converted, pulled = _count_reading(monkeypatch, engine)
+    # danh sách lớp bị bỏ sau search_rows dòng đầu: không lấy / đổi giá trị phần còn lại của sheet
+    with pytest.raises(reader.NotGradeSheet):
+        reader.read_sheet_once(roster, engine, lms.PROJECTION)
+    assert len(pulled) == lms.HEADER_SEARCH_ROWS
+    assert len(converted) <= lms.HEADER_SEARCH_ROWS * 5
@@ -0,0 +1,86 @@
+import os
+import shutil
+import zipfile
+
+import pandas as pd
+import pytest
+
+from benchmarks import synth
+from ghep_diem import engine, sources
+from ghep_diem.profiles import lms
+
+@pytest.fixture
+def tree(tmp_path):
+    """
+    Thư mục nguồn lồng nhau: 2 file ở gốc, 1 file mỗi thư mục con, 1 file ZIP (trong thư mục con) chứa 2 file Excel,
+    cùng vài file không phải Excel. Trả về (thư mục nguồn, {đường dẫn tương đối: file gốc đã chép vào}).
+    """
+    made = synth.generate(str(tmp_path / "made"), "lms", n_files=6, n_rows=15, seed=4)
+    root = tmp_path / "in"
+    layout = {"a.xlsx": made[0], "b_cu.xlsx": made[1], "Khoa A/c.xlsx": made[2], "Khoa B/Lop 2/d.xlsx": made[3]}
+    for rel, src in layout.items():
+        os.makedirs(root / os.path.dirname(rel), exist_ok=True)
+        shutil.copy(src, root / rel)
+    (root / "ghi chu.txt").write_text("không phải file Excel")
+    (root / "~$a.xlsx").write_bytes(b"")
+    with zipfile.ZipFile(root / "Khoa B" / "HK1.zip", "w") as zf:
+        zf.write(made[4], "Khoa C/e.xlsx")
+        zf.write(made[5], "f_cu.xlsx")
+        zf.writestr("__MACOSX/Khoa C/._e.xlsx", b"")
+        zf.writestr("doc.txt", "x")
+    return str(root), layout, made
+
+def _rel(root, paths):
+    out = []
+    for p in paths:
+        zip_path, member = sources.split_member(p)
+        rel = os.path.relpath(zip_path, root).replace(os.sep, "/")
+        out.append(rel if member is None else f"{rel}::{member}")
+    return out
+
+def test_list_top_level_only(tree):
+    root, _, _ = tree
+    assert sorted(_rel(root, sources.list_sources(root))) == ["a.xlsx", "b_cu.xlsx"]
+
+def test_list_recursive_with_zip(tree):
+    root, _, _ = tree
+    assert _rel(root, sources.list_sources(root, recursive=True)) == [
+        "a.xlsx", "b_cu.xlsx", "Khoa A/c.xlsx", "Khoa B/HK1.zip::Khoa C/e.xlsx", "Khoa B/HK1.zip::f_cu.xlsx",
+        "Khoa B/Lop 2/d.xlsx"]
+
+def test_include_exclude(tree):
+    root, _, _ = tree
+    # mẫu không có '/' so với tên file, có '/' so với đường dẫn tương đối (file trong ZIP: kèm đường dẫn ZIP)
+    assert _rel(root, sources.list_sources(root, recursive=True, exclude=["*_cu.xlsx"])) == [
+        "a.xlsx", "Khoa A/c.xlsx", "Khoa B/HK1.zip::Khoa C/e.xlsx", "Khoa B/Lop 2/d.xlsx"]
+    assert _rel(root, sources.list_sources(root, recursive=True, include=["Khoa B/*"])) == [
+        "Khoa B/HK1.zip::Khoa C/e.xlsx", "Khoa B/HK1.zip::f_cu.xlsx", "Khoa B/Lop 2/d.xlsx"]
+    zip_path = os.path.join(root, "Khoa B", "HK1.zip")
+    assert _rel(root, sources.list_sources(zip_path, include=["Khoa C/*"])) == ["Khoa B/HK1.zip::Khoa C/e.xlsx"]
+
+def test_zip_member_reads_like_file(tree):
+    root, _, made = tree
+    member = sources.member_path(os.path.join(root, "Khoa B", "HK1.zip"), "Khoa C/e.xlsx")
+    assert os.path.basename(member) == "e.xlsx"
+    # file ngay gốc ZIP: basename vẫn là tên file (profile lấy mã môn / nhóm từ đó)
+    assert os.path.basename(sources.member_path("HK1.zip", "f_cu.xlsx")) == "f_cu.xlsx"
+    assert sources.read_bytes(member) == open(made[4], "rb").read()
+    assert sources.signature(member)[0] == os.path.getsize(made[4])
+
+def test_merge_through_process_pool(tree, tmp_path):
+    root, _, made = tree
+    paths = sources.list_sources(root, recursive=True)
+    # cùng các file đó nằm thẳng trên đĩa (cùng tên, vì mã môn/nhóm có thể lấy từ tên file)
+    flat = tmp_path / "flat"
+    flat.mkdir()
+    expected_paths = []
+    for p, src in zip(paths, [made[0], made[1], made[2], made[4], made[5], made[3]]):
+        dst = flat / os.path.basename(p)
+        shutil.copy(src, dst)
+        expected_paths.append(str(dst))
+    logs = []
+    merged = engine.merge_files(paths, "lms", logs.append, workers=2, skip_duplicate_files=False)
+    expected = engine.merge_files(expected_paths, "lms", lambda line: None, workers=1, skip_duplicate_files=False)
+    # mọi file được đọc, kể cả 2 file trong ZIP (đọc trong tiến trình con từ đường dẫn 'x.zip::tên')
+    assert len(merged) == sum(len(lms.extract_file(p)[0]) for p in made)
+    pd.testing.assert_frame_equal(merged, expected)
@@ -0,0 +1,31 @@
+import pandas as pd
+
+from ghep_diem import store
+
+def _part(ids, subject="LCE315", group="06", score=7.5):
+    return pd.DataFrame({"Mã SV": ids, "Điểm TBC": score, "Mã môn học": subject, "Nhóm": group})
+
+def _merge(db, run, parts):
+    s = store.ResultStore(db, run, "lms")
+    for name, part in parts:
+        s.add(part, name)
+    s.commit()
+
+def test_rerun_replaces_rows_of_that_run(tmp_path):
+    db = str(tmp_path / "diem.sqlite3")
+    _merge(db, "HK1", [("a.xlsx", _part([2251010000, 2251010001])), ("b.xlsx", _part([2251010002], "CPS201"))])
+    _merge(db, "HK2", [("a.xlsx", _part([2251010000]))])
+    # b.xlsx đã xóa, a.xlsx sửa điểm: không còn dòng của b.xlsx trong HK1
+    _merge(db, "HK1", [("a.xlsx", _part([2251010000, 2251010001], score=9.0))])
+    hk1 = store.lookup(db, run="HK1")
+    assert hk1["Mã SV"].tolist() == ["2251010000", "2251010001"]
+    assert hk1["Điểm"].tolist() == [9.0, 9.0]
+    assert len(store.lookup(db, run="HK2")) == 1
+
+def test_rollback_keeps_previous_rows(tmp_path):
+    db = str(tmp_path / "diem.sqlite3")
+    _merge(db, "HK1", [("a.xlsx", _part([2251010000]))])
+    s = store.ResultStore(db, "HK1")
+    s.add(_part([2251010009]), "c.xlsx")
+    s.rollback()
+    assert store.lookup(db, run="HK1")["Mã SV"].tolist() == ["2251010000"]
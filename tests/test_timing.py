@@ -0,0 +1,61 @@
+import json
+import os
+
+import pytest
+from openpyxl import Workbook
+
+from ghep_diem import engine, reader, timing
+from ghep_diem.cache import ParseCache
+from ghep_diem.profiles import aq, auto, lms, lms_v1, lms_v2
+
+def test_timed_extract_does_not_reread_rejected_files(tmp_path, monkeypatch):
+    path = str(tmp_path / "Ghi chu GV.xlsx")
+    wb = Workbook()
+    for i, line in enumerate(["Ghi chú của giảng viên", "Nộp điểm trước 30/6"], start=1):
+        wb.active.cell(i, 1, line)
+    wb.save(path)
+    opened = []
+    real = reader.sources.open_binary
+    monkeypatch.setattr(reader.sources, "open_binary", lambda p: opened.append(p) or real(p))
+    for profile in (lms, aq, lms_v2, lms_v1, auto):
+        expected = profile.extract_file(path)
+        opened.clear()
+        temp, logs, stats = timing.timed_extract(profile.NAME, path)
+        # pre-scan bỏ file ngay lượt đọc đầu: không đọc lại, log như khi không đo
+        assert opened == [path]
+        assert temp is None and logs == expected[1] and "Bỏ qua" in logs[-1]
+        assert stats.rows_out == 0 and stats.stages["read"] > 0
+
+def _report(out_path):
+    with open(timing.report_path(out_path), encoding="utf-8") as f:
+        return json.load(f)
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_run_report_json_next_to_output(synth_files, tmp_path, stream):
+    paths = synth_files[:6]
+    out = str(tmp_path / "Tong_Hop.xlsx")
+    logs = []
+    cache = ParseCache("auto", str(tmp_path / "cache"))
+    rows = engine.merge_to_file(paths, out, "auto", logs.append, cache=cache, stream=stream)
+    assert timing.report_path(out) == str(tmp_path / "Tong_Hop.report.json")
+    assert any(line.endswith(f"Báo cáo thời gian: {timing.report_path(out)}") for line in logs)
+    report = _report(out)
+    assert set(report) == {"profile", "workers", "started", "total_seconds", "files", "cached_files", "bytes",
+                           "rows_in", "rows_out", "stages", "result_memory", "slowest", "per_file"}
+    assert (report["profile"], report["workers"], report["files"], report["cached_files"]) == ("auto", 1, 6, 0)
+    assert report["bytes"] == sum(os.path.getsize(p) for p in paths)
+    assert report["rows_out"] == rows and report["rows_in"] > rows
+    assert [f["path"] for f in report["per_file"]] == paths
+    assert [f["bytes"] for f in report["per_file"]] == [os.path.getsize(p) for p in paths]
+    by_path = {f["path"]: f["seconds"] for f in report["per_file"]}
+    assert sorted(report["slowest"]) == sorted(paths)
+    assert [by_path[p] for p in report["slowest"]] == sorted(by_path.values(), reverse=True)
+    assert report["stages"]["read"] > 0 and report["stages"]["write"] > 0
+    assert report["total_seconds"] >= report["stages"]["write"]
+    assert (report["result_memory"] is None) == stream
+
+    # lần 2: file lấy từ cache, không tính vào file chậm nhất
+    engine.merge_to_file(paths, out, "auto", logs.append, cache=cache, stream=stream)
+    report = _report(out)
+    assert report["cached_files"] == 6 and report["slowest"] == []
+    assert all(f["cached"] for f in report["per_file"])
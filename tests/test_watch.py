@@ -0,0 +1,103 @@
+import os
+import shutil
+import zipfile
+
+import pandas as pd
+import pytest
+
+from ghep_diem import engine, sources, watch
+
+class Script:
+    """
+    Thay cancel_event của watch_merge: mỗi lần chờ giữa 2 lượt quét chạy 1 bước (sửa thư mục / kiểm tra kết quả),
+    hết bước thì dừng. Chạy tuần tự nên không phụ thuộc thời gian.
+    """
+
+    def __init__(self, *steps):
+        self.steps = list(steps)
+
+    def is_set(self):
+        return not self.steps
+
+    def wait(self, timeout=None):
+        self.steps.pop(0)()
+
+def _noop():
+    pass
+
+def _rows(path):
+    return len(pd.read_excel(path))
+
+def test_poll_waits_until_file_is_stable(tmp_path):
+    a = tmp_path / "a.xlsx"
+    a.write_bytes(b"a")
+    watcher = watch.FolderWatcher(str(tmp_path))
+    assert watcher.poll() == ([str(a)], [], [])
+    b = tmp_path / "b.xlsx"
+    b.write_bytes(b"b")
+    # file mới / vừa sửa chỉ được báo khi không đổi giữa 2 lần quét
+    assert watcher.poll() == ([], [], [])
+    assert watcher.poll() == ([str(b)], [], [])
+    a.write_bytes(b"aa")
+    assert watcher.poll() == ([], [], [])
+    assert watcher.poll() == ([], [str(a)], [])
+    b.unlink()
+    assert watcher.poll() == ([], [], [str(b)])
+    assert watcher.order == [str(a)]
+
+def _tree(root, synth_files):
+    """Thư mục nguồn có thư mục con và file ZIP, như test_sources."""
+    (root / "Khoa A").mkdir(parents=True)
+    shutil.copy(synth_files[0], root / "top.xlsx")
+    shutil.copy(synth_files[1], root / "Khoa A" / "a.xlsx")
+    shutil.copy(synth_files[2], root / "Khoa A" / "a_cu.xlsx")
+    with zipfile.ZipFile(root / "HK1.zip", "w") as zf:
+        zf.write(synth_files[4], "Khoa B/b.xlsx")
+    (root / "~$top.xlsx").write_bytes(b"lock")
+
+@pytest.mark.parametrize("recursive, include, exclude", [(False, (), ()), (True, (), ()),
+                                                        (True, (), ("*_cu.xlsx",)), (True, ("Khoa B/*",), ())])
+def test_scan_matches_list_sources(tmp_path, synth_files, recursive, include, exclude):
+    _tree(tmp_path, synth_files)
+    out = tmp_path / "Tong_Hop.xlsx"
+    out.write_bytes(b"old result")
+    found = watch.scan_folder(str(tmp_path), recursive, include, exclude, skip=(str(out),))
+    expected = [p for p in sources.list_sources(str(tmp_path), recursive, include, exclude) if p != str(out)]
+    assert list(found) == expected
+    assert all(found[p] == sources.signature(p) for p in expected)
+
+def test_watch_updates_on_add_change_delete(tmp_path, synth_files):
+    folder = tmp_path / "in"
+    _tree(folder, synth_files)
+    out = str(folder / "Tong_Hop.xlsx")
+    extra = folder / "Khoa A" / "moi.xlsx"
+    seen = []
+
+    def expect(*paths):
+        # kết quả như 1 lượt ghép thường trên cùng các file
+        def check():
+            expected = engine.merge_files(list(paths), "auto", lambda _: None, skip_duplicate_files=False)
+            seen.append(_rows(out))
+            assert seen[-1] == len(expected)
+        return check
+
+    top, a, a_cu = str(folder / "top.xlsx"), str(folder / "Khoa A" / "a.xlsx"), str(folder / "Khoa A" / "a_cu.xlsx")
+    member = sources.member_path(str(folder / "HK1.zip"), "Khoa B/b.xlsx")
+    logs = []
+    script = Script(
+        expect(top, a, member),
+        lambda: shutil.copy(synth_files[8], extra), _noop,
+        expect(top, a, str(extra), member),
+        # sửa: a.xlsx có nội dung của file khác
+        lambda: shutil.copy(synth_files[5], a), _noop,
+        expect(top, a, str(extra), member),
+        lambda: os.remove(top),
+        expect(a, str(extra), member),
+    )
+    engine.watch_to_file(str(folder), out, "auto", logs.append, cancel_event=script, interval=0,
+                         recursive=True, exclude=("*_cu.xlsx",))
+    assert len(seen) == 4 and len(set(seen)) > 1
+    assert not any("Bỏ qua" in line or os.path.basename(a_cu) in line for line in logs)
+    stamps = [line.split("] ", 1)[1].split(" (")[0] for line in logs if line.startswith("[")]
+    assert stamps == ["+3 thêm, ~0 sửa, -0 xóa", "+1 thêm, ~0 sửa, -0 xóa", "+0 thêm, ~1 sửa, -0 xóa",
+                      "+0 thêm, ~0 sửa, -1 xóa"]
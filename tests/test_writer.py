@@ -0,0 +1,65 @@
+import os
+
+import pandas as pd
+import pytest
+
+from ghep_diem import writer
+
+def test_split_keeps_colliding_subjects_apart(tmp_path):
+    result = pd.DataFrame({"Mã SV": [1, 2, 3, 4, 5],
+                           "Mã môn học": ["LCE/315", "LCE 315", "LCE_315", "lce_315", "CPS201"],
+                           "Điểm TBC": [1.0, 2.0, 3.0, 4.0, 5.0]})
+    written = writer.write_split(result, str(tmp_path / "Tong_Hop.csv"))
+    names = [os.path.basename(p) for p, _ in written]
+    assert len({n.lower() for n in names}) == 5
+    assert sum(rows for _, rows in written) == 5
+    scores = sorted(pd.read_csv(p)["Điểm TBC"].iloc[0] for p, _ in written)
+    assert scores == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert "Tong_Hop_LCE_315_2.csv" in names
+
+def test_parquet_sink_writes_scores_as_float(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "Tong_Hop.parquet")
+    columns = ["Mã SV", "Điểm TBC", "Mã môn học", "Nhóm"]
+    sink = writer.open_sink(path, columns)
+    sink.append(pd.DataFrame({"Mã SV": [2251010000, "SV-01"], "Điểm TBC": [7.5, " 8 "],
+                              "Mã môn học": "LCE315", "Nhóm": "06"}))
+    sink.append(pd.DataFrame({"Mã SV": [2251010001, 2251010002], "Điểm TBC": ["Vắng", None],
+                              "Mã môn học": "CPS201", "Nhóm": "01"}))
+    sink.close()
+    df = pd.read_parquet(path)
+    assert df["Điểm TBC"].dtype == "float64"
+    assert df["Điểm TBC"].tolist()[:2] == [7.5, 8.0] and df["Điểm TBC"].iloc[2:].isna().all()
+    assert df["Mã SV"].tolist() == ["2251010000", "SV-01", "2251010001", "2251010002"]
+    assert sink.text_scores == 1
+
+def _sheets(path):
+    return pd.read_excel(path, sheet_name=None, dtype=object)
+
+def test_xlsx_splits_rows_over_limit(tmp_path):
+    result = pd.DataFrame({"Mã SV": [2251010000 + i for i in range(11)],
+                           "Họ và tên": [f"SV {i}" for i in range(11)],
+                           "Điểm TBC": [i / 2 for i in range(11)]})
+    path = str(tmp_path / "Tong_Hop.xlsx")
+    # 4 dòng/sheet kể cả tiêu đề -> 3 dòng dữ liệu mỗi sheet
+    writer.write_xlsx(result, path, max_rows=4, extra_sheets=[("Xung đột", result.head(2))])
+    sheets = _sheets(path)
+    assert list(sheets) == ["Sheet1", "Sheet2", "Sheet3", "Sheet4", "Xung đột"]
+    assert writer.sheet_count(len(result), max_rows=4) == 4
+    assert [len(sheets[f"Sheet{i}"]) for i in range(1, 5)] == [3, 3, 3, 2]
+    joined = pd.concat([sheets[f"Sheet{i}"] for i in range(1, 5)], ignore_index=True)
+    assert joined.values.tolist() == result.astype(object).values.tolist()
+    assert len(sheets["Xung đột"]) == 2
+
+def test_xlsx_sink_splits_across_parts(tmp_path):
+    result = pd.DataFrame({"Mã SV": list(range(10)), "Điểm TBC": [float(i) for i in range(10)]})
+    path = str(tmp_path / "Tong_Hop.xlsx")
+    sink = writer.XlsxSink(path, result.columns, max_rows=4)
+    for start, stop in ((0, 2), (2, 7), (7, 10)):
+        sink.append(result.iloc[start:stop])
+    sink.close()
+    assert sink.rows == 10 and sink.sheets == 4
+    sheets = _sheets(path)
+    assert list(sheets) == ["Sheet1", "Sheet2", "Sheet3", "Sheet4"]
+    joined = pd.concat(sheets.values(), ignore_index=True)
+    assert joined.values.tolist() == result.astype(object).values.tolist()